@@ -0,0 +1,20 @@
+from fastapi import APIRouter, HTTPException
+from typing import Dict
+
+from app.services.brick import BrickService, SingleWorkerOnlyError
+
+router = APIRouter()
+brick_service = BrickService()
+
+@router.post("/reload")
+async def reload_graph() -> Dict:
+    """Re-parse building files that changed on disk and swap in the new graph
+
+    The current graph keeps serving requests until the new one is ready.
+    """
+    try:
+        return await brick_service.reload()
+    except SingleWorkerOnlyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Reload failed: {str(e)}")
@@ -1,21 +1,50 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, Request, Response
+from typing import Dict, List
 
+from app.api.v1.conditional import ConditionalRoute
 from app.models.schemas import Building
-from app.services.brick import BrickService
+from app.services.brick import BrickService, SingleWorkerOnlyError
+from app.services.image import ReadOnlyGraphError
+from app.services.ingest import INGEST_FORMATS, InvalidTriplesError, ingest_format
 
-router = APIRouter()
+router = APIRouter(route_class=ConditionalRoute)
 brick_service = BrickService()
 
 @router.get("/", response_model=List[Building])
 async def get_buildings():
     """Get all buildings from the Brick graph"""
     try:
-        buildings = await brick_service.get_buildings()
-        if not buildings:
+        page = await brick_service.render_buildings()
+        if not page.total:
             raise HTTPException(status_code=404, detail="No buildings found")
-        return buildings
+        return Response(page.body, media_type="application/json")
     except Exception as e:
         if "No buildings found" in str(e):
             raise HTTPException(status_code=404, detail=str(e))
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/{building_id}/triples")
+async def add_triples(building_id: str, request: Request) -> Dict:
+    """Bulk-add Turtle or N-Triples from the request body to a building's graph"""
+    return await _ingest(building_id, request, delete=False)
+
+@router.delete("/{building_id}/triples")
+async def delete_triples(building_id: str, request: Request) -> Dict:
+    """Bulk-delete the Turtle or N-Triples in the request body from a building's graph"""
+    return await _ingest(building_id, request, delete=True)
+
+async def _ingest(building_id: str, request: Request, delete: bool) -> Dict:
+    format_name = ingest_format(request.headers.get("content-type"))
+    if format_name is None:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Supported content types: {', '.join(INGEST_FORMATS)}"
+        )
+    try:
+        return await brick_service.ingest_triples(building_id, request.stream(), format_name, delete)
+    except InvalidTriplesError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except (ReadOnlyGraphError, SingleWorkerOnlyError) as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,51 @@
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from typing import Callable, Optional
+from urllib.parse import urlencode
+
+from app.services.brick import BrickService
+
+brick_service = BrickService()
+
+
+class ConditionalRoute(APIRoute):
+    """Route whose GET responses depend only on the graph, revalidated by ETag
+
+    A GET carrying an If-None-Match that matches the current tag gets a 304
+    before the endpoint runs, so the graph is not touched. Other successful
+    GETs carry the tag for the client to send back.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def conditional_handler(request: Request) -> Response:
+            if request.method != "GET":
+                return await handler(request)
+            etag = brick_service.etag(request_scope(request))
+            if etag_matches(request.headers.get("if-none-match"), etag):
+                return Response(status_code=304, headers={"ETag": etag})
+            response = await handler(request)
+            if response.status_code == 200:
+                response.headers["ETag"] = etag
+            return response
+
+        return conditional_handler
+
+
+def request_scope(request: Request) -> str:
+    """The path and query parameters of a request, in a canonical order"""
+    return f"{request.url.path}?{urlencode(sorted(request.query_params.multi_items()))}"
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header names ``etag`` (weak comparison, as RFC 9110 requires)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
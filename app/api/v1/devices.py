@@ -1,40 +1,65 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, Query, Response
+from typing import List, Optional
 
+from app.api.v1.conditional import ConditionalRoute
 from app.models.schemas import Device
-from app.services.brick import BrickService
+from app.api.v1.pagination import set_page_headers
+from app.services.brick import BrickService, InvalidCursorError
 
-router = APIRouter()
+router = APIRouter(route_class=ConditionalRoute)
 brick_service = BrickService()
 
 @router.get("/building/{building_id}", response_model=List[Device])
-async def get_building_devices(building_id: str):
+async def get_building_devices(
+    building_id: str,
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of devices to return"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    include_points: bool = Query(False, description="Populate the points of each device")
+):
     """Get all devices in a specific building"""
     try:
-        devices = await brick_service.get_building_devices(building_id)
-        if not devices:
+        page = await brick_service.render_building_devices_page(
+            building_id, limit, cursor, include_points
+        )
+        if not page.total:
             raise HTTPException(
                 status_code=404,
                 detail=f"No devices found in building {building_id}"
             )
-        return devices
+        rendered = Response(page.body, media_type="application/json")
+        set_page_headers(rendered, page)
+        return rendered
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         if "No devices found" in str(e):
             raise HTTPException(status_code=404, detail=str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/floor/{building_id}/{floor_id}", response_model=List[Device])
-async def get_floor_devices(building_id: str, floor_id: str):
+async def get_floor_devices(
+    building_id: str,
+    floor_id: str,
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of devices to return"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    include_points: bool = Query(False, description="Populate the points of each device")
+):
     """Get all devices in a specific floor"""
     try:
-        devices = await brick_service.get_floor_devices(building_id, floor_id)
-        if not devices:
+        page = await brick_service.render_floor_devices_page(
+            building_id, floor_id, limit, cursor, include_points
+        )
+        if not page.total:
             raise HTTPException(
                 status_code=404,
                 detail=f"No devices found on floor {floor_id} in building {building_id}"
             )
-        return devices
+        rendered = Response(page.body, media_type="application/json")
+        set_page_headers(rendered, page)
+        return rendered
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         if "No devices found" in str(e):
             raise HTTPException(status_code=404, detail=str(e))
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e)) 
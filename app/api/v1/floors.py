@@ -1,23 +1,24 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 from typing import List
 
+from app.api.v1.conditional import ConditionalRoute
 from app.models.schemas import Floor
 from app.services.brick import BrickService
 
-router = APIRouter()
+router = APIRouter(route_class=ConditionalRoute)
 brick_service = BrickService()
 
 @router.get("/{building_id}", response_model=List[Floor])
 async def get_building_floors(building_id: str):
     """Get all floors in a specific building"""
     try:
-        floors = await brick_service.get_building_floors(building_id)
-        if not floors:
+        page = await brick_service.render_building_floors(building_id)
+        if not page.total:
             raise HTTPException(
                 status_code=404,
                 detail=f"No floors found for building {building_id}"
             )
-        return floors
+        return Response(page.body, media_type="application/json")
     except Exception as e:
         if "No floors found" in str(e):
             raise HTTPException(status_code=404, detail=str(e))
@@ -0,0 +1,8 @@
+from fastapi import Response
+
+
+def set_page_headers(response: Response, page) -> None:
+    """Expose the total count and next cursor of a page without changing the response body"""
+    response.headers["X-Total-Count"] = str(page.total)
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
@@ -1,17 +1,29 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, Query, Response
+from typing import List, Optional
 
+from app.api.v1.conditional import ConditionalRoute
+from app.api.v1.pagination import set_page_headers
 from app.models.schemas import Point
-from app.services.brick import BrickService
+from app.services.brick import BrickService, InvalidCursorError, InvalidFilterError
 
-router = APIRouter()
+router = APIRouter(route_class=ConditionalRoute)
 brick_service = BrickService()
 
 @router.get("/", response_model=List[Point])
-async def get_points():
+async def get_points(
+    response: Response,
+    type: Optional[str] = Query(None, description="Brick point class, subclasses included"),
+    building_id: Optional[str] = Query(None, description="Only points in this building"),
+    device_id: Optional[str] = Query(None, description="Only points of this device (requires building_id)"),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of points to return"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page")
+):
+    """Get points, optionally filtered by type, device and building"""
     try:
-        # TODO: Implement get_all_points in BrickService
-        points = []  # brick_service.get_all_points()
-        return points
+        page = await brick_service.get_all_points(type, building_id, device_id, limit, cursor)
+        set_page_headers(response, page)
+        return page.points
+    except (InvalidCursorError, InvalidFilterError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e)) 
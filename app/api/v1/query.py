@@ -1,8 +1,13 @@
-from fastapi import APIRouter, HTTPException
-from typing import Dict
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Dict, Optional
 from pydantic import BaseModel
 
 from app.services.brick import BrickService
+from app.services.cost import QueryCostError
+from app.services.executor import QueueFullError
+from app.services.limits import QueryTimeoutError
+from app.services.streaming import STREAM_FORMATS, encode_stream, negotiate_format
 
 router = APIRouter()
 brick_service = BrickService()
@@ -11,10 +16,76 @@ class SPARQLQuery(BaseModel):
     query: str
 
 @router.post("/", response_model=Dict)
-async def execute_query(query: SPARQLQuery):
-    """Execute a SPARQL query against the Brick graph"""
+async def execute_query(
+    query: SPARQLQuery,
+    request: Request,
+    stream: bool = False,
+    format: Optional[str] = None,
+    timeout: Optional[float] = Query(None, gt=0, description="Seconds before the query is abandoned"),
+    max_rows: Optional[int] = Query(None, ge=0, description="Maximum number of rows to return"),
+    profile: bool = Query(False, description="Add per-operator timings and solution counts")
+):
+    """Execute a SPARQL query against the Brick graph
+
+    With ``stream=true`` the rows are sent as a chunked response in a format
+    negotiated from ``format`` or the Accept header: ndjson, json (SPARQL
+    JSON results), csv or tsv.
+
+    ``timeout`` and ``max_rows`` can only lower the server's limits. Queries
+    estimated to be too expensive are refused before they run.
+
+    With ``profile=true`` the response also holds the translated algebra
+    tree with the calls, solutions and time of every operator.
+    """
+    if stream:
+        if profile:
+            raise HTTPException(status_code=400, detail="Streamed queries cannot be profiled")
+        return await _stream_query(query.query, request.headers.get("accept"), format, timeout)
+    try:
+        if profile:
+            return await brick_service.profile_query(query.query, max_rows=max_rows, timeout=timeout)
+        return await brick_service.execute_query(query.query, max_rows=max_rows, timeout=timeout)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except QueryCostError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Query error: {str(e)}")
+
+async def _stream_query(
+    query: str,
+    accept: Optional[str],
+    format: Optional[str],
+    timeout: Optional[float]
+) -> StreamingResponse:
+    format_name = negotiate_format(accept, format)
+    if format_name is None:
+        raise HTTPException(
+            status_code=406,
+            detail=f"Supported stream formats: {', '.join(STREAM_FORMATS.values())}"
+        )
+    try:
+        result_stream = await brick_service.stream_query(query, timeout=timeout)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except QueryCostError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Query error: {str(e)}")
+    return StreamingResponse(
+        encode_stream(result_stream, format_name),
+        media_type=STREAM_FORMATS[format_name]
+    )
+
+@router.post("/estimate")
+async def estimate_query(query: SPARQLQuery) -> Dict:
+    """Estimate a query's cost without running it, and which executor it would use"""
     try:
-        return await brick_service.execute_query(query.query)
+        return await brick_service.estimate_query(query.query)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Query error: {str(e)}")
 
@@ -26,4 +97,14 @@ async def count_triples() -> Dict:
 @router.get("/namespaces")
 async def get_namespaces() -> Dict:
     """Get all namespaces defined in the graph"""
-    return {"namespaces": brick_service.get_namespaces()} 
\ No newline at end of file
+    return {"namespaces": brick_service.get_namespaces()}
+
+@router.get("/stats")
+async def get_query_stats() -> Dict:
+    """Get executor queue depth and result cache counters"""
+    return {
+        "executor": brick_service.get_executor_stats(),
+        "low_priority_executor": brick_service.get_low_priority_executor_stats(),
+        "cache": brick_service.get_cache_stats(),
+        "algebra_cache": brick_service.get_algebra_cache_stats()
+    }
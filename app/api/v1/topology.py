@@ -0,0 +1,39 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+
+from app.api.v1.conditional import ConditionalRoute
+from app.models.schemas import Topology
+from app.services.brick import BrickService, UnknownEntityError
+
+router = APIRouter(route_class=ConditionalRoute)
+brick_service = BrickService()
+
+@router.get("/{building_id}/{entity_id}/downstream", response_model=Topology)
+async def get_downstream(
+    building_id: str,
+    entity_id: str,
+    max_depth: Optional[int] = Query(None, ge=1, description="Maximum number of links to follow"),
+    include_points: bool = Query(True, description="Populate the points of each entity")
+):
+    """Get everything an entity feeds, directly or not: the subtree affected by a fault in it"""
+    try:
+        return await brick_service.get_topology(building_id, entity_id, True, max_depth, include_points)
+    except UnknownEntityError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{building_id}/{entity_id}/upstream", response_model=Topology)
+async def get_upstream(
+    building_id: str,
+    entity_id: str,
+    max_depth: Optional[int] = Query(None, ge=1, description="Maximum number of links to follow"),
+    include_points: bool = Query(True, description="Populate the points of each entity")
+):
+    """Get everything feeding an entity, directly or not"""
+    try:
+        return await brick_service.get_topology(building_id, entity_id, False, max_depth, include_points)
+    except UnknownEntityError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,5 +1,6 @@
 from typing import List
 from pydantic_settings import BaseSettings, SettingsConfigDict
+import glob
 import os
 
 # Define base directory path
@@ -8,6 +9,8 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 class Settings(BaseSettings):
     # API Configuration
     API_V1_STR: str = "/api/v1"
+    # Number of uvicorn worker processes started by run.py (more than one implies GRAPH_SHARED_STORE)
+    API_WORKERS: int = 1
     PROJECT_NAME: str = "Brick API"
     
     # CORS
@@ -15,9 +18,67 @@ class Settings(BaseSettings):
     
     # Brick Graph Configuration
     ASSETS_DIR: str = os.path.join(BASE_DIR, '.assets')
+    # Load every file in ASSETS_DIR matching this pattern (e.g. "*.ttl")
+    # instead of the fixed list of building files below
+    BUILDING_FILES_GLOB: str = ""
+
+    # Number of processes used to parse building TTL files (0 = one per core)
+    GRAPH_LOAD_WORKERS: int = 1
+
+    # Graph snapshot: cache the parsed graph on disk, keyed by input file content
+    GRAPH_SNAPSHOT_ENABLED: bool = False
+    GRAPH_SNAPSHOT_DIR: str = os.path.join(BASE_DIR, '.cache')
+
+    # Memory-map one read-only graph image (in GRAPH_SNAPSHOT_DIR) shared by
+    # every worker process instead of loading the graph into each of them.
+    # Ingestion is unavailable in this mode.
+    GRAPH_SHARED_STORE: bool = False
+
+    # Keep the read-only graph in this process as sorted int32 arrays over a
+    # dictionary of terms instead of rdflib's memory store: smaller once the
+    # graph is large (the API's own indexes are the same either way), faster
+    # pattern scans. Ingestion is unavailable in this mode.
+    GRAPH_COMPACT_STORE: bool = False
+
+    # Seconds between checks for changed building files (0 disables the watcher;
+    # run.py turns it on when API_WORKERS > 1)
+    GRAPH_RELOAD_INTERVAL_SECONDS: float = 0.0
+
+    # SPARQL execution: worker threads and how many queries may wait for one
+    QUERY_WORKERS: int = 4
+    QUERY_QUEUE_SIZE: int = 64
+
+    # Per-query limits; requests may lower but never raise them
+    QUERY_TIMEOUT_SECONDS: float = 30.0
+    QUERY_MAX_ROWS: int = 100000
+
+    # Estimated cost above which a query is refused (0 disables), and above
+    # which it runs on a small separate pool so it cannot starve cheap queries
+    QUERY_MAX_COST: float = 1e9
+    QUERY_LOW_PRIORITY_COST: float = 1e6
+    QUERY_LOW_PRIORITY_WORKERS: int = 1
+    QUERY_LOW_PRIORITY_QUEUE_SIZE: int = 8
+
+    # SPARQL result cache (0 entries disables it)
+    QUERY_CACHE_MAX_ENTRIES: int = 1024
+    QUERY_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    QUERY_CACHE_TTL_SECONDS: float = 300.0
+
+    # Listing responses (buildings, floors, devices) kept encoded as JSON for
+    # the current graph generation (0 entries disables it)
+    RESPONSE_CACHE_MAX_ENTRIES: int = 256
+    RESPONSE_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+
+    # Rows evaluated per executor call when streaming query results
+    QUERY_STREAM_BATCH_SIZE: int = 1000
+
+    # Number of parsed user queries kept ready for evaluation
+    QUERY_ALGEBRA_CACHE_SIZE: int = 256
     
     @property
     def BUILDING_TTL_FILES(self) -> List[str]:
+        if self.BUILDING_FILES_GLOB:
+            return sorted(glob.glob(os.path.join(self.ASSETS_DIR, self.BUILDING_FILES_GLOB)))
         return [
             os.path.join(self.ASSETS_DIR, "building2.ttl"),
             os.path.join(self.ASSETS_DIR, "campus_lab_1.ttl"),
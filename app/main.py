@@ -1,9 +1,25 @@
-from fastapi import FastAPI
+import asyncio
+import time
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
-from app.api.v1 import buildings, query, floors, devices
+from app.api.v1 import admin, buildings, query, floors, devices, points, topology
 from app.config import settings
 from app.services.brick import BrickService
+from app.services.metrics import CONTENT_TYPE, REGISTRY, REQUESTS, REQUEST_LATENCY
+
+# (router, URL prefix, tag); the tag also labels the router's request metrics
+ROUTERS = (
+    (query.router, "/api/v1/query", "query"),
+    (buildings.router, "/api/v1/buildings", "building"),
+    (floors.router, "/api/v1/floors", "floor"),
+    (devices.router, "/api/v1/devices", "device"),
+    (points.router, "/api/v1/points", "point"),
+    (topology.router, "/api/v1/topology", "topology"),
+    (admin.router, "/api/v1/admin", "admin"),
+)
 
 app = FastAPI(
     title="Brick API",
@@ -22,6 +38,47 @@ async def startup_event():
         print(f"Failed to initialize Brick graph: {str(e)}")
         raise
 
+    if settings.GRAPH_RELOAD_INTERVAL_SECONDS > 0:
+        app.state.graph_watcher = asyncio.create_task(
+            brick_service.watch_files(settings.GRAPH_RELOAD_INTERVAL_SECONDS)
+        )
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop watching building files for changes"""
+    watcher = getattr(app.state, "graph_watcher", None)
+    if watcher is not None:
+        watcher.cancel()
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Time every request, labelled by the router and route template that served it
+
+    For streamed responses this measures the time to the first byte.
+    """
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        router, route = _route_labels(request)
+        REQUEST_LATENCY.observe(time.perf_counter() - started, router, route, request.method)
+        REQUESTS.inc(router, route, request.method, str(status))
+
+def _route_labels(request: Request):
+    """Return the router tag and full route template (not the raw path) of a request"""
+    route = request.scope.get("route")
+    template = getattr(route, "path", None)
+    for _, prefix, tag in ROUTERS:
+        if request.url.path.startswith(prefix + "/") or request.url.path == prefix:
+            # Depending on the FastAPI version the route path may omit the router prefix
+            if template is not None and not template.startswith(prefix):
+                template = prefix + template
+            return tag, template or "unmatched"
+    return "root", template or "unmatched"
+
 # CORS middleware configuration
 app.add_middleware(
     CORSMiddleware,
@@ -32,11 +89,14 @@ app.add_middleware(
 )
 
 # Include routers
-app.include_router(query.router, prefix="/api/v1/query", tags=["query"])
-app.include_router(buildings.router, prefix="/api/v1/buildings", tags=["building"])
-app.include_router(floors.router, prefix="/api/v1/floors", tags=["floor"])
-app.include_router(devices.router, prefix="/api/v1/devices", tags=["device"])
+for router, prefix, tag in ROUTERS:
+    app.include_router(router, prefix=prefix, tags=[tag])
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"} 
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Expose request, query, cache and graph metrics in the Prometheus text format"""
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE) 
\ No newline at end of file
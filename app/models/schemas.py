@@ -23,4 +23,19 @@ class Point(BaseModel):
     type: str = Field(..., description="Brick class type of the point")
     name: Optional[str] = Field(None, description="Name of the point")
     device: Optional[str] = Field(None, description="Device ID this point belongs to")
-    current_value: Optional[Dict] = Field(None, description="Current value and metadata") 
\ No newline at end of file
+    current_value: Optional[Dict] = Field(None, description="Current value and metadata") 
+
+
+class TopologyNode(BaseModel):
+    id: str = Field(..., description="Unique identifier for the entity")
+    type: Optional[str] = Field(None, description="Brick class type of the entity")
+    name: Optional[str] = Field(None, description="Name of the entity")
+    depth: int = Field(..., description="Number of links between this entity and the requested one")
+    via: List[str] = Field(default_factory=list, description="IDs of the entities one link closer to the requested one that link to this one")
+    points: List[str] = Field(default_factory=list, description="List of point IDs associated with this entity")
+
+
+class Topology(BaseModel):
+    id: str = Field(..., description="ID of the entity the walk started from")
+    direction: str = Field(..., description="upstream or downstream")
+    nodes: List[TopologyNode] = Field(default_factory=list, description="Every entity reached, nearest first, starting with the requested one")
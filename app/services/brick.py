@@ -1,10 +1,195 @@
-from rdflib import Graph, Namespace, URIRef
-from rdflib.plugins.sparql.processor import SPARQLResult
+from rdflib import Dataset, Graph, Namespace, URIRef
+from rdflib.graph import ReadOnlyGraphAggregate
+from rdflib.namespace import RDF, RDFS
+from rdflib.paths import MulPath
+from rdflib.plugins.sparql import prepareQuery
+from rdflib.plugins.sparql.algebra import translateQuery
+from rdflib.plugins.sparql.parser import parseQuery
+from rdflib.plugins.sparql.evaluate import evalQuery
+from rdflib.plugins.sparql.sparql import Query
+from rdflib.term import Node
+from rdflib.util import guess_format
+from array import array
+import asyncio
+import base64
+import hashlib
 import brickschema
-from typing import List, Optional, Dict
+from brickschema.namespaces import bind_prefixes
+from collections import defaultdict
+from itertools import islice
+import os
+import pkgutil
+import threading
+import time
+from typing import AsyncIterator, Awaitable, Callable, Iterator, List, NamedTuple, Optional, Dict, Set, Tuple
 
 from app.config import settings
-from app.models.schemas import Building, Device, Point, Floor
+from app.models.schemas import Building, Device, Point, Floor, Topology, TopologyNode
+from app.services.cache import LRUCache, estimate_result_size, normalize_query
+from app.services.cost import GraphStats, QueryCostError, estimate_cost
+from app.services.executor import QueryExecutor, QueueFullError, ReadWriteLock
+from app.services.image import (
+    CompactStore, MappedStore, build_image, image_lock, image_path, write_image
+)
+from app.services.indexes import (
+    BRICK, ClassIndex, ContainmentIndex, EquipmentIndex, LabelIndex, PointIndex
+)
+from app.services.ingest import Triple, read_triples
+from app.services.limits import QueryTimeoutError, query_deadline
+from app.services.loader import (
+    FileSignature, create_parse_pool, diff_sources, file_signature, merge_parsed,
+    resolve_workers, sources_digest, submit_parse_jobs
+)
+from app.services.metrics import QUERIES, QUERY_PHASE_LATENCY, QUERY_ROWS, REGISTRY
+from app.services.profile import profile_queries
+from app.services.serialization import dumps
+from app.services.snapshot import (
+    TripleEncoder, compute_snapshot_key, load_snapshot_into, read_snapshot, write_snapshot
+)
+from app.services.streaming import QueryStream
+from app.services.traversal import TopologyIndex, TraversalIndex
+
+
+BRICK_VERSION = "1.5"
+SCHEMA_GRAPH = URIRef("https://brickschema.org/schema/Brick#")
+
+
+class BrickDataset(Dataset):
+    """Dataset of one named graph per building file plus the shared schema graph"""
+
+    # rdflib's own Dataset.triples() reads the deprecated default_context
+    # property, which emits a DeprecationWarning on every pattern lookup.
+    @property
+    def default_context(self):
+        return self._default_context
+
+    @default_context.setter
+    def default_context(self, value):
+        self._default_context = value
+
+    # Set by BrickService to the traversal index of the current state, so
+    # property paths such as brick:hasPart+ over the whole dataset are
+    # answered from CSR arrays instead of one triple lookup per step
+    traversal_index: Optional[TraversalIndex] = None
+
+    def triples(self, triple_or_quad, context=None):
+        s, p, o, c = self._spoc(triple_or_quad)
+        if isinstance(p, MulPath) and self.traversal_index is not None and context is None and c is None:
+            pairs = self.traversal_index.path_pairs(p, s, o)
+            if pairs is not None:
+                for subject, obj in pairs:
+                    yield subject, p, obj
+                return
+        yield from super().triples(triple_or_quad, context)
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+class InvalidFilterError(ValueError):
+    """Raised when a listing filter does not name something that can exist"""
+
+
+class SingleWorkerOnlyError(RuntimeError):
+    """Raised for a change that would only reach one of several worker processes"""
+
+
+class UnknownEntityError(LookupError):
+    """Raised when an entity is not on any path an endpoint follows"""
+
+
+class DevicePage(NamedTuple):
+    devices: List[Device]
+    total: int
+    next_cursor: Optional[str]
+
+
+class RenderedPage(NamedTuple):
+    """A listing already encoded as its JSON response body"""
+    body: bytes
+    total: int
+    next_cursor: Optional[str]
+
+
+class PointPage(NamedTuple):
+    points: List[Point]
+    total: int
+    next_cursor: Optional[str]
+
+
+def encode_cursor(uri: URIRef) -> str:
+    """Encode the last URI of a page as an opaque pagination cursor"""
+    return base64.urlsafe_b64encode(str(uri).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[URIRef]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        uri = base64.b64decode(padded, altchars=b"-_", validate=True).decode()
+    except (ValueError, UnicodeDecodeError):
+        uri = ""
+    if not uri:
+        raise InvalidCursorError(f"Invalid cursor: {cursor}")
+    return URIRef(uri)
+
+
+BUILDINGS_QUERY = """
+SELECT ?id ?name
+WHERE {
+    ?id a brick:Building .
+    OPTIONAL { ?id rdfs:label ?name }
+}
+"""
+
+# ?building is supplied through initBindings rather than interpolated
+BUILDING_FLOORS_QUERY = """
+SELECT DISTINCT ?id ?name
+WHERE {
+    ?id a brick:Floor .
+    ?building brick:hasPart ?id .
+    OPTIONAL { ?id rdfs:label ?name }
+}
+ORDER BY ?id
+"""
+
+BUILTIN_QUERIES = (BUILDINGS_QUERY, BUILDING_FLOORS_QUERY)
+
+
+def _lower_limit(requested: Optional[float], configured: float) -> float:
+    """Apply a per-request limit only where it is stricter than the configured one"""
+    return configured if requested is None else min(requested, configured)
+
+
+def _query_outcome(error: Exception) -> str:
+    """Label a failed query for the sparql_queries_total metric"""
+    if isinstance(error, QueryTimeoutError):
+        return "timeout"
+    if isinstance(error, QueryCostError):
+        return "rejected"
+    if isinstance(error, QueueFullError):
+        return "queue_full"
+    return "error"
+
+
+class GraphState(NamedTuple):
+    """A loaded graph and everything derived from it, swapped in as one unit on reload"""
+    g: BrickDataset
+    sources: Dict[str, FileSignature]
+    # Digest of the source signatures, the same in every worker that loaded them
+    version: str
+    class_index: ClassIndex
+    containment_index: ContainmentIndex
+    equipment_index: EquipmentIndex
+    point_index: PointIndex
+    label_index: LabelIndex
+    traversal_index: TraversalIndex
+    topology_index: TopologyIndex
+    building_scopes: Dict[URIRef, Graph]
+    prepared_queries: Dict[str, Query]
+    stats: GraphStats
 
 
 class BrickService:
@@ -19,10 +204,86 @@ class BrickService:
 
     def __init__(self):
         if not self._initialized:
-            self.g = None
+            self.state: Optional[GraphState] = None
+            self.generation = 0
+            # Ingested triples live in this process only; ETags of a graph
+            # changed by ingestion carry this token and the ingest count
+            self.epoch = os.urandom(8).hex()
+            self.ingests = 0
+            # Net triples ingested into each named graph, (added, removed),
+            # applied again when a reload re-parses the graph's file
+            self.ingested: Dict[URIRef, Tuple[Set[Triple], Set[Triple]]] = {}
+            self.graph_lock = ReadWriteLock()
+            self._reload_lock = threading.Lock()
+            # Parsed queries are counted one unit each, so only the entry bound applies
+            self.algebra_cache = LRUCache(
+                max_entries=settings.QUERY_ALGEBRA_CACHE_SIZE,
+                max_bytes=settings.QUERY_ALGEBRA_CACHE_SIZE,
+                ttl_seconds=float("inf")
+            )
+            self.query_cache = LRUCache(
+                max_entries=settings.QUERY_CACHE_MAX_ENTRIES,
+                max_bytes=settings.QUERY_CACHE_MAX_BYTES,
+                ttl_seconds=settings.QUERY_CACHE_TTL_SECONDS
+            )
+            # Encoded listing responses, keyed by graph generation like query results
+            self.response_cache = LRUCache(
+                max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+                max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+                ttl_seconds=float("inf")
+            )
+            self.executor = QueryExecutor(
+                max_workers=settings.QUERY_WORKERS,
+                max_queue=settings.QUERY_QUEUE_SIZE
+            )
+            self.low_priority_executor = QueryExecutor(
+                max_workers=settings.QUERY_LOW_PRIORITY_WORKERS,
+                max_queue=settings.QUERY_LOW_PRIORITY_QUEUE_SIZE
+            )
             self._initialize_graph()
+            self._register_metrics()
             BrickService._initialized = True
 
+    # The current graph and indexes. Code that uses more than one of them
+    # without holding graph_lock should read self.state once instead, so a
+    # reload cannot swap the graph out halfway through.
+
+    @property
+    def g(self) -> BrickDataset:
+        return self.state.g
+
+    @property
+    def class_index(self) -> ClassIndex:
+        return self.state.class_index
+
+    @property
+    def containment_index(self) -> ContainmentIndex:
+        return self.state.containment_index
+
+    @property
+    def equipment_index(self) -> EquipmentIndex:
+        return self.state.equipment_index
+
+    @property
+    def point_index(self) -> PointIndex:
+        return self.state.point_index
+
+    @property
+    def traversal_index(self) -> TraversalIndex:
+        return self.state.traversal_index
+
+    @property
+    def topology_index(self) -> TopologyIndex:
+        return self.state.topology_index
+
+    @property
+    def building_scopes(self) -> Dict[URIRef, Graph]:
+        return self.state.building_scopes
+
+    @property
+    def prepared_queries(self) -> Dict[str, Query]:
+        return self.state.prepared_queries
+
     def _get_simple_id(self, full_uri: str) -> str:
         """Extract simple ID from a full URI"""
         return full_uri.split('#')[-1]
@@ -31,28 +292,660 @@ class BrickService:
         """Initialize the Brick graph with schema and building data"""
         try:
             print("Initializing Brick graph...")
-            self.g = brickschema.Graph(load_brick=True)
-            
-            # Load building data
-            for file in settings.BUILDING_TTL_FILES:
-                self.g.load_file(file)
+            sources = {path: file_signature(path) for path in settings.BUILDING_TTL_FILES}
+            if settings.GRAPH_SHARED_STORE:
+                dataset = self._load_shared_graph()
+            elif settings.GRAPH_COMPACT_STORE:
+                dataset = self._load_compact_graph()
+            elif settings.GRAPH_SNAPSHOT_ENABLED:
+                dataset = self._load_graph_from_snapshot()
+            else:
+                dataset = self._load_graph()
             
             # Commented out for faster initialization
-            # self.g.expand(profile="owlrl")
-            # self.g.expand(profile="shacl")
-            print(f"Brick graph initialized with {len(self.g)} triples")
+            # dataset.expand(profile="owlrl")
+            # dataset.expand(profile="shacl")
+            print(f"Brick graph initialized with {len(dataset)} triples")
+
+            self.state = self._build_state(dataset, sources)
+            self._bump_generation()
         except Exception as e:
             print(f"Error loading Brick graph: {str(e)}")
             raise
 
-    async def execute_query(self, query: str) -> Dict:
-        """Execute a SPARQL query and return processed results"""
+    def _build_state(self, dataset: BrickDataset, sources: Dict[str, FileSignature]) -> GraphState:
+        """Build every index over a loaded dataset"""
+        class_index = ClassIndex.from_graph(dataset)
+        print(f"Class index built for {len(class_index)} classes")
+
+        containment_index = ContainmentIndex.from_graph(dataset)
+        print(f"Containment index built for {len(containment_index)} nodes")
+
+        equipment_index = EquipmentIndex.from_graph(dataset, class_index, containment_index)
+        print(f"Equipment index built for {len(equipment_index)} devices")
+
+        point_index = PointIndex.from_graph(dataset, class_index, containment_index)
+        print(f"Point index built for {len(point_index)} points")
+
+        label_index = LabelIndex.from_graph(dataset)
+        print(f"Label index built for {len(label_index)} nodes")
+
+        traversal_index = TraversalIndex.from_graph(dataset)
+        dataset.traversal_index = traversal_index
+        print(f"Traversal index built for {len(traversal_index)} nodes")
+
+        topology_index = TopologyIndex.from_graph(dataset, class_index, traversal_index)
+        print(f"Topology index built for {len(topology_index)} typed nodes")
+
+        building_scopes = self._build_building_scopes(dataset, class_index)
+        print(f"Named graphs mapped for {len(building_scopes)} buildings")
+
+        stats = GraphStats.from_graph(dataset)
+        print(f"Query statistics gathered for {len(stats.predicates)} predicates")
+
+        return GraphState(
+            g=dataset,
+            sources=sources,
+            version=sources_digest(sources),
+            class_index=class_index,
+            containment_index=containment_index,
+            equipment_index=equipment_index,
+            point_index=point_index,
+            label_index=label_index,
+            traversal_index=traversal_index,
+            topology_index=topology_index,
+            building_scopes=building_scopes,
+            prepared_queries=self._prepare_builtin_queries(dataset),
+            stats=stats
+        )
+
+    def _new_dataset(self) -> BrickDataset:
+        """Create an empty dataset whose default graph is the union of its named graphs"""
+        dataset = BrickDataset(default_union=True)
+        bind_prefixes(dataset, brick_version=BRICK_VERSION)
+        return dataset
+
+    def _building_graph_id(self, file: str) -> URIRef:
+        """Name the graph for a building file after the file, e.g. <BASE_URI/campus_lab_1>"""
+        return URIRef(f"{self.BASE_URI}/{os.path.splitext(os.path.basename(file))[0]}")
+
+    def _load_schema(self, dataset: BrickDataset):
+        """Parse the packaged Brick ontology into its own shared named graph"""
+        dataset.graph(SCHEMA_GRAPH).parse(data=self._schema_data(), format="turtle")
+
+    def _schema_data(self) -> bytes:
+        return pkgutil.get_data("brickschema", f"ontologies/{BRICK_VERSION}/Brick.ttl")
+
+    def _load_graph(self) -> BrickDataset:
+        """Parse the Brick schema and every building TTL file into its own named graph"""
+        dataset = self._new_dataset()
+        self._parse_building_files(dataset, settings.BUILDING_TTL_FILES, self._load_schema)
+        return dataset
+
+    def _parse_building_files(
+        self,
+        dataset: BrickDataset,
+        files: List[str],
+        prepare: Callable[[BrickDataset], None]
+    ):
+        """Parse building files into their named graphs, calling ``prepare`` on the dataset first
+
+        With more than one load worker the files are parsed in worker
+        processes while ``prepare`` runs here.
+        """
+        workers = resolve_workers(settings.GRAPH_LOAD_WORKERS, len(files))
+        if workers <= 1:
+            prepare(dataset)
+            for file in files:
+                dataset.graph(self._building_graph_id(file)).parse(
+                    file, format=guess_format(file) or "turtle"
+                )
+            return
+
+        print(f"Parsing {len(files)} building files with {workers} workers")
+        with create_parse_pool(workers) as pool:
+            futures = submit_parse_jobs(pool, files)
+            prepare(dataset)
+            for future in futures:
+                parsed = future.result()
+                merge_parsed(dataset.graph(self._building_graph_id(parsed.path)), parsed)
+
+    def _copy_graphs(self, source: BrickDataset, target: BrickDataset, identifiers: Set[URIRef]):
+        """Bulk-copy the named graphs in ``identifiers``, and every prefix, between datasets"""
+        with self.graph_lock.read():
+            for prefix, uri in source.namespaces():
+                target.bind(prefix, uri, override=False)
+            for graph in source.graphs():
+                if graph.identifier in identifiers:
+                    copy = target.graph(graph.identifier)
+                    copy.addN((s, p, o, copy) for s, p, o in graph)
+
+    def _build_building_scopes(self, dataset: BrickDataset, class_index: ClassIndex) -> Dict[URIRef, Graph]:
+        """Map each building to a read-only view of its own named graph(s) plus the schema"""
+        building_classes = class_index.descendants(BRICK.Building)
+        graphs = defaultdict(list)
+        for graph in dataset.graphs():
+            if graph.identifier == SCHEMA_GRAPH:
+                continue
+            for building, cls in graph.subject_objects(RDF.type):
+                if cls in building_classes and graph not in graphs[building]:
+                    graphs[building].append(graph)
+
+        schema = dataset.graph(SCHEMA_GRAPH)
+        return {
+            building: ReadOnlyGraphAggregate(building_graphs + [schema])
+            for building, building_graphs in graphs.items()
+        }
+
+    def _query_graph(self, scope: Optional[URIRef]) -> Graph:
+        """Return the graph a query runs against: the whole dataset or one building's scope"""
+        if scope is None:
+            return self.g
+        return self.building_scopes.get(scope) or self.g.graph(SCHEMA_GRAPH)
+
+    def _snapshot_key(self) -> str:
+        return compute_snapshot_key(
+            settings.BUILDING_TTL_FILES,
+            f"brickschema={brickschema.__version__}"
+        )
+
+    def _load_graph_from_snapshot(self) -> BrickDataset:
+        """Load the graph from a snapshot, parsing and writing one if it is missing or stale"""
+        key = self._snapshot_key()
+        payload = read_snapshot(settings.GRAPH_SNAPSHOT_DIR, key)
+        if payload is not None:
+            dataset = self._new_dataset()
+            load_snapshot_into(dataset, payload)
+            print(f"Loaded Brick graph from snapshot {key[:12]}")
+            return dataset
+
+        dataset = self._load_graph()
+        self._write_snapshot(dataset, key)
+        return dataset
+
+    def _write_snapshot(self, dataset: BrickDataset, key: str):
+        try:
+            path = write_snapshot(
+                settings.GRAPH_SNAPSHOT_DIR,
+                key,
+                {str(graph.identifier): graph for graph in dataset.graphs() if len(graph)},
+                dataset.namespaces()
+            )
+            print(f"Wrote Brick graph snapshot to {path}")
+        except Exception as e:
+            print(f"Error writing Brick graph snapshot: {str(e)}")
+
+    def _load_shared_graph(
+        self,
+        source: Optional[BrickDataset] = None,
+        unchanged: Set[URIRef] = frozenset()
+    ) -> BrickDataset:
+        """Map the read-only graph image shared by all workers, building it if no worker has yet
+
+        The image is keyed like a snapshot, by the content of every input
+        file. Named graphs listed in ``unchanged`` are copied from ``source``
+        instead of being parsed again.
+        """
+        key = self._snapshot_key()
+        path = image_path(settings.GRAPH_SNAPSHOT_DIR, key)
+        with image_lock(settings.GRAPH_SNAPSHOT_DIR):
+            if not os.path.exists(path):
+                write_image(path, *self._encode_image(source, unchanged))
+                print(f"Wrote shared Brick graph image to {path}")
+
+        dataset = BrickDataset(store=MappedStore(path), default_union=True)
+        print(f"Mapped shared Brick graph image {key[:12]}")
+        return dataset
+
+    def _load_compact_graph(
+        self,
+        source: Optional[BrickDataset] = None,
+        unchanged: Set[URIRef] = frozenset()
+    ) -> BrickDataset:
+        """Build the read-only, dictionary-encoded graph store held in this process"""
+        store = CompactStore(build_image(*self._encode_image(source, unchanged)))
+        print(f"Built compact Brick graph store for {len(store)} triples")
+        return BrickDataset(store=store, default_union=True)
+
+    def _encode_image(
+        self,
+        source: Optional[BrickDataset],
+        unchanged: Set[URIRef]
+    ) -> Tuple[List[Node], Dict[URIRef, array], List[Tuple[str, URIRef]]]:
+        """Dictionary-encode the schema and every building graph for a graph image"""
+        encoder = TripleEncoder()
+        sections = {}
+        namespaces = Graph()
+        bind_prefixes(namespaces, brick_version=BRICK_VERSION)
+        for identifier, graph in self._image_sources(source, unchanged):
+            sections[identifier] = encoder.encode(graph)
+            for prefix, uri in graph.namespaces():
+                namespaces.bind(prefix, uri, override=False)
+        return encoder.terms, sections, list(namespaces.namespaces())
+
+    def _image_sources(
+        self,
+        source: Optional[BrickDataset],
+        unchanged: Set[URIRef]
+    ) -> Iterator[Tuple[URIRef, Graph]]:
+        """Yield the schema and each building graph one at a time, parsing only what changed"""
+        if SCHEMA_GRAPH in unchanged:
+            yield SCHEMA_GRAPH, source.graph(SCHEMA_GRAPH)
+        else:
+            schema = Graph()
+            schema.parse(data=self._schema_data(), format="turtle")
+            yield SCHEMA_GRAPH, schema
+
+        for file in settings.BUILDING_TTL_FILES:
+            identifier = self._building_graph_id(file)
+            if identifier in unchanged:
+                yield identifier, source.graph(identifier)
+            else:
+                graph = Graph()
+                graph.parse(file, format=guess_format(file) or "turtle")
+                yield identifier, graph
+
+    async def reload(self) -> Dict:
+        """Reload changed building files on a background thread, at a caller's request"""
+        self._check_single_worker("Reloading on request")
+        return await asyncio.to_thread(self.reload_changed_files)
+
+    def _check_single_worker(self, action: str) -> None:
+        """Refuse a change that would only reach the worker process handling the request"""
+        if settings.API_WORKERS > 1:
+            raise SingleWorkerOnlyError(
+                f"{action} is unavailable with API_WORKERS > 1, as it would only reach one worker; "
+                "edit the building files instead and every worker reloads them within "
+                "GRAPH_RELOAD_INTERVAL_SECONDS"
+            )
+
+    def reload_changed_files(self) -> Dict:
+        """Re-parse the building files that changed on disk and swap in the result
+
+        The schema, unchanged building graphs and graphs that only hold
+        ingested triples are copied from the current dataset instead of being
+        parsed again; triples ingested into a changed file's graph are applied
+        again on top of the new file. The new dataset and its indexes are built
+        while requests keep using the current state; the swap itself happens
+        under the graph write lock, so no query sees a partial graph.
+        """
+        with self._reload_lock:
+            current = self.state
+            files = settings.BUILDING_TTL_FILES
+            sources, changed, removed = diff_sources(current.sources, files)
+            if changed or removed:
+                try:
+                    print(f"Reloading {len(changed)} changed building files...")
+                    file_graphs = {self._building_graph_id(file) for file in [*files, *current.sources]}
+                    unchanged = {SCHEMA_GRAPH} | {
+                        self._building_graph_id(file) for file in files if file not in changed
+                    } | {
+                        graph.identifier for graph in current.g.graphs() if graph.identifier not in file_graphs
+                    }
+                    if settings.GRAPH_SHARED_STORE:
+                        dataset = self._load_shared_graph(current.g, unchanged)
+                    elif settings.GRAPH_COMPACT_STORE:
+                        dataset = self._load_compact_graph(current.g, unchanged)
+                    else:
+                        dataset = self._new_dataset()
+                        self._parse_building_files(
+                            dataset, changed, lambda target: self._copy_graphs(current.g, target, unchanged)
+                        )
+                        self._apply_ingested(dataset, [self._building_graph_id(file) for file in changed])
+                    state = self._build_state(dataset, sources)
+                except Exception as e:
+                    print(f"Error reloading Brick graph: {str(e)}")
+                    raise
+
+                with self.graph_lock.write():
+                    self.state = state
+                    self.algebra_cache.clear()
+                    self._bump_generation()
+                # A removed file takes its building, ingested triples included, with it
+                for file in removed:
+                    self.ingested.pop(self._building_graph_id(file), None)
+                print(f"Brick graph reloaded with {len(dataset)} triples")
+
+                if settings.GRAPH_SNAPSHOT_ENABLED and not (settings.GRAPH_SHARED_STORE or settings.GRAPH_COMPACT_STORE):
+                    self._write_snapshot(dataset, self._snapshot_key())
+
+            return {
+                "reloaded": [os.path.basename(file) for file in changed],
+                "removed": [os.path.basename(file) for file in removed],
+                "generation": self.generation,
+                "triples": len(self.g)
+            }
+
+    def _apply_ingested(self, dataset: BrickDataset, identifiers: List[URIRef]):
+        """Apply the triples ingested into the named graphs in ``identifiers`` to freshly parsed copies"""
+        for identifier in identifiers:
+            if identifier not in self.ingested:
+                continue
+            added, removed = self.ingested[identifier]
+            graph = dataset.graph(identifier)
+            graph.addN((s, p, o, graph) for s, p, o in added)
+            for triple in removed:
+                graph.remove(triple)
+
+    async def watch_files(self, interval: float):
+        """Poll the building files every ``interval`` seconds and reload any that changed"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.reload_changed_files)
+            except Exception as e:
+                print(f"Error in Brick graph file watcher: {str(e)}")
+
+    async def ingest_triples(
+        self,
+        building_id: str,
+        chunks: AsyncIterator[bytes],
+        format_name: str,
+        delete: bool = False
+    ) -> Dict:
+        """Parse a streamed Turtle or N-Triples body and add (or delete) it in a building's graph
+
+        Changes live in memory only: they are not written back to the
+        building's TTL file, but survive reloads, applied again on top of the
+        file if it changed.
+        """
+        self._check_single_worker("Triple ingestion")
+        started = time.perf_counter()
+        triples = await read_triples(chunks, format_name)
+        parsed = time.perf_counter()
+        applied = await asyncio.to_thread(self.apply_triples, building_id, triples, delete)
+        finished = time.perf_counter()
+        return {
+            "building_id": building_id,
+            "received": len(triples),
+            "removed" if delete else "added": applied,
+            "generation": self.generation,
+            "parse_seconds": round(parsed - started, 6),
+            "apply_seconds": round(finished - parsed, 6),
+            "triples_per_second": round(len(triples) / (finished - started)) if finished > started else 0
+        }
+
+    def apply_triples(self, building_id: str, triples: List[Triple], delete: bool = False) -> int:
+        """Add or remove triples in a building's named graph and fold them into the indexes
+
+        Runs under the graph write lock, so queries never see the graph
+        half-changed, and returns how many triples the graph gained or lost.
+        """
+        with self._reload_lock, self.graph_lock.write():
+            state = self.state
+            graph = self._building_graph(state, building_id)
+            before = len(graph)
+            added, removed = self.ingested.setdefault(graph.identifier, (set(), set()))
+            if delete:
+                present = [triple for triple in dict.fromkeys(triples) if triple in graph]
+                for triple in present:
+                    graph.remove(triple)
+                added.difference_update(present)
+                removed.update(present)
+                changes = [triple for triple in present if triple not in state.g]
+            else:
+                changes = [triple for triple in dict.fromkeys(triples) if triple not in state.g]
+                graph.addN((s, p, o, graph) for s, p, o in triples)
+                removed.difference_update(triples)
+                added.update(triples)
+
+            if changes:
+                self.state = self._update_state(state, changes, delete)
+                self.ingests += 1
+                self._bump_generation()
+            return abs(len(graph) - before)
+
+    def _building_graph(self, state: GraphState, building_id: str) -> Graph:
+        """Return the named graph holding a building, creating one for a new building"""
+        identifier = URIRef(f"{self.BASE_URI}/{building_id}")
+        scope = state.building_scopes.get(URIRef(f"{self.BASE_URI}/{building_id}#{building_id}"))
+        if scope is not None:
+            identifiers = [graph.identifier for graph in scope.graphs if graph.identifier != SCHEMA_GRAPH]
+            if identifier not in identifiers:
+                identifier = identifiers[0]
+        return state.g.graph(identifier)
+
+    def _update_state(self, state: GraphState, changes: List[Triple], delete: bool = False) -> GraphState:
+        """Fold added or removed triples into the indexes without rebuilding them
+
+        A change to the class hierarchy affects every index, so that case
+        falls back to a full rebuild.
+        """
+        typed, contained, linked, labelled = set(), set(), set(), set()
+        for s, p, o in changes:
+            if p == RDFS.subClassOf:
+                return self._build_state(state.g, state.sources)
+            if p == RDF.type:
+                typed.add(s)
+            elif p in (BRICK.hasPart, BRICK.isPartOf):
+                contained.update((s, o))
+            elif p in (BRICK.hasPoint, BRICK.isPointOf):
+                linked.update((s, o))
+            elif p == RDFS.label:
+                labelled.add(s)
+
+        containment_index = state.containment_index
+        moved = set(contained)
+        if contained:
+            containment_index = containment_index.updated(state.g, contained)
+            for node in contained:
+                moved |= state.containment_index.descendants(node) | containment_index.descendants(node)
+
+        equipment_index = state.equipment_index
+        if typed or contained:
+            equipment_index = equipment_index.updated(
+                state.g, state.class_index, containment_index, typed, contained
+            )
+
+        point_index = state.point_index
+        if typed or linked or contained:
+            point_index = point_index.updated(
+                state.g, state.class_index, containment_index, typed, linked, moved
+            )
+
+        traversal_index = state.traversal_index.updated(state.g, {p for _, p, _ in changes})
+        state.g.traversal_index = traversal_index
+
+        return state._replace(
+            containment_index=containment_index,
+            equipment_index=equipment_index,
+            point_index=point_index,
+            label_index=state.label_index.updated(state.g, labelled) if labelled else state.label_index,
+            traversal_index=traversal_index,
+            topology_index=state.topology_index.updated(state.g, state.class_index, traversal_index, typed),
+            building_scopes=self._updated_building_scopes(state, typed) if typed else state.building_scopes,
+            stats=state.stats.updated(changes, delete)
+        )
+
+    def _updated_building_scopes(self, state: GraphState, typed: Set[URIRef]) -> Dict[URIRef, Graph]:
+        """Re-map the named graphs of retyped nodes that are, or were, buildings"""
+        building_classes = state.class_index.descendants(BRICK.Building)
+        scopes = dict(state.building_scopes)
+        schema = state.g.graph(SCHEMA_GRAPH)
+        for node in typed:
+            if node not in scopes and not set(state.g.objects(node, RDF.type)) & building_classes:
+                continue
+            graphs = [
+                graph for graph in state.g.graphs()
+                if graph.identifier != SCHEMA_GRAPH
+                and set(graph.objects(node, RDF.type)) & building_classes
+            ]
+            if graphs:
+                scopes[node] = ReadOnlyGraphAggregate(graphs + [schema])
+            else:
+                scopes.pop(node, None)
+        return scopes
+
+    async def execute_query(
+        self,
+        query: str,
+        bindings: Optional[Dict[str, Node]] = None,
+        scope: Optional[URIRef] = None,
+        max_rows: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> Dict:
+        """Execute a SPARQL query on the query executor and return processed results
+
+        Values in ``bindings`` are passed to rdflib as initBindings, never
+        interpolated into the query text. With ``scope`` set to a building URI
+        the query only sees that building's named graph plus the schema.
+
+        ``max_rows`` and ``timeout`` can only lower the configured limits. A
+        SELECT result cut off at the row limit carries ``"truncated": True``.
+        """
+        max_rows = _lower_limit(max_rows, settings.QUERY_MAX_ROWS)
+        deadline = time.monotonic() + _lower_limit(timeout, settings.QUERY_TIMEOUT_SECONDS)
+        try:
+            binding_key = tuple(sorted((bindings or {}).items()))
+            cache_key = (normalize_query(query), binding_key, scope, max_rows, self.generation)
+            cached = self.query_cache.get(cache_key)
+            if cached is not None:
+                QUERIES.inc("cached")
+                return cached
+
+            executor = await self._admit_query(query, bindings)
+            result = await self._run_with_deadline(
+                executor.run, deadline, self._run_query, query, bindings, scope, max_rows
+            )
+            self.query_cache.put(cache_key, result, estimate_result_size(result))
+            QUERIES.inc("ok")
+            return result
+        except Exception as e:
+            QUERIES.inc(_query_outcome(e))
+            print(f"Query error details: {str(e)}")
+            raise
+
+    async def profile_query(
+        self,
+        query: str,
+        bindings: Optional[Dict[str, Node]] = None,
+        scope: Optional[URIRef] = None,
+        max_rows: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> Dict:
+        """Execute a SPARQL query with per-operator profiling, bypassing the result cache
+
+        The result carries a ``profile`` with the translated algebra tree and,
+        for each operator, how often it ran, the solutions it produced and
+        the time spent in it.
+        """
+        max_rows = _lower_limit(max_rows, settings.QUERY_MAX_ROWS)
+        deadline = time.monotonic() + _lower_limit(timeout, settings.QUERY_TIMEOUT_SECONDS)
+        executor = await self._admit_query(query, bindings)
+        return await self._run_with_deadline(
+            executor.run, deadline, self._run_profiled_query, query, bindings, scope, max_rows
+        )
+
+    def _run_profiled_query(
+        self,
+        query: str,
+        bindings: Optional[Dict[str, Node]],
+        scope: Optional[URIRef],
+        max_rows: int,
+        deadline: float,
+        cancelled: threading.Event
+    ) -> Dict:
+        with profile_queries() as profiler:
+            started = time.perf_counter()
+            result = self._run_query(query, bindings, scope, max_rows, deadline, cancelled)
+            elapsed = time.perf_counter() - started
+        result["profile"] = {
+            "total_ms": round(elapsed * 1000, 3),
+            "plan": profiler.report(self.g.namespace_manager)
+        }
+        return result
+
+    async def estimate_query(self, query: str) -> Dict:
+        """Return the estimated cost of a query and the executor it would run on"""
+        cost = await asyncio.to_thread(self._estimate_query, query, None)
+        return {"cost": cost, "lane": self._query_lane(cost)}
+
+    def _estimate_query(self, query: str, bindings: Optional[Dict[str, Node]]) -> float:
+        return estimate_cost(self._prepare_query(query), self.state.stats, bindings or {})
+
+    def _query_lane(self, cost: float) -> str:
+        if settings.QUERY_MAX_COST and cost > settings.QUERY_MAX_COST:
+            return "rejected"
+        if cost > settings.QUERY_LOW_PRIORITY_COST:
+            return "low_priority"
+        return "default"
+
+    async def _admit_query(self, query: str, bindings: Optional[Dict[str, Node]]) -> QueryExecutor:
+        """Estimate a query's cost before it runs and pick the executor for it
+
+        Parsing happens off the event loop; the parsed algebra is cached, so
+        the executor thread does not parse the query again.
+        """
+        cost = await asyncio.to_thread(self._estimate_query, query, bindings)
+        lane = self._query_lane(cost)
+        if lane == "rejected":
+            raise QueryCostError(
+                f"Estimated query cost {cost:.3g} exceeds the limit of {settings.QUERY_MAX_COST:.3g}"
+            )
+        return self.low_priority_executor if lane == "low_priority" else self.executor
+
+    async def _run_with_deadline(self, run: Callable, deadline: float, fn: Callable, *args):
+        """Run ``fn(*args, deadline, cancelled)`` through an executor, giving up at ``deadline``
+
+        A query still waiting for a worker is dropped from the queue. One that
+        is already running stops at its next deadline check, once
+        ``cancelled`` is set.
+        """
+        cancelled = threading.Event()
         try:
-            results = self.g.query(query)
+            return await asyncio.wait_for(
+                run(fn, *args, deadline, cancelled),
+                timeout=max(deadline - time.monotonic(), 0)
+            )
+        except asyncio.TimeoutError:
+            raise QueryTimeoutError("Query exceeded its time limit")
+        finally:
+            cancelled.set()
+
+    def _prepare_builtin_queries(self, dataset: BrickDataset) -> Dict[str, Query]:
+        """Parse and translate the service's own queries once per loaded graph"""
+        namespaces = dict(dataset.namespaces())
+        return {query: prepareQuery(query, initNs=namespaces) for query in BUILTIN_QUERIES}
+
+    def _prepare_query(self, query: str) -> Query:
+        """Return the translated algebra for a query, parsing it only on a cache miss"""
+        prepared = self.prepared_queries.get(query)
+        if prepared is not None:
+            return prepared
+
+        key = normalize_query(query)
+        prepared = self.algebra_cache.get(key)
+        if prepared is None:
+            # Same steps as rdflib's prepareQuery, timed separately
+            with QUERY_PHASE_LATENCY.time("parse"):
+                parsed = parseQuery(query)
+            with QUERY_PHASE_LATENCY.time("translate"):
+                prepared = translateQuery(parsed, initNs=dict(self.g.namespaces()))
+            self.algebra_cache.put(key, prepared, 1)
+        return prepared
+
+    def _run_query(
+        self,
+        query: str,
+        bindings: Optional[Dict[str, Node]] = None,
+        scope: Optional[URIRef] = None,
+        max_rows: Optional[int] = None,
+        deadline: Optional[float] = None,
+        cancelled: Optional[threading.Event] = None
+    ) -> Dict:
+        """Evaluate a SPARQL query under the graph read lock (runs on an executor thread)"""
+        with self.graph_lock.read(), query_deadline(deadline, cancelled):
+            prepared = self._prepare_query(query)
+            started = time.perf_counter()
+            results = self._query_graph(scope).query(prepared, initBindings=bindings or {})
             
-            if isinstance(results, SPARQLResult):
+            if results.type != "ASK":
                 processed_results = []
+                truncated = False
                 for row in results:
+                    if max_rows is not None and len(processed_results) >= max_rows:
+                        truncated = True
+                        break
                     processed_row = {}
                     for var_idx, var in enumerate(results.vars):
                         if var_idx < len(row):
@@ -61,13 +954,136 @@ class BrickService:
                         else:
                             processed_row[str(var)] = None
                     processed_results.append(processed_row)
+                QUERY_PHASE_LATENCY.observe(time.perf_counter() - started, "evaluate")
+                QUERY_ROWS.observe(len(processed_results))
+                if truncated:
+                    return {"results": processed_results, "truncated": True}
                 return {"results": processed_results}
             else:
-                return {"results": [{"result": bool(results)}]}
-                
-        except Exception as e:
-            print(f"Query error details: {str(e)}")
-            raise
+                answer = bool(results)
+                QUERY_PHASE_LATENCY.observe(time.perf_counter() - started, "evaluate")
+                return {"results": [{"result": answer}]}
+
+    async def stream_query(
+        self,
+        query: str,
+        bindings: Optional[Dict[str, Node]] = None,
+        timeout: Optional[float] = None
+    ) -> QueryStream:
+        """Start a SELECT or ASK query whose rows are evaluated batch by batch
+
+        Each batch runs on the query executor under the graph read lock, so
+        the full result set is never held in memory. The stream fails if the
+        graph changes between batches. Streams have no row limit, but every
+        batch must finish within the query timeout.
+        """
+        timeout = _lower_limit(timeout, settings.QUERY_TIMEOUT_SECONDS)
+        executor = await self._admit_query(query, bindings)
+        generation = self.generation
+        query_type, variables, solutions = await self._run_with_deadline(
+            executor.run, time.monotonic() + timeout, self._start_stream, query, bindings
+        )
+        if query_type == "ASK":
+            return QueryStream(variables, answer=solutions)
+
+        async def batches():
+            while True:
+                batch = await self._run_with_deadline(
+                    executor.run_admitted, time.monotonic() + timeout, self._next_batch, solutions, generation
+                )
+                if not batch:
+                    return
+                yield batch
+
+        return QueryStream(variables, batches=batches())
+
+    def _start_stream(
+        self,
+        query: str,
+        bindings: Optional[Dict[str, Node]],
+        deadline: Optional[float] = None,
+        cancelled: Optional[threading.Event] = None
+    ):
+        with self.graph_lock.read(), query_deadline(deadline, cancelled):
+            result = evalQuery(self.g, self._prepare_query(query), bindings or {})
+        if result["type_"] == "ASK":
+            return "ASK", [], result["askAnswer"]
+        if result["type_"] != "SELECT":
+            raise ValueError("Streaming is only supported for SELECT and ASK queries")
+        return "SELECT", list(result["vars_"]), iter(result["bindings"])
+
+    def _next_batch(
+        self,
+        solutions: Iterator,
+        generation: int,
+        deadline: Optional[float] = None,
+        cancelled: Optional[threading.Event] = None
+    ) -> List:
+        with self.graph_lock.read(), query_deadline(deadline, cancelled):
+            if generation != self.generation:
+                raise RuntimeError("Graph changed while streaming query results")
+            return list(islice(solutions, settings.QUERY_STREAM_BATCH_SIZE))
+
+    def _register_metrics(self):
+        """Expose graph, cache and executor state as gauges read at scrape time"""
+        REGISTRY.gauge("brick_graph_triples", "Triples in the loaded graph", self.get_triple_count)
+        REGISTRY.gauge("brick_graph_generation", "Number of times the graph has changed", lambda: self.generation)
+        caches = {"result": self.query_cache, "algebra": self.algebra_cache}
+        REGISTRY.gauge(
+            "sparql_cache_hit_ratio",
+            "Fraction of lookups served from each query cache",
+            lambda: {(name,): cache.stats()["hit_ratio"] for name, cache in caches.items()},
+            ("cache",)
+        )
+        REGISTRY.gauge(
+            "sparql_cache_entries",
+            "Entries held in each query cache",
+            lambda: {(name,): cache.stats()["entries"] for name, cache in caches.items()},
+            ("cache",)
+        )
+        executors = {"default": self.executor, "low_priority": self.low_priority_executor}
+        for field in ("active", "queued"):
+            REGISTRY.gauge(
+                f"sparql_executor_{field}",
+                f"Queries {field} on each query executor",
+                lambda field=field: {(name,): executor.stats()[field] for name, executor in executors.items()},
+                ("executor",)
+            )
+
+    def get_executor_stats(self) -> Dict:
+        """Return queue depth and counters for the query executor"""
+        return self.executor.stats()
+
+    def get_low_priority_executor_stats(self) -> Dict:
+        """Return queue depth and counters for the executor that runs expensive queries"""
+        return self.low_priority_executor.stats()
+
+    def get_cache_stats(self) -> Dict:
+        """Return hit/miss counters and occupancy of the query result cache"""
+        return {"generation": self.generation, **self.query_cache.stats()}
+
+    def get_algebra_cache_stats(self) -> Dict:
+        """Return hit/miss counters for parsed user query algebra"""
+        return {"prepared_builtin": len(self.prepared_queries), **self.algebra_cache.stats()}
+
+    def _bump_generation(self):
+        """Mark the graph as changed so cached results are no longer served"""
+        self.generation += 1
+
+    def etag(self, scope: str) -> str:
+        """Strong ETag for a response that depends only on the graph and ``scope``
+
+        The graph is identified by the signatures of the files it was loaded
+        from rather than by the generation, which counts reloads per process,
+        so every worker serving the same files issues and accepts the same
+        tags. Once triples are ingested the tag also carries this process's
+        epoch and ingest count, as no other process has those changes.
+        """
+        version = self.state.version
+        if self.ingests:
+            version = f"{version}:{self.epoch}:{self.ingests}"
+        digest = hashlib.blake2b(f"{version}:{scope}".encode(), digest_size=16).hexdigest()
+        return f'"{digest}"'
 
     def get_triple_count(self) -> int:
         """Return the total number of triples in the graph"""
@@ -79,28 +1095,31 @@ class BrickService:
 
     async def get_buildings(self) -> List[Building]:
         """Get all buildings from the Brick graph"""
-        query = """
-        PREFIX brick: <https://brickschema.org/schema/Brick#>
-        
-        SELECT ?id ?name
-        WHERE {
-            ?id a brick:Building .
-            OPTIONAL { ?id rdfs:label ?name }
-        }
-        """
+        return [Building(**row) for row in await self._building_rows()]
+
+    async def render_buildings(self) -> RenderedPage:
+        """Get all buildings as an encoded JSON body"""
+        generation = self.generation
+
+        async def render():
+            rows = await self._building_rows()
+            return rows, len(rows), None
+
+        return await self._rendered(("buildings", generation), render)
+
+    async def _building_rows(self) -> List[Dict]:
         try:
-            result = await self.execute_query(query)
+            result = await self.execute_query(BUILDINGS_QUERY)
             buildings = []
             for row in result["results"]:
                 building_id = row["id"]
                 simple_id = building_id.split('#')[-1]
                 
-                building = Building(
-                    id=simple_id,
-                    name=row.get("name") or simple_id,
-                    description=None  # We can add description later if needed
-                )
-                buildings.append(building)
+                buildings.append({
+                    "id": simple_id,
+                    "name": row.get("name") or simple_id,
+                    "description": None  # We can add description later if needed
+                })
             return buildings
         except Exception as e:
             print(f"Error getting buildings: {str(e)}")
@@ -108,101 +1127,290 @@ class BrickService:
 
     async def get_building_floors(self, building_id: str) -> List[Floor]:
         """Get all floors in a specific building"""
-        full_building_uri = f"{self.BASE_URI}/{building_id}#{building_id}"
-        query = f"""
-        SELECT DISTINCT ?id ?name
-        WHERE {{
-            ?id a brick:Floor .
-            <{full_building_uri}> brick:hasPart ?id .
-            OPTIONAL {{ ?id rdfs:label ?name }}
-        }}
-        ORDER BY ?id
-        """
+        return [Floor(**row) for row in await self._floor_rows(building_id)]
+
+    async def render_building_floors(self, building_id: str) -> RenderedPage:
+        """Get all floors in a specific building as an encoded JSON body"""
+        generation = self.generation
+
+        async def render():
+            rows = await self._floor_rows(building_id)
+            return rows, len(rows), None
+
+        return await self._rendered(("floors", building_id, generation), render)
+
+    async def _floor_rows(self, building_id: str) -> List[Dict]:
+        building_uri = URIRef(f"{self.BASE_URI}/{building_id}#{building_id}")
         try:
-            result = await self.execute_query(query)
+            result = await self.execute_query(
+                BUILDING_FLOORS_QUERY, {"building": building_uri}, scope=building_uri
+            )
             floors = []
             for row in result["results"]:
                 floor_id = row["id"]
                 simple_id = floor_id.split('#')[-1]
                 
-                floor = Floor(
-                    id=simple_id,
-                    name=row.get("name") or simple_id,
-                    building_id=building_id
-                )
-                floors.append(floor)
+                floors.append({
+                    "id": simple_id,
+                    "name": row.get("name") or simple_id,
+                    "building_id": building_id
+                })
             return floors
         except Exception as e:
             print(f"Error getting floors: {str(e)}")
             raise
 
-    async def get_building_devices(self, building_id: str) -> List[Device]:
+    async def get_building_devices(self, building_id: str, include_points: bool = False) -> List[Device]:
         """Get all devices in a specific building"""
-        full_building_uri = f"{self.BASE_URI}/{building_id}#{building_id}"
-        query = f"""
-        SELECT DISTINCT ?id ?type ?name ?location
-        WHERE {{
-            ?id a ?type .
-            <{full_building_uri}> brick:hasPart* ?location .
-            ?location brick:hasPart* ?id .
-            FILTER EXISTS {{
-                ?type rdfs:subClassOf* brick:Equipment
-            }}
-            OPTIONAL {{ ?id rdfs:label ?name }}
-        }}
-        ORDER BY ?id
-        """
+        return (await self.get_building_devices_page(building_id, include_points=include_points)).devices
+
+    async def get_building_devices_page(
+        self,
+        building_id: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        include_points: bool = False
+    ) -> DevicePage:
+        """Get one keyset-paginated page of the devices in a building"""
+        rows, total, next_cursor = self._building_device_rows(building_id, limit, cursor, include_points)
+        return DevicePage([Device(**row) for row in rows], total, next_cursor)
+
+    async def render_building_devices_page(
+        self,
+        building_id: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        include_points: bool = False
+    ) -> RenderedPage:
+        """Get one page of the devices in a building as an encoded JSON body"""
+        generation = self.generation
+
+        async def render():
+            return self._building_device_rows(building_id, limit, cursor, include_points)
+
+        return await self._rendered(
+            ("building_devices", building_id, limit, cursor, include_points, generation), render
+        )
+
+    def _building_device_rows(
+        self,
+        building_id: str,
+        limit: Optional[int],
+        cursor: Optional[str],
+        include_points: bool
+    ) -> Tuple[List[Dict], int, Optional[str]]:
+        building_uri = URIRef(f"{self.BASE_URI}/{building_id}#{building_id}")
+        state = self.state
         try:
-            result = await self.execute_query(query)
+            device_uris, total = state.equipment_index.page(building_uri, decode_cursor(cursor), limit)
+            scope = state.containment_index.descendants(building_uri)
+            points = state.point_index.points_for(device_uris) if include_points else {}
             devices = []
-            for row in result["results"]:
-                device_id = row["id"]
-                simple_id = device_id.split('#')[-1]
-                
-                device = Device(
-                    id=simple_id,
-                    type=self._get_simple_id(row["type"]),
-                    name=row.get("name", simple_id),
-                    location=self._get_simple_id(row["location"]) if row.get("location") else None,
-                    points=[]  # TODO: Points will be populated by a separate query if needed
+            for device_uri in device_uris:
+                location = sorted(
+                    parent for parent in state.containment_index.parents(device_uri)
+                    if parent == building_uri or parent in scope
                 )
-                devices.append(device)
-            return devices
+                devices.append(self._device_row(
+                    state,
+                    device_uri,
+                    self._get_simple_id(location[0]) if location else None,
+                    points.get(device_uri, [])
+                ))
+            return devices, total, self._next_cursor(device_uris, state.equipment_index.in_container(building_uri))
         except Exception as e:
             print(f"Error getting building devices: {str(e)}")
             raise
 
-    async def get_floor_devices(self, building_id: str, floor_id: str) -> List[Device]:
+    async def get_floor_devices(
+        self,
+        building_id: str,
+        floor_id: str,
+        include_points: bool = False
+    ) -> List[Device]:
         """Get all devices in a specific floor"""
-        full_floor_uri = f"{self.BASE_URI}/{building_id}#{floor_id}"
-        query = f"""
-        SELECT DISTINCT ?id ?type ?name
-        WHERE {{
-            ?id a ?type .
-            <{full_floor_uri}> brick:hasPart* ?id .
-            FILTER EXISTS {{
-                ?type rdfs:subClassOf* brick:Equipment
-            }}
-            OPTIONAL {{ ?id rdfs:label ?name }}
-        }}
-        ORDER BY ?id
+        return (await self.get_floor_devices_page(
+            building_id, floor_id, include_points=include_points
+        )).devices
+
+    async def get_floor_devices_page(
+        self,
+        building_id: str,
+        floor_id: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        include_points: bool = False
+    ) -> DevicePage:
+        """Get one keyset-paginated page of the devices on a floor"""
+        rows, total, next_cursor = self._floor_device_rows(building_id, floor_id, limit, cursor, include_points)
+        return DevicePage([Device(**row) for row in rows], total, next_cursor)
+
+    async def render_floor_devices_page(
+        self,
+        building_id: str,
+        floor_id: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        include_points: bool = False
+    ) -> RenderedPage:
+        """Get one page of the devices on a floor as an encoded JSON body"""
+        generation = self.generation
+
+        async def render():
+            return self._floor_device_rows(building_id, floor_id, limit, cursor, include_points)
+
+        return await self._rendered(
+            ("floor_devices", building_id, floor_id, limit, cursor, include_points, generation), render
+        )
+
+    def _floor_device_rows(
+        self,
+        building_id: str,
+        floor_id: str,
+        limit: Optional[int],
+        cursor: Optional[str],
+        include_points: bool
+    ) -> Tuple[List[Dict], int, Optional[str]]:
+        floor_uri = URIRef(f"{self.BASE_URI}/{building_id}#{floor_id}")
+        state = self.state
+        try:
+            device_uris, total = state.equipment_index.page(floor_uri, decode_cursor(cursor), limit)
+            points = state.point_index.points_for(device_uris) if include_points else {}
+            devices = [
+                self._device_row(state, device_uri, floor_id, points.get(device_uri, []))
+                for device_uri in device_uris
+            ]
+            return devices, total, self._next_cursor(device_uris, state.equipment_index.in_container(floor_uri))
+        except Exception as e:
+            print(f"Error getting floor devices: {str(e)}")
+            raise
+
+    async def _rendered(
+        self,
+        key: Tuple,
+        render: Callable[[], Awaitable[Tuple[List[Dict], int, Optional[str]]]]
+    ) -> RenderedPage:
+        """Return an encoded listing from the response cache, building its rows on a miss
+
+        Callers read the generation for ``key`` before the state the rows come
+        from, so a reload mid-render can only file new rows under an old key.
         """
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            return cached
+        rows, total, next_cursor = await render()
+        page = RenderedPage(dumps(rows), total, next_cursor)
+        self.response_cache.put(key, page, len(page.body))
+        return page
+
+    async def get_topology(
+        self,
+        building_id: str,
+        entity_id: str,
+        downstream: bool,
+        max_depth: Optional[int] = None,
+        include_points: bool = True
+    ) -> Topology:
+        """Walk the feed graph from an entity: everything it feeds, or everything feeding it"""
+        entity_uri = URIRef(f"{self.BASE_URI}/{building_id}#{entity_id}")
+        state = self.state
         try:
-            result = await self.execute_query(query)
-            devices = []
-            for row in result["results"]:
-                device_id = row["id"]
-                simple_id = device_id.split('#')[-1]
-                
-                device = Device(
-                    id=simple_id,
-                    type=self._get_simple_id(row["type"]),
-                    name=row.get("name", simple_id),
-                    location=floor_id,
-                    points=[]  # TODO: Points will be populated by a separate query if needed
+            if entity_uri not in state.topology_index:
+                raise UnknownEntityError(
+                    f"Entity {entity_id} in building {building_id} has no feed or part relationships"
                 )
-                devices.append(device)
-            return devices
+            walk = state.topology_index.downstream if downstream else state.topology_index.upstream
+            entries = walk(entity_uri, max_depth)
+            points = state.point_index.points_for(entry.node for entry in entries) if include_points else {}
+            nodes = []
+            for entry in entries:
+                simple_id = self._get_simple_id(entry.node)
+                node_type = state.topology_index.type_of(entry.node)
+                name = state.label_index.label_of(entry.node)
+                nodes.append(TopologyNode(
+                    id=simple_id,
+                    type=self._get_simple_id(node_type) if node_type is not None else None,
+                    name=name if name is not None else simple_id,
+                    depth=entry.depth,
+                    via=[self._get_simple_id(node) for node in entry.via],
+                    points=[self._get_simple_id(point) for point in points.get(entry.node, [])]
+                ))
+            return Topology(
+                id=entity_id,
+                direction="downstream" if downstream else "upstream",
+                nodes=nodes
+            )
         except Exception as e:
-            print(f"Error getting floor devices: {str(e)}")
-            raise
\ No newline at end of file
+            print(f"Error getting topology: {str(e)}")
+            raise
+
+    def _next_cursor(self, page: List[URIRef], ordered: List[URIRef]) -> Optional[str]:
+        """Return the cursor for the page after ``page`` of ``ordered``, or None if it was the last"""
+        if not page or ordered[-1] == page[-1]:
+            return None
+        return encode_cursor(page[-1])
+
+    async def get_all_points(
+        self,
+        point_type: Optional[str] = None,
+        building_id: Optional[str] = None,
+        device_id: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> PointPage:
+        """Get points filtered by Brick point class (including subclasses), device and building"""
+        state = self.state
+        try:
+            classes = None
+            if point_type is not None:
+                point_class = BRICK[point_type]
+                if not state.class_index.is_point(point_class):
+                    raise InvalidFilterError(f"{point_type} is not a Brick point class")
+                classes = state.class_index.descendants(point_class)
+
+            building_uri = None
+            if building_id is not None:
+                building_uri = URIRef(f"{self.BASE_URI}/{building_id}#{building_id}")
+
+            device_uri = None
+            if device_id is not None:
+                if building_id is None:
+                    raise InvalidFilterError("Filtering by device requires a building")
+                device_uri = URIRef(f"{self.BASE_URI}/{building_id}#{device_id}")
+
+            matching = state.point_index.filter(classes, device_uri, building_uri)
+            point_uris, total = state.point_index.page(matching, decode_cursor(cursor), limit)
+            points = [self._build_point(state, point_uri) for point_uri in point_uris]
+            return PointPage(points, total, self._next_cursor(point_uris, matching))
+        except Exception as e:
+            print(f"Error getting points: {str(e)}")
+            raise
+
+    def _build_point(self, state: GraphState, point_uri: URIRef) -> Point:
+        simple_id = self._get_simple_id(point_uri)
+        name = state.label_index.label_of(point_uri)
+        equipment = state.point_index.equipment_of(point_uri)
+        return Point(
+            id=simple_id,
+            type=self._get_simple_id(state.class_index.most_specific(state.point_index.types_of(point_uri))[0]),
+            name=name if name is not None else simple_id,
+            device=self._get_simple_id(equipment[0]) if equipment else None
+        )
+
+    def _device_row(
+        self,
+        state: GraphState,
+        device_uri: URIRef,
+        location: Optional[str],
+        points: List[URIRef]
+    ) -> Dict:
+        """The fields of a Device, as the plain dict it serializes to"""
+        simple_id = self._get_simple_id(device_uri)
+        name = state.label_index.label_of(device_uri)
+        return {
+            "id": simple_id,
+            "type": self._get_simple_id(state.equipment_index.type_of(device_uri)),
+            "name": name if name is not None else simple_id,
+            "location": location,
+            "points": [self._get_simple_id(point) for point in points]
+        }
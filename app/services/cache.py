@@ -0,0 +1,117 @@
+from collections import OrderedDict
+import re
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional
+
+# String literals (all four SPARQL quoting styles) and IRIs are kept verbatim;
+# everything between them has its whitespace collapsed.
+_VERBATIM = re.compile(
+    r'"""(?:[^"\\]|\\.|"(?!""))*"""'
+    r"|'''(?:[^'\\]|\\.|'(?!''))*'''"
+    r'|"(?:[^"\\\n]|\\.)*"'
+    r"|'(?:[^'\\\n]|\\.)*'"
+    r"|<[^<>\"{}|^`\\\s]*>",
+    re.DOTALL,
+)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Collapse insignificant whitespace so equivalent query text shares a cache key"""
+    parts = []
+    last = 0
+    for match in _VERBATIM.finditer(query):
+        parts.append(_WHITESPACE.sub(" ", query[last:match.start()]))
+        parts.append(match.group(0))
+        last = match.end()
+    parts.append(_WHITESPACE.sub(" ", query[last:]))
+    return "".join(parts).strip()
+
+
+def estimate_result_size(result: Dict) -> int:
+    """Rough byte size of a processed query result ({"results": [row, ...]})"""
+    size = 64
+    for row in result.get("results", ()):
+        size += 64
+        for key, value in row.items():
+            size += 50 + len(key) + (len(value) if isinstance(value, str) else 8)
+    return size
+
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by entry count and estimated bytes.
+
+    Every entry also carries a TTL. For query results, callers put the graph
+    generation in the key, so a mutation makes older entries unreachable and
+    they age out of the LRU order on their own.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            value, size, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, size: int) -> None:
+        if not self.enabled or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic() + self.ttl_seconds)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
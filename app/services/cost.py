@@ -0,0 +1,223 @@
+"""
+Pre-execution cost estimates for SPARQL queries.
+
+The estimate walks the translated algebra of a prepared query and predicts,
+from per-predicate triple counts, how many intermediate solutions rdflib will
+produce while evaluating it. It is meant to tell a lookup from a Cartesian
+product before any work starts, not to be accurate to a constant factor.
+"""
+
+import math
+from typing import Dict, Iterable, List, Set, Tuple
+
+from rdflib import BNode, Graph, URIRef, Variable
+from rdflib.namespace import RDF
+from rdflib.plugins.sparql.parserutils import CompValue
+from rdflib.plugins.sparql.sparql import Query
+from rdflib.term import Node
+
+from app.services.ingest import Triple
+
+# Operators that consume their whole input before producing the first row
+BLOCKING_PARTS = {"OrderBy", "Group", "AggregateJoin"}
+
+Estimate = Tuple[float, float, Set[Variable]]
+
+
+class QueryCostError(ValueError):
+    """Raised when a query's estimated cost is above the configured maximum"""
+
+
+class GraphStats:
+    """Triple counts per predicate and per rdf:type class, for cost estimates"""
+
+    def __init__(
+        self,
+        triples: int,
+        subjects: int,
+        objects: int,
+        predicates: Dict[Node, int],
+        predicate_subjects: Dict[Node, int],
+        predicate_objects: Dict[Node, int],
+        classes: Dict[Node, int]
+    ):
+        self.triples = triples
+        self.subjects = subjects
+        self.objects = objects
+        self.predicates = predicates
+        self.predicate_subjects = predicate_subjects
+        self.predicate_objects = predicate_objects
+        self.classes = classes
+
+    @classmethod
+    def from_graph(cls, graph: Graph) -> "GraphStats":
+        predicates: Dict[Node, int] = {}
+        subjects: Dict[Node, Set[Node]] = {}
+        objects: Dict[Node, Set[Node]] = {}
+        classes: Dict[Node, int] = {}
+        triples = 0
+        for s, p, o in graph.triples((None, None, None)):
+            triples += 1
+            predicates[p] = predicates.get(p, 0) + 1
+            subjects.setdefault(p, set()).add(s)
+            objects.setdefault(p, set()).add(o)
+            if p == RDF.type:
+                classes[o] = classes.get(o, 0) + 1
+        return cls(
+            triples,
+            len(set().union(*subjects.values())),
+            len(set().union(*objects.values())),
+            predicates,
+            {p: len(nodes) for p, nodes in subjects.items()},
+            {p: len(nodes) for p, nodes in objects.items()},
+            classes
+        )
+
+    def updated(self, changes: Iterable[Triple], delete: bool = False) -> "GraphStats":
+        """Return stats with added (or removed) triples counted in
+
+        Only the triple counts are exact; distinct subject and object counts
+        are kept as they were, clamped to the new triple counts.
+        """
+        step = -1 if delete else 1
+        triples = self.triples
+        predicates = dict(self.predicates)
+        classes = dict(self.classes)
+        for _, p, o in changes:
+            triples += step
+            predicates[p] = predicates.get(p, 0) + step
+            if p == RDF.type:
+                classes[o] = classes.get(o, 0) + step
+        predicates = {p: count for p, count in predicates.items() if count > 0}
+        return GraphStats(
+            triples,
+            self.subjects,
+            self.objects,
+            predicates,
+            {p: max(1, min(self.predicate_subjects.get(p, count), count)) for p, count in predicates.items()},
+            {p: max(1, min(self.predicate_objects.get(p, count), count)) for p, count in predicates.items()},
+            {c: count for c, count in classes.items() if count > 0}
+        )
+
+    def pattern_rows(self, triple: Tuple[Node, Node, Node], bound: Set[Variable]) -> float:
+        """Expected matches of one triple pattern once the ``bound`` variables have values"""
+        s, p, o = triple
+        s_bound, o_bound = _is_bound(s, bound), _is_bound(o, bound)
+        if isinstance(p, URIRef):
+            if p == RDF.type and not _is_variable(o):
+                rows = self.classes.get(o, 0)
+                return min(rows, 1) if s_bound else rows
+            rows = self.predicates.get(p, 0)
+            if s_bound:
+                rows /= self.predicate_subjects.get(p, 1)
+            if o_bound:
+                rows /= self.predicate_objects.get(p, 1)
+            return rows
+
+        # Variable predicate or property path
+        rows = self.triples
+        if _is_bound(p, bound):
+            rows /= max(len(self.predicates), 1)
+        if s_bound:
+            rows /= max(self.subjects, 1)
+        if o_bound:
+            rows /= max(self.objects, 1)
+        return rows
+
+
+def estimate_cost(query: Query, stats: GraphStats, bound: Iterable[str] = ()) -> float:
+    """Estimate the solutions rdflib evaluates for ``query``, given pre-bound variable names"""
+    _, cost, _ = _estimate(query.algebra, stats, {Variable(name) for name in bound})
+    return cost
+
+
+def _estimate(part: CompValue, stats: GraphStats, bound: Set[Variable]) -> Estimate:
+    name = part.name
+    if name == "BGP":
+        return _estimate_bgp(part.triples, stats, bound)
+
+    if name == "Join":
+        rows1, cost1, vars1 = _estimate(part.p1, stats, bound)
+        if part.lazy:
+            # Evaluated once per solution of p1, with its variables bound
+            rows2, cost2, vars2 = _estimate(part.p2, stats, bound | vars1)
+            return rows1 * rows2, cost1 + max(rows1, 1) * cost2, vars1 | vars2
+        # Both sides evaluated independently, then joined by a nested loop
+        rows2, cost2, vars2 = _estimate(part.p2, stats, bound)
+        rows = rows1 * rows2 if not vars1 & vars2 else max(rows1, rows2)
+        return rows, cost1 + cost2 + rows1 * rows2, vars1 | vars2
+
+    if name == "LeftJoin":
+        rows1, cost1, vars1 = _estimate(part.p1, stats, bound)
+        rows2, cost2, vars2 = _estimate(part.p2, stats, bound | vars1)
+        return rows1 * max(rows2, 1), cost1 + max(rows1, 1) * cost2, vars1 | vars2
+
+    if name == "Minus":
+        rows1, cost1, vars1 = _estimate(part.p1, stats, bound)
+        rows2, cost2, _ = _estimate(part.p2, stats, bound)
+        return rows1, cost1 + cost2 + rows1 * rows2, vars1
+
+    if name == "Union":
+        rows1, cost1, vars1 = _estimate(part.p1, stats, bound)
+        rows2, cost2, vars2 = _estimate(part.p2, stats, bound)
+        return rows1 + rows2, cost1 + cost2, vars1 | vars2
+
+    if name == "values":
+        rows = len(part.res)
+        return rows, rows, {Variable(var) for row in part.res for var in row}
+
+    if name == "Slice":
+        rows, cost, variables = _estimate(part.p, stats, bound)
+        if part.length is None:
+            return max(rows - part.start, 0), cost, variables
+        needed = part.start + part.length
+        if rows > needed and not _is_blocking(part.p):
+            # Evaluation is lazy, so only the first rows are ever produced
+            cost *= needed / rows
+        return min(rows, part.length), cost, variables
+
+    if name == "OrderBy":
+        rows, cost, variables = _estimate(part.p, stats, bound)
+        return rows, cost + rows * math.log2(max(rows, 2)), variables
+
+    # Project, Extend, Filter, Distinct, Graph, Group, ... pass their input through
+    estimates = [_estimate(child, stats, bound) for child in _children(part)]
+    if not estimates:
+        return 1, 0, set()
+    return (
+        max(rows for rows, _, _ in estimates),
+        sum(cost for _, cost, _ in estimates),
+        set().union(*(variables for _, _, variables in estimates))
+    )
+
+
+def _estimate_bgp(triples: List[Tuple[Node, Node, Node]], stats: GraphStats, bound: Set[Variable]) -> Estimate:
+    # rdflib evaluates the patterns with the fewest unbound terms first
+    ordered = sorted(triples, key=lambda t: len([n for n in t if not _is_bound(n, bound)]))
+    rows, cost = 1.0, 0.0
+    variables: Set[Variable] = set()
+    for triple in ordered:
+        matches = stats.pattern_rows(triple, bound | variables)
+        cost += rows + rows * matches
+        rows *= matches
+        variables.update(term for term in triple if _is_variable(term))
+    return rows, cost, variables
+
+
+def _children(part: CompValue) -> List[CompValue]:
+    return [
+        child for child in (part.p, part.p1, part.p2)
+        if isinstance(child, CompValue)
+    ]
+
+
+def _is_blocking(part: CompValue) -> bool:
+    return part.name in BLOCKING_PARTS or any(_is_blocking(child) for child in _children(part))
+
+
+def _is_variable(term: Node) -> bool:
+    return isinstance(term, (Variable, BNode))
+
+
+def _is_bound(term: Node, bound: Set[Variable]) -> bool:
+    return not _is_variable(term) or term in bound
@@ -0,0 +1,142 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import threading
+from typing import Any, Callable, Dict
+
+
+class QueueFullError(Exception):
+    """Raised when the query executor has no room for another request"""
+
+
+class ReadWriteLock:
+    """Writer-preferring reader/writer lock.
+
+    Any number of readers may hold the lock at once. A waiting writer blocks
+    new readers so a reload is never starved by a steady stream of queries.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class QueryExecutor:
+    """Run blocking graph work on a bounded thread pool.
+
+    At most ``max_workers`` calls run at once and at most ``max_queue`` wait
+    for a free worker; anything beyond that is rejected with QueueFullError
+    instead of piling up behind a slow query. A thread pool is used rather
+    than a process pool because the graph lives in this process's memory.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sparql")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._cancelled = 0
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self._rejected += 1
+                raise QueueFullError(
+                    f"Query queue is full ({self.max_queue} waiting), try again later"
+                )
+            self._queued += 1
+        return await self._submit(fn, args)
+
+    async def run_admitted(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run follow-up work for a request that already passed admission.
+
+        Used for the later batches of a streamed result, which must not be
+        rejected halfway through a response.
+        """
+        with self._lock:
+            self._queued += 1
+        return await self._submit(fn, args)
+
+    async def _submit(self, fn: Callable[..., Any], args: tuple) -> Any:
+        future = self._pool.submit(self._call, fn, args)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # A call that has not started yet is dropped from the queue; one
+            # that is already running has to notice cancellation itself
+            if future.cancel():
+                with self._lock:
+                    self._queued -= 1
+                    self._cancelled += 1
+            raise
+
+    def _call(self, fn: Callable[..., Any], args: tuple) -> Any:
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+        failed = False
+        try:
+            return fn(*args)
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            with self._lock:
+                self._active -= 1
+                if failed:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Return a point-in-time view of the executor's queue and counters"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": self._active,
+                "queued": self._queued,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "cancelled": self._cancelled,
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,56 @@
+"""
+Composable hooks around rdflib's evaluation of SPARQL algebra operators.
+
+rdflib lets a custom evaluation function take over an operator, but only
+one of them handles any given operator. Hooks registered here wrap the
+evaluation instead: each one gets a callable that runs the remaining hooks
+and then rdflib's own evaluation, so several hooks can be active for the
+same query.
+"""
+
+import threading
+from typing import Any, Callable, Dict, List
+
+from rdflib.plugins.sparql import CUSTOM_EVALS
+from rdflib.plugins.sparql.evaluate import evalPart
+from rdflib.plugins.sparql.parserutils import CompValue
+from rdflib.plugins.sparql.sparql import QueryContext
+
+# hook(ctx, part, evaluate) returns the operator's result, usually by wrapping
+# evaluate(); it raises NotImplementedError to leave an operator alone
+Hook = Callable[[QueryContext, CompValue, Callable[[], Any]], Any]
+
+_hooks: Dict[str, Hook] = {}
+_local = threading.local()
+
+
+def register_hook(name: str, hook: Hook) -> None:
+    """Add a hook, replacing any earlier one of the same name"""
+    _hooks[name] = hook
+
+
+def _chain(hooks: List[Hook], ctx: QueryContext, part: CompValue, outermost: bool = False) -> Any:
+    for index, hook in enumerate(hooks):
+        try:
+            return hook(ctx, part, lambda: _chain(hooks[index + 1:], ctx, part))
+        except NotImplementedError:
+            continue
+    if outermost:
+        # No hook wants this operator: let rdflib evaluate it directly
+        raise NotImplementedError()
+
+    _local.default = part
+    try:
+        return evalPart(ctx, part)
+    finally:
+        _local.default = None
+
+
+def _evaluate(ctx: QueryContext, part: CompValue) -> Any:
+    if getattr(_local, "default", None) is part:
+        _local.default = None
+        raise NotImplementedError()
+    return _chain(list(_hooks.values()), ctx, part, outermost=True)
+
+
+CUSTOM_EVALS["brick_hooks"] = _evaluate
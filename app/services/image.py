@@ -0,0 +1,545 @@
+"""
+Read-only graph images shared between worker processes.
+
+An image is one file holding a sorted term table and every quad of the
+dataset as int32 rows in three orders (SPOG, POSG and OSPG). Each worker
+memory-maps the file, so the pages are shared through the OS page cache and
+a worker only pays for the terms it has recently decoded. ``MappedStore``
+exposes an image to rdflib as a read-only, graph-aware store.
+
+``CompactStore`` serves the same encoding from ordinary process memory,
+unpacked into one int32 array per column, for a single process that wants
+the triples held compactly without a shared file.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import chain
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from rdflib import BNode, Graph, Literal, URIRef
+from rdflib.store import Store
+from rdflib.term import Node
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+IMAGE_MAGIC = b"BRKIMG\x00\x01"
+IMAGE_FORMAT_VERSION = 1
+IMAGE_PREFIX = "graph-"
+IMAGE_SUFFIX = ".image"
+
+# Decoded terms and term ID lookups kept per worker
+TERM_CACHE_SIZE = 1 << 16
+
+# Rows copied out of the map per step of a range scan
+SCAN_CHUNK_ROWS = 4096
+
+# Decoded terms a CompactStore remembers before forgetting them all
+COMPACT_TERM_CACHE_SIZE = 1 << 18
+
+_SECTIONS = (
+    "term_offsets", "term_blob", "graphs", "graph_counts",
+    "spog", "posg", "ospg", "namespaces",
+)
+_HEADER = struct.Struct("<8sII4Q" + "2Q" * len(_SECTIONS))
+
+# Row layout of each order: the positions of s, p and o within a row
+_SPOG, _POSG, _OSPG = (0, 1, 2), (2, 0, 1), (1, 2, 0)
+
+Triple = Tuple[Node, Node, Node]
+
+
+class ReadOnlyGraphError(RuntimeError):
+    """Raised on an attempt to change a graph backed by a read-only image store"""
+
+
+def term_key(term: Node) -> bytes:
+    """Encode a term as the bytes it is stored and sorted under"""
+    if isinstance(term, URIRef):
+        return b"U" + term.encode()
+    if isinstance(term, BNode):
+        return b"B" + term.encode()
+    if isinstance(term, Literal):
+        return b"\x00".join((
+            b"L" + str(term).encode(),
+            (term.language or "").encode(),
+            (term.datatype or "").encode(),
+        ))
+    raise TypeError(f"Cannot store {type(term).__name__} term {term!r}")
+
+
+def decode_term(key: bytes) -> Node:
+    kind, value = key[:1], key[1:]
+    if kind == b"U":
+        return URIRef(value.decode())
+    if kind == b"B":
+        return BNode(value.decode())
+    lexical, language, datatype = value.split(b"\x00")
+    return Literal(
+        lexical.decode(),
+        lang=language.decode() or None,
+        datatype=URIRef(datatype.decode()) if datatype else None,
+    )
+
+
+def image_path(image_dir: str, key: str) -> str:
+    return os.path.join(image_dir, f"{IMAGE_PREFIX}{key[:32]}{IMAGE_SUFFIX}")
+
+
+@contextmanager
+def image_lock(image_dir: str):
+    """Hold an exclusive lock so only one worker builds an image at a time"""
+    os.makedirs(image_dir, exist_ok=True)
+    with open(os.path.join(image_dir, "image.lock"), "w") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def write_image(
+    path: str,
+    terms: List[Node],
+    sections: Dict[Node, array],
+    namespaces: Iterable[Tuple[str, str]],
+) -> str:
+    """Write dictionary-encoded named graphs to an image file.
+
+    ``sections`` maps each graph identifier to a flat array of term IDs
+    (three per triple) into ``terms``, as produced by TripleEncoder. The
+    file is written to a temporary name and renamed into place, and any
+    other image in the same directory is removed afterwards.
+    """
+    image_dir = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=image_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in _image_chunks(terms, sections, namespaces):
+                f.write(chunk)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    for name in os.listdir(image_dir):
+        stale = os.path.join(image_dir, name)
+        if name.startswith(IMAGE_PREFIX) and name.endswith(IMAGE_SUFFIX) and stale != path:
+            os.unlink(stale)
+    return path
+
+
+def build_image(
+    terms: List[Node],
+    sections: Dict[Node, array],
+    namespaces: Iterable[Tuple[str, str]],
+) -> bytes:
+    """Return the image ``write_image`` would write, as bytes"""
+    return b"".join(_image_chunks(terms, sections, namespaces))
+
+
+def _image_chunks(
+    terms: List[Node],
+    sections: Dict[Node, array],
+    namespaces: Iterable[Tuple[str, str]],
+) -> Iterator[bytes]:
+    index = {term: term_id for term_id, term in enumerate(terms)}
+    terms = list(terms)
+    for identifier in sections:
+        if identifier not in index:
+            index[identifier] = len(terms)
+            terms.append(identifier)
+
+    # Term IDs in the image follow the sort order of the term keys, so a
+    # term can be found by binary search without a hash table.
+    keys = [term_key(term) for term in terms]
+    order = sorted(range(len(terms)), key=keys.__getitem__)
+    remap = array("i", bytes(4 * len(terms)))
+    term_offsets = array("q", [0])
+    for new_id, old_id in enumerate(order):
+        remap[old_id] = new_id
+        term_offsets.append(term_offsets[-1] + len(keys[old_id]))
+
+    quads: List[Tuple[int, int, int, int]] = []
+    graphs: List[Tuple[int, int]] = []
+    for identifier, ids in sections.items():
+        graph_id = remap[index[identifier]]
+        it = iter(ids)
+        triples = {(remap[s], remap[p], remap[o]) for s, p, o in zip(it, it, it)}
+        graphs.append((graph_id, len(triples)))
+        quads.extend((s, p, o, graph_id) for s, p, o in triples)
+    graphs.sort()
+
+    quads.sort()
+    distinct_triples = sum(
+        1 for i, quad in enumerate(quads) if i == 0 or quad[:3] != quads[i - 1][:3]
+    )
+    payloads = {
+        "term_offsets": term_offsets.tobytes(),
+        "term_blob": b"".join(keys[old_id] for old_id in order),
+        "graphs": array("i", [graph_id for graph_id, _ in graphs]).tobytes(),
+        "graph_counts": array("q", [count for _, count in graphs]).tobytes(),
+        "spog": array("i", chain.from_iterable(quads)).tobytes(),
+        "posg": array("i", chain.from_iterable(
+            sorted((p, o, s, g) for s, p, o, g in quads)
+        )).tobytes(),
+        "ospg": array("i", chain.from_iterable(
+            sorted((o, s, p, g) for s, p, o, g in quads)
+        )).tobytes(),
+        "namespaces": json.dumps([(prefix, str(uri)) for prefix, uri in namespaces]).encode(),
+    }
+
+    table = []
+    offset = _HEADER.size
+    for name in _SECTIONS:
+        offset += -offset % 8
+        table.extend((offset, len(payloads[name])))
+        offset += len(payloads[name])
+    header = _HEADER.pack(
+        IMAGE_MAGIC,
+        IMAGE_FORMAT_VERSION,
+        0 if sys.byteorder == "little" else 1,
+        len(terms), len(quads), len(graphs), distinct_triples,
+        *table,
+    )
+
+    yield header
+    position = len(header)
+    for name, section_offset in zip(_SECTIONS, table[::2]):
+        yield b"\x00" * (section_offset - position)
+        yield payloads[name]
+        position = section_offset + len(payloads[name])
+
+
+class MappedStore(Store):
+    """Read-only rdflib store over a memory-mapped graph image.
+
+    Triple patterns are answered by binary search over whichever row order
+    has the bound terms as a prefix. Namespace bindings are kept per process,
+    since they are not part of the data.
+    """
+
+    context_aware = True
+    formula_aware = False
+    graph_aware = True
+    transaction_aware = False
+
+    read_only_message = "The shared graph image is read-only"
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        sections = self._open(memoryview(self._map), path)
+        self._term_offsets = sections["term_offsets"].cast("q")
+        self._term_blob = sections["term_blob"]
+        self._rows = {
+            _SPOG: sections["spog"].cast("i"),
+            _POSG: sections["posg"].cast("i"),
+            _OSPG: sections["ospg"].cast("i"),
+        }
+
+    def _open(self, view: memoryview, name: str) -> Dict[str, memoryview]:
+        """Check an image's header, load its graphs and namespaces and return its sections"""
+        fields = _HEADER.unpack_from(view)
+        magic, version, byteorder = fields[:3]
+        if magic != IMAGE_MAGIC or version != IMAGE_FORMAT_VERSION:
+            raise ValueError(f"{name} is not a version {IMAGE_FORMAT_VERSION} graph image")
+        if byteorder != (0 if sys.byteorder == "little" else 1):
+            raise ValueError(f"{name} was written on a machine with a different byte order")
+        self._term_count, self._quad_count, _, self._triple_count = fields[3:7]
+
+        sections = {}
+        for i, name in enumerate(_SECTIONS):
+            offset, length = fields[7 + 2 * i], fields[8 + 2 * i]
+            sections[name] = view[offset:offset + length]
+        self._graph_counts = dict(zip(
+            sections["graphs"].cast("i").tolist(), sections["graph_counts"].cast("q").tolist()
+        ))
+        self._graph_objects: Dict[int, Graph] = {}
+
+        self._namespace: Dict[str, URIRef] = {}
+        self._prefix: Dict[URIRef, str] = {}
+        for prefix, uri in json.loads(bytes(sections["namespaces"])):
+            self.bind(prefix, URIRef(uri))
+
+        self._term = lru_cache(maxsize=TERM_CACHE_SIZE)(self._decode)
+        self._term_id = lru_cache(maxsize=TERM_CACHE_SIZE)(self._lookup)
+        return sections
+
+    def _key(self, term_id: int) -> bytes:
+        return bytes(self._term_blob[self._term_offsets[term_id]:self._term_offsets[term_id + 1]])
+
+    def _decode(self, term_id: int) -> Node:
+        return decode_term(self._key(term_id))
+
+    def _lookup(self, term: Node) -> Optional[int]:
+        """Binary search the sorted term table for a term's ID"""
+        try:
+            key = term_key(term)
+        except TypeError:
+            return None
+        lo, hi = 0, self._term_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._term_count and self._key(lo) == key:
+            return lo
+        return None
+
+    def _graph(self, graph_id: int) -> Graph:
+        graph = self._graph_objects.get(graph_id)
+        if graph is None:
+            graph = self._graph_objects[graph_id] = Graph(store=self, identifier=self._term(graph_id))
+        return graph
+
+    @staticmethod
+    def _plan(s: Optional[int], p: Optional[int], o: Optional[int]) -> Tuple[Tuple[int, int, int], List[int]]:
+        """Pick the row order whose leading columns are exactly the bound terms"""
+        if s is not None:
+            if p is not None:
+                return _SPOG, [s, p] if o is None else [s, p, o]
+            return (_OSPG, [o, s]) if o is not None else (_SPOG, [s])
+        if p is not None:
+            return _POSG, [p] if o is None else [p, o]
+        if o is not None:
+            return _OSPG, [o]
+        return _SPOG, []
+
+    def _range(self, rows: memoryview, prefix: List[int]) -> Tuple[int, int]:
+        """Return the span of rows starting with ``prefix``"""
+        count = len(rows) // 4
+        width = len(prefix)
+        if not width:
+            return 0, count
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if rows[4 * mid:4 * mid + width].tolist() < prefix:
+                lo = mid + 1
+            else:
+                hi = mid
+        start, hi = lo, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if rows[4 * mid:4 * mid + width].tolist() <= prefix:
+                lo = mid + 1
+            else:
+                hi = mid
+        return start, lo
+
+    def _groups(self, rows: memoryview, start: int, end: int) -> Iterator[Tuple[Tuple[int, int, int], List[int]]]:
+        """Yield each distinct triple in a span of rows with the graphs holding it"""
+        current = None
+        graphs: List[int] = []
+        for chunk_start in range(start, end, SCAN_CHUNK_ROWS):
+            values = rows[4 * chunk_start:4 * min(end, chunk_start + SCAN_CHUNK_ROWS)].tolist()
+            it = iter(values)
+            for a, b, c, g in zip(it, it, it, it):
+                key = (a, b, c)
+                if key != current:
+                    if current is not None:
+                        yield current, graphs
+                    current, graphs = key, []
+                graphs.append(g)
+        if current is not None:
+            yield current, graphs
+
+    def _match(self, triple_pattern, context) -> Iterator[Tuple[Tuple[int, int, int], List[int]]]:
+        """Yield (s, p, o) ID triples matching a pattern, with their graph IDs"""
+        ids = []
+        for term in triple_pattern:
+            term_id = None if term is None else self._term_id(term)
+            if term is not None and term_id is None:
+                return
+            ids.append(term_id)
+        graph_id = None
+        if context is not None:
+            graph_id = self._term_id(context.identifier)
+            if graph_id not in self._graph_counts:
+                return
+
+        order, prefix = self._plan(*ids)
+        rows = self._rows[order]
+        start, end = self._range(rows, prefix)
+        s_at, p_at, o_at = order
+        for key, graphs in self._groups(rows, start, end):
+            if graph_id is None or graph_id in graphs:
+                yield (key[s_at], key[p_at], key[o_at]), graphs
+
+    def triples(self, triple_pattern, context=None):
+        for (s, p, o), graphs in self._match(triple_pattern, context):
+            yield (self._term(s), self._term(p), self._term(o)), (self._graph(g) for g in graphs)
+
+    def __len__(self, context=None) -> int:
+        if context is None:
+            return self._triple_count
+        return self._graph_counts.get(self._term_id(context.identifier), 0)
+
+    def contexts(self, triple=None):
+        if triple is None:
+            graph_ids = list(self._graph_counts)
+        else:
+            graph_ids = [g for _, graphs in self._match(triple, None) for g in graphs]
+        for graph_id in graph_ids:
+            yield self._graph(graph_id)
+
+    def add_graph(self, graph: Graph) -> None:
+        # Empty graphs are not stored, so naming a new one changes nothing
+        pass
+
+    def add(self, triple, context, quoted=False):
+        raise ReadOnlyGraphError(self.read_only_message)
+
+    def addN(self, quads):
+        raise ReadOnlyGraphError(self.read_only_message)
+
+    def remove(self, triple, context=None):
+        raise ReadOnlyGraphError(self.read_only_message)
+
+    def remove_graph(self, graph: Graph) -> None:
+        raise ReadOnlyGraphError(self.read_only_message)
+
+    def bind(self, prefix: str, namespace: URIRef, override: bool = True) -> None:
+        # same semantics as rdflib's Memory store
+        bound_namespace = self._namespace.get(prefix)
+        bound_prefix = self._prefix.get(namespace)
+        if bound_prefix is None and bound_namespace is not None:
+            bound_prefix = self._prefix.get(bound_namespace)
+        if override:
+            if bound_prefix is not None:
+                del self._namespace[bound_prefix]
+            if bound_namespace is not None:
+                del self._prefix[bound_namespace]
+            self._prefix[namespace] = prefix
+            self._namespace[prefix] = namespace
+        else:
+            namespace = bound_namespace if bound_namespace is not None else namespace
+            prefix = bound_prefix if bound_prefix is not None else prefix
+            self._prefix[namespace] = prefix
+            self._namespace[prefix] = namespace
+
+    def namespace(self, prefix: str) -> Optional[URIRef]:
+        return self._namespace.get(prefix)
+
+    def prefix(self, namespace: URIRef) -> Optional[str]:
+        return self._prefix.get(namespace)
+
+    def namespaces(self):
+        for prefix, namespace in self._namespace.items():
+            yield prefix, namespace
+
+
+class CompactStore(MappedStore):
+    """Read-only rdflib store holding a graph image in this process's memory.
+
+    Each row order is unpacked into one int32 array per column. A pattern's
+    range is then narrowed one bound column at a time with bisect, which
+    runs in C, and scans zip column slices instead of copying and regrouping
+    rows. Decoded terms are remembered both ways (up to
+    COMPACT_TERM_CACHE_SIZE), so joins that look up terms read by earlier
+    patterns do not search the term table again. Query threads share the
+    store, so filling or resetting the cache holds a lock; hits read it
+    without one, as every entry maps a term to its own fixed id.
+    """
+
+    read_only_message = "The compact graph store is read-only"
+
+    def __init__(self, data: bytes):
+        Store.__init__(self)
+        self.path = None
+        view = memoryview(data)
+        sections = self._open(view, "Compact graph data")
+        self._term_offsets = array("q", bytes(sections["term_offsets"]))
+        self._term_blob = bytes(sections["term_blob"])
+        self._rows = {
+            order: tuple(
+                array("i", sections[name].cast("i")[column::4].tobytes()) for column in range(4)
+            )
+            for order, name in ((_SPOG, "spog"), (_POSG, "posg"), (_OSPG, "ospg"))
+        }
+        view.release()
+        self._terms: List[Optional[Node]] = [None] * self._term_count
+        self._ids: Dict[Node, int] = {}
+        self._term_lock = threading.Lock()
+        self._graph_tuples: Dict[Tuple[int, ...], Tuple[Graph, ...]] = {}
+        self._term = self._decoded
+        self._term_id = self._known_id
+
+    @classmethod
+    def from_file(cls, path: str) -> "CompactStore":
+        """Read an image file written by ``write_image`` into memory"""
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+    def _key(self, term_id: int) -> bytes:
+        return self._term_blob[self._term_offsets[term_id]:self._term_offsets[term_id + 1]]
+
+    def _decoded(self, term_id: int) -> Node:
+        term = self._terms[term_id]
+        if term is None:
+            with self._term_lock:
+                term = self._terms[term_id]
+                if term is None:
+                    if len(self._ids) >= COMPACT_TERM_CACHE_SIZE:
+                        self._terms = [None] * self._term_count
+                        self._ids.clear()
+                    term = self._terms[term_id] = self._decode(term_id)
+                    self._ids[term] = term_id
+        return term
+
+    def _known_id(self, term: Node) -> Optional[int]:
+        term_id = self._ids.get(term)
+        if term_id is None:
+            term_id = self._lookup(term)
+            if term_id is not None:
+                self._decoded(term_id)
+        return term_id
+
+    def _range(self, columns: Tuple[array, ...], prefix: List[int]) -> Tuple[int, int]:
+        start, end = 0, len(columns[0])
+        for column, value in zip(columns, prefix):
+            start = bisect_left(column, value, start, end)
+            end = bisect_right(column, value, start, end)
+        return start, end
+
+    def _groups(self, columns: Tuple[array, ...], start: int, end: int) -> Iterator[Tuple[Tuple[int, int, int], List[int]]]:
+        current = None
+        graphs: List[int] = []
+        for a, b, c, g in zip(*(column[start:end] for column in columns)):
+            key = (a, b, c)
+            if key != current:
+                if current is not None:
+                    yield current, graphs
+                current, graphs = key, []
+            graphs.append(g)
+        if current is not None:
+            yield current, graphs
+
+    def triples(self, triple_pattern, context=None):
+        term = self._decoded
+        graph_tuples = self._graph_tuples
+        for (s, p, o), graphs in self._match(triple_pattern, context):
+            key = tuple(graphs)
+            contexts = graph_tuples.get(key)
+            if contexts is None:
+                contexts = graph_tuples[key] = tuple(self._graph(g) for g in key)
+            yield (term(s), term(p), term(o)), contexts
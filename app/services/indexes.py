@@ -0,0 +1,597 @@
+from bisect import bisect_right
+from collections import defaultdict
+from heapq import merge
+from itertools import chain
+from typing import Any, Dict, FrozenSet, Hashable, Iterable, List, Optional, Set, Tuple
+
+from rdflib import Graph, Namespace, URIRef
+from rdflib.namespace import RDF, RDFS
+
+BRICK = Namespace("https://brickschema.org/schema/Brick#")
+
+
+class ClassIndex:
+    """Precomputed rdfs:subClassOf* closure over every class in the graph.
+
+    Both directions are reflexive, matching the SPARQL ``rdfs:subClassOf*``
+    property path the service used to evaluate for every candidate row.
+    """
+
+    def __init__(self, ancestors: Dict[URIRef, FrozenSet[URIRef]]):
+        self._ancestors = ancestors
+        descendants: Dict[URIRef, Set[URIRef]] = defaultdict(set)
+        for cls, parents in ancestors.items():
+            for parent in parents:
+                descendants[parent].add(cls)
+        self._descendants = {cls: frozenset(children) for cls, children in descendants.items()}
+
+        self.equipment = self.descendants(BRICK.Equipment)
+        self.points = self.descendants(BRICK.Point)
+        self.locations = self.descendants(BRICK.Location)
+
+    @classmethod
+    def from_graph(cls, graph: Graph) -> "ClassIndex":
+        """Build the closure from the rdfs:subClassOf triples in a graph"""
+        parents: Dict[URIRef, Set[URIRef]] = defaultdict(set)
+        for child, parent in graph.subject_objects(RDFS.subClassOf):
+            if isinstance(child, URIRef) and isinstance(parent, URIRef):
+                parents[child].add(parent)
+                parents.setdefault(parent, set())
+
+        ancestors: Dict[URIRef, FrozenSet[URIRef]] = {}
+        for start in parents:
+            seen = {start}
+            stack = [start]
+            while stack:
+                for parent in parents[stack.pop()]:
+                    if parent not in seen:
+                        seen.add(parent)
+                        stack.append(parent)
+            ancestors[start] = frozenset(seen)
+        return cls(ancestors)
+
+    def __len__(self) -> int:
+        return len(self._ancestors)
+
+    def ancestors(self, cls: URIRef) -> FrozenSet[URIRef]:
+        """Return the class and every class it is transitively a subclass of"""
+        return self._ancestors.get(cls, frozenset((cls,)))
+
+    def descendants(self, cls: URIRef) -> FrozenSet[URIRef]:
+        """Return the class and every class transitively below it"""
+        return self._descendants.get(cls, frozenset((cls,)))
+
+    def is_subclass(self, cls: URIRef, parent: URIRef) -> bool:
+        """Check whether ``cls`` is ``parent`` or one of its subclasses"""
+        return parent in self.ancestors(cls)
+
+    def is_equipment(self, cls: URIRef) -> bool:
+        return cls in self.equipment
+
+    def is_point(self, cls: URIRef) -> bool:
+        return cls in self.points
+
+    def is_location(self, cls: URIRef) -> bool:
+        return cls in self.locations
+
+    def most_specific(self, classes: Iterable[URIRef]) -> List[URIRef]:
+        """Drop every class that is a superclass of another class in the list"""
+        classes = set(classes)
+        return sorted(
+            cls for cls in classes
+            if not any(other != cls and cls in self.ancestors(other) for other in classes)
+        )
+
+
+class ContainmentIndex:
+    """Materialized brick:hasPart / brick:isPartOf hierarchy.
+
+    Edges from both predicates are folded into a single parent -> child
+    relation, and the transitive descendants and ancestors of every node are
+    precomputed so scoped lookups are plain set operations.
+    """
+
+    def __init__(self, children: Dict[URIRef, Set[URIRef]]):
+        self._children = {node: frozenset(kids) for node, kids in children.items()}
+        parents: Dict[URIRef, Set[URIRef]] = defaultdict(set)
+        for node, kids in children.items():
+            for kid in kids:
+                parents[kid].add(node)
+        self._parents = {node: frozenset(ps) for node, ps in parents.items()}
+        self._descendants = self._closure(self._children)
+        self._ancestors = self._closure(self._parents)
+
+    @classmethod
+    def from_graph(cls, graph: Graph) -> "ContainmentIndex":
+        """Build the hierarchy from hasPart and isPartOf triples in a graph"""
+        children: Dict[URIRef, Set[URIRef]] = defaultdict(set)
+        for parent, child in graph.subject_objects(BRICK.hasPart):
+            children[parent].add(child)
+        for child, parent in graph.subject_objects(BRICK.isPartOf):
+            children[parent].add(child)
+        return cls(children)
+
+    @staticmethod
+    def _closure(edges: Dict[URIRef, FrozenSet[URIRef]]) -> Dict[URIRef, FrozenSet[URIRef]]:
+        return {start: _reachable(edges, start) for start in edges}
+
+    def updated(self, graph: Graph, nodes: Iterable[URIRef]) -> "ContainmentIndex":
+        """Return a copy with the edges of ``nodes`` re-read from ``graph``
+
+        ``nodes`` must include both ends of every changed edge. Only closures
+        of nodes above or below those ends are recomputed; every other entry
+        is shared with this index.
+        """
+        nodes = set(nodes)
+        children = dict(self._children)
+        parents = dict(self._parents)
+        for node in nodes:
+            _assign(children, node, frozenset(chain(
+                graph.objects(node, BRICK.hasPart), graph.subjects(BRICK.isPartOf, node)
+            )))
+            _assign(parents, node, frozenset(chain(
+                graph.subjects(BRICK.hasPart, node), graph.objects(node, BRICK.isPartOf)
+            )))
+
+        above, below = set(nodes), set(nodes)
+        for node in nodes:
+            above |= self.ancestors(node) | _reachable(parents, node)
+            below |= self.descendants(node) | _reachable(children, node)
+        descendants = dict(self._descendants)
+        for node in above:
+            _assign(descendants, node, _reachable(children, node))
+        ancestors = dict(self._ancestors)
+        for node in below:
+            _assign(ancestors, node, _reachable(parents, node))
+
+        index = ContainmentIndex.__new__(ContainmentIndex)
+        index._children = children
+        index._parents = parents
+        index._descendants = descendants
+        index._ancestors = ancestors
+        return index
+
+    def __len__(self) -> int:
+        return len(set(self._children) | set(self._parents))
+
+    def children(self, node: URIRef) -> FrozenSet[URIRef]:
+        """Return the nodes directly contained in ``node``"""
+        return self._children.get(node, frozenset())
+
+    def parents(self, node: URIRef) -> FrozenSet[URIRef]:
+        """Return the nodes that directly contain ``node``"""
+        return self._parents.get(node, frozenset())
+
+    def descendants(self, node: URIRef) -> FrozenSet[URIRef]:
+        """Return every node transitively contained in ``node``"""
+        return self._descendants.get(node, frozenset())
+
+    def ancestors(self, node: URIRef) -> FrozenSet[URIRef]:
+        """Return every node that transitively contains ``node``"""
+        return self._ancestors.get(node, frozenset())
+
+    def contains(self, container: URIRef, node: URIRef) -> bool:
+        return node in self.descendants(container)
+
+
+class EquipmentIndex:
+    """Equipment typing plus a URI-sorted equipment list per building and floor.
+
+    The sorted lists back keyset pagination: a page starts with a binary
+    search for the cursor, so page N costs the same as page 1, and totals are
+    list lengths.
+    """
+
+    def __init__(
+        self,
+        types: Dict[URIRef, URIRef],
+        by_container: Dict[URIRef, List[URIRef]],
+        containment_index: ContainmentIndex,
+    ):
+        self._types = types
+        self._by_container = by_container
+        self._containment_index = containment_index
+
+    @classmethod
+    def from_graph(
+        cls,
+        graph: Graph,
+        class_index: ClassIndex,
+        containment_index: ContainmentIndex,
+    ) -> "EquipmentIndex":
+        """Type every equipment entity and list the equipment under each building and floor"""
+        equipment_types: Dict[URIRef, List[URIRef]] = defaultdict(list)
+        containers: Set[URIRef] = set()
+        building_or_floor = class_index.descendants(BRICK.Building) | class_index.descendants(BRICK.Floor)
+        for entity, cls_ in graph.subject_objects(RDF.type):
+            if class_index.is_equipment(cls_):
+                equipment_types[entity].append(cls_)
+            elif cls_ in building_or_floor:
+                containers.add(entity)
+
+        types = {
+            entity: class_index.most_specific(classes)[0]
+            for entity, classes in equipment_types.items()
+        }
+        by_container = {
+            container: sorted(node for node in containment_index.descendants(container) if node in types)
+            for container in containers
+        }
+        return cls(types, by_container, containment_index)
+
+    def updated(
+        self,
+        graph: Graph,
+        class_index: ClassIndex,
+        containment_index: ContainmentIndex,
+        typed: Iterable[URIRef],
+        moved: Iterable[URIRef],
+    ) -> "EquipmentIndex":
+        """Return a copy reflecting changed rdf:type triples and containment edges
+
+        ``typed`` are the entities whose types changed and ``moved`` the ends
+        of changed containment edges. Only the equipment lists of buildings
+        and floors above them, before or after the change, are re-sorted.
+        """
+        types = dict(self._types)
+        by_container = dict(self._by_container)
+        building_or_floor = class_index.descendants(BRICK.Building) | class_index.descendants(BRICK.Floor)
+        affected = set(moved)
+        for entity in typed:
+            classes = set(graph.objects(entity, RDF.type))
+            equipment = [cls_ for cls_ in classes if class_index.is_equipment(cls_)]
+            _assign(types, entity, class_index.most_specific(equipment)[0] if equipment else None)
+            if classes & building_or_floor:
+                by_container.setdefault(entity, [])
+            else:
+                by_container.pop(entity, None)
+            affected.add(entity)
+
+        containers: Set[URIRef] = set()
+        for node in affected:
+            for container in chain(
+                (node,), self._containment_index.ancestors(node), containment_index.ancestors(node)
+            ):
+                if container in by_container:
+                    containers.add(container)
+        for container in containers:
+            by_container[container] = sorted(
+                node for node in containment_index.descendants(container) if node in types
+            )
+        return EquipmentIndex(types, by_container, containment_index)
+
+    def __len__(self) -> int:
+        return len(self._types)
+
+    def type_of(self, entity: URIRef) -> Optional[URIRef]:
+        """Return the most specific equipment class of an entity, or None"""
+        return self._types.get(entity)
+
+    def in_container(self, container: URIRef) -> List[URIRef]:
+        """Return the equipment transitively contained in ``container``, sorted by URI"""
+        equipment = self._by_container.get(container)
+        if equipment is None:
+            equipment = sorted(
+                node for node in self._containment_index.descendants(container) if node in self._types
+            )
+        return equipment
+
+    def page(
+        self,
+        container: URIRef,
+        after: Optional[URIRef] = None,
+        limit: Optional[int] = None,
+    ) -> Tuple[List[URIRef], int]:
+        """Return up to ``limit`` equipment URIs sorted after ``after``, plus the total count"""
+        equipment = self.in_container(container)
+        start = bisect_right(equipment, after) if after is not None else 0
+        end = len(equipment) if limit is None else start + limit
+        return equipment[start:end], len(equipment)
+
+
+class PointIndex:
+    """Point typing and ownership for index-backed point lookups.
+
+    Holds point -> Brick point classes, point <-> equipment (from
+    brick:hasPoint and its inverse brick:isPointOf) and equipment -> building,
+    plus the inverse maps needed to answer filters as set intersections.
+    """
+
+    def __init__(
+        self,
+        point_types: Dict[URIRef, Set[URIRef]],
+        points_of: Dict[URIRef, Set[URIRef]],
+        buildings_of: Dict[URIRef, Set[URIRef]],
+        buildings: Iterable[URIRef],
+    ):
+        self._buildings = frozenset(buildings)
+        self._types = {point: frozenset(types) for point, types in point_types.items()}
+        self._by_type: Dict[URIRef, Set[URIRef]] = defaultdict(set)
+        for point, types in point_types.items():
+            for cls_ in types:
+                self._by_type[cls_].add(point)
+
+        self._points_of = {equipment: sorted(points) for equipment, points in points_of.items()}
+        equipment_of: Dict[URIRef, Set[URIRef]] = defaultdict(set)
+        for equipment, points in points_of.items():
+            for point in points:
+                equipment_of[point].add(equipment)
+        self._equipment_of = {point: sorted(equipment) for point, equipment in equipment_of.items()}
+
+        self._buildings_of = {node: frozenset(buildings) for node, buildings in buildings_of.items()}
+        self._by_building: Dict[URIRef, Set[URIRef]] = defaultdict(set)
+        for point in self._types:
+            for building in self.buildings_of(point):
+                self._by_building[building].add(point)
+
+        self._sorted = sorted(self._types)
+
+    @classmethod
+    def from_graph(
+        cls,
+        graph: Graph,
+        class_index: ClassIndex,
+        containment_index: ContainmentIndex,
+    ) -> "PointIndex":
+        """Index point types, point ownership and the building of each owner"""
+        point_types: Dict[URIRef, Set[URIRef]] = defaultdict(set)
+        buildings: Set[URIRef] = set()
+        building_classes = class_index.descendants(BRICK.Building)
+        for entity, cls_ in graph.subject_objects(RDF.type):
+            if class_index.is_point(cls_):
+                point_types[entity].add(cls_)
+            elif cls_ in building_classes:
+                buildings.add(entity)
+
+        points_of: Dict[URIRef, Set[URIRef]] = defaultdict(set)
+        for equipment, point in graph.subject_objects(BRICK.hasPoint):
+            points_of[equipment].add(point)
+        for point, equipment in graph.subject_objects(BRICK.isPointOf):
+            points_of[equipment].add(point)
+
+        resolve = _building_resolver(buildings, containment_index)
+        buildings_of = {equipment: resolve(equipment) for equipment in points_of}
+        owner_buildings: Dict[URIRef, Set[URIRef]] = defaultdict(set)
+        for equipment, points in points_of.items():
+            for point in points:
+                owner_buildings[point] |= buildings_of[equipment]
+        for point in point_types:
+            buildings_of[point] = owner_buildings.get(point) or resolve(point)
+        return cls(point_types, points_of, buildings_of, buildings)
+
+    def updated(
+        self,
+        graph: Graph,
+        class_index: ClassIndex,
+        containment_index: ContainmentIndex,
+        typed: Iterable[URIRef],
+        linked: Iterable[URIRef],
+        moved: Iterable[URIRef],
+    ) -> "PointIndex":
+        """Return a copy reflecting changed types, point links and containment
+
+        ``typed`` are the entities whose rdf:type triples changed, ``linked``
+        both ends of changed hasPoint/isPointOf triples and ``moved`` every
+        node whose containment ancestors may have changed. Only the entries of
+        affected points and equipment are recomputed; unchanged maps and sets
+        are shared with this index.
+        """
+        typed, linked = set(typed), set(linked)
+        building_classes = class_index.descendants(BRICK.Building)
+        buildings = set(self._buildings)
+        types = dict(self._types)
+        retyped: Set[URIRef] = set()
+        for node in typed:
+            classes = set(graph.objects(node, RDF.type))
+            if classes & building_classes:
+                buildings.add(node)
+            else:
+                buildings.discard(node)
+            point_classes = frozenset(cls_ for cls_ in classes if class_index.is_point(cls_))
+            if point_classes != self.types_of(node):
+                _assign(types, node, point_classes)
+                retyped.add(node)
+        changed_buildings = buildings ^ self._buildings
+
+        points_of = dict(self._points_of)
+        equipment_of = dict(self._equipment_of)
+        for node in linked:
+            _assign(points_of, node, sorted(set(chain(
+                graph.objects(node, BRICK.hasPoint), graph.subjects(BRICK.isPointOf, node)
+            ))))
+            _assign(equipment_of, node, sorted(set(chain(
+                graph.subjects(BRICK.hasPoint, node), graph.objects(node, BRICK.isPointOf)
+            ))))
+
+        affected = typed | linked | set(moved)
+        for building in changed_buildings:
+            affected |= containment_index.descendants(building)
+        if changed_buildings:
+            namespaces = {_namespace(building) for building in changed_buildings}
+            affected.update(node for node in chain(types, points_of) if _namespace(node) in namespaces)
+        for node in list(affected):
+            affected.update(self.points_of(node))
+            affected.update(points_of.get(node, ()))
+
+        resolve = _building_resolver(buildings, containment_index)
+        buildings_of = dict(self._buildings_of)
+        for node in affected:
+            _assign(buildings_of, node, frozenset(resolve(node)) if node in points_of else None)
+        for node in affected:
+            if node in types:
+                owned = set().union(*(buildings_of.get(owner, ()) for owner in equipment_of.get(node, ())))
+                _assign(buildings_of, node, frozenset(owned or resolve(node)))
+
+        by_type = dict(self._by_type)
+        copied: Set[Any] = set()
+        for point in retyped:
+            old, new = self.types_of(point), types.get(point, frozenset())
+            for cls_ in old - new:
+                _writable(by_type, copied, cls_).discard(point)
+            for cls_ in new - old:
+                _writable(by_type, copied, cls_).add(point)
+
+        by_building = dict(self._by_building)
+        copied = set()
+        for point in affected:
+            old = self.buildings_of(point) if point in self._types else frozenset()
+            new = buildings_of.get(point, frozenset()) if point in types else frozenset()
+            for building in old - new:
+                _writable(by_building, copied, building).discard(point)
+            for building in new - old:
+                _writable(by_building, copied, building).add(point)
+
+        added = {point for point in retyped if point in types and point not in self._types}
+        removed = {point for point in retyped if point not in types}
+        sorted_points = self._sorted
+        if removed:
+            sorted_points = [point for point in sorted_points if point not in removed]
+        if added:
+            sorted_points = list(merge(sorted_points, sorted(added)))
+
+        index = PointIndex.__new__(PointIndex)
+        index._buildings = frozenset(buildings)
+        index._types = types
+        index._by_type = by_type
+        index._points_of = points_of
+        index._equipment_of = equipment_of
+        index._buildings_of = buildings_of
+        index._by_building = by_building
+        index._sorted = sorted_points
+        return index
+
+    def __len__(self) -> int:
+        return len(self._types)
+
+    def types_of(self, point: URIRef) -> FrozenSet[URIRef]:
+        """Return the Brick point classes asserted on a point"""
+        return self._types.get(point, frozenset())
+
+    def points_of(self, equipment: URIRef) -> List[URIRef]:
+        """Return the points of one piece of equipment, sorted by URI"""
+        return self._points_of.get(equipment, [])
+
+    def points_for(self, equipment: Iterable[URIRef]) -> Dict[URIRef, List[URIRef]]:
+        """Return the points of every piece of equipment in one batch"""
+        return {uri: self._points_of.get(uri, []) for uri in equipment}
+
+    def equipment_of(self, point: URIRef) -> List[URIRef]:
+        """Return the equipment a point belongs to, sorted by URI"""
+        return self._equipment_of.get(point, [])
+
+    def buildings_of(self, node: URIRef) -> FrozenSet[URIRef]:
+        """Return the buildings a point or piece of equipment belongs to"""
+        return self._buildings_of.get(node, frozenset())
+
+    def filter(
+        self,
+        classes: Optional[Iterable[URIRef]] = None,
+        equipment: Optional[URIRef] = None,
+        building: Optional[URIRef] = None,
+    ) -> List[URIRef]:
+        """Return the points matching every given filter, sorted by URI
+
+        ``classes`` should already include subclasses (see ClassIndex.descendants).
+        """
+        candidates: List[Set[URIRef]] = []
+        if classes is not None:
+            of_class: Set[URIRef] = set()
+            for cls_ in classes:
+                of_class |= self._by_type.get(cls_, set())
+            candidates.append(of_class)
+        if equipment is not None:
+            candidates.append(set(self.points_of(equipment)))
+        if building is not None:
+            candidates.append(self._by_building.get(building, set()))
+
+        if not candidates:
+            return self._sorted
+        candidates.sort(key=len)
+        return sorted(set.intersection(*candidates))
+
+    def page(
+        self,
+        points: List[URIRef],
+        after: Optional[URIRef] = None,
+        limit: Optional[int] = None,
+    ) -> Tuple[List[URIRef], int]:
+        """Slice a sorted point list after a keyset cursor"""
+        start = bisect_right(points, after) if after is not None else 0
+        end = len(points) if limit is None else start + limit
+        return points[start:end], len(points)
+
+
+class LabelIndex:
+    """First rdfs:label of every labelled node, so listings never read the graph"""
+
+    def __init__(self, labels: Dict[URIRef, str]):
+        self._labels = labels
+
+    @classmethod
+    def from_graph(cls, graph: Graph) -> "LabelIndex":
+        labels: Dict[URIRef, str] = {}
+        for node, label in graph.subject_objects(RDFS.label):
+            labels.setdefault(node, str(label))
+        return cls(labels)
+
+    def updated(self, graph: Graph, nodes: Iterable[URIRef]) -> "LabelIndex":
+        """Return a copy with the labels of ``nodes`` re-read from ``graph``"""
+        labels = dict(self._labels)
+        for node in nodes:
+            label = graph.value(node, RDFS.label)
+            _assign(labels, node, str(label) if label is not None else None)
+        return LabelIndex(labels)
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def label_of(self, node: URIRef) -> Optional[str]:
+        return self._labels.get(node)
+
+
+def _namespace(uri: URIRef) -> str:
+    return uri.rsplit("#", 1)[0] + "#" if "#" in uri else uri
+
+
+def _building_resolver(buildings: Iterable[URIRef], containment_index: ContainmentIndex):
+    # A node belongs to the buildings that contain it. Nodes outside the
+    # hasPart hierarchy fall back to the building sharing their namespace,
+    # which is how every building file in this service is laid out.
+    buildings = frozenset(buildings)
+    by_namespace: Dict[str, Set[URIRef]] = defaultdict(set)
+    for building in buildings:
+        by_namespace[_namespace(building)].add(building)
+
+    def resolve(node: URIRef) -> Set[URIRef]:
+        return (containment_index.ancestors(node) & buildings) or by_namespace.get(_namespace(node), set())
+
+    return resolve
+
+
+def _reachable(edges: Dict[URIRef, FrozenSet[URIRef]], start: URIRef) -> FrozenSet[URIRef]:
+    """Every node reachable from ``start`` over ``edges``, excluding ``start`` itself"""
+    seen: Set[URIRef] = set()
+    stack = list(edges.get(start, ()))
+    while stack:
+        node = stack.pop()
+        if node not in seen:
+            seen.add(node)
+            stack.extend(edges.get(node, ()))
+    seen.discard(start)
+    return frozenset(seen)
+
+
+def _assign(mapping: Dict[Hashable, Any], key: Hashable, value: Any) -> None:
+    """Set ``mapping[key]``, or drop the key when the value is empty"""
+    if value:
+        mapping[key] = value
+    else:
+        mapping.pop(key, None)
+
+
+def _writable(mapping: Dict[Hashable, Set], copied: Set[Hashable], key: Hashable) -> Set:
+    """Copy-on-write access to a set shared with the index being updated"""
+    if key not in copied:
+        mapping[key] = set(mapping.get(key, ()))
+        copied.add(key)
+    return mapping[key]
@@ -0,0 +1,108 @@
+"""
+Parsing of triples posted to the bulk ingestion endpoints.
+
+N-Triples is line based, so it is parsed incrementally as the request body
+arrives and never buffered whole. Turtle can only be parsed as a complete
+document, so its body is collected first.
+"""
+
+import asyncio
+import io
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from rdflib import Graph
+from rdflib.plugins.parsers.ntriples import W3CNTriplesParser
+from rdflib.term import Node
+
+Triple = Tuple[Node, Node, Node]
+
+# media type -> rdflib parser format
+INGEST_FORMATS: Dict[str, str] = {
+    "application/n-triples": "nt",
+    "text/turtle": "turtle",
+}
+
+# Body bytes collected before a batch of N-Triples lines is parsed
+PARSE_CHUNK_BYTES = 1 << 20
+
+
+class InvalidTriplesError(ValueError):
+    """Raised when an ingestion request body cannot be parsed"""
+
+
+def ingest_format(content_type: Optional[str]) -> Optional[str]:
+    """Return the parser format for a Content-Type header, or None if unsupported"""
+    if not content_type:
+        return None
+    return INGEST_FORMATS.get(content_type.split(";")[0].strip().lower())
+
+
+class _TripleSink:
+    def __init__(self):
+        self.triples: List[Triple] = []
+
+    def triple(self, s: Node, p: Node, o: Node) -> None:
+        self.triples.append((s, p, o))
+
+
+class NTriplesChunkParser:
+    """Parse N-Triples from arbitrary byte chunks, one complete line batch at a time
+
+    Blank node labels are resolved through one shared context, so ``_:b1``
+    names the same node in every batch of the same request.
+    """
+
+    def __init__(self):
+        self._sink = _TripleSink()
+        self._parser = W3CNTriplesParser(self._sink)
+        self._bnodes: Dict[str, Node] = {}
+        self._pending = b""
+
+    def feed(self, chunk: bytes) -> None:
+        data = self._pending + chunk
+        cut = data.rfind(b"\n") + 1
+        self._pending = data[cut:]
+        if cut:
+            self._parse(data[:cut])
+
+    def close(self) -> List[Triple]:
+        if self._pending.strip():
+            self._parse(self._pending)
+        self._pending = b""
+        return self._sink.triples
+
+    def _parse(self, data: bytes) -> None:
+        try:
+            self._parser.parse(io.BytesIO(data), bnode_context=self._bnodes)
+        except Exception as e:
+            raise InvalidTriplesError(f"Invalid N-Triples: {str(e)}")
+
+
+def parse_document(data: bytes, format_name: str) -> List[Triple]:
+    """Parse a complete RDF document into a list of triples"""
+    graph = Graph()
+    try:
+        graph.parse(data=data, format=format_name)
+    except Exception as e:
+        raise InvalidTriplesError(f"Invalid {format_name} document: {str(e)}")
+    return list(graph)
+
+
+async def read_triples(chunks: AsyncIterator[bytes], format_name: str) -> List[Triple]:
+    """Read a request body and parse it, off the event loop, into triples"""
+    if format_name != "nt":
+        body = b"".join([chunk async for chunk in chunks])
+        return await asyncio.to_thread(parse_document, body, format_name)
+
+    parser = NTriplesChunkParser()
+    buffer: List[bytes] = []
+    size = 0
+    async for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= PARSE_CHUNK_BYTES:
+            await asyncio.to_thread(parser.feed, b"".join(buffer))
+            buffer, size = [], 0
+    if buffer:
+        await asyncio.to_thread(parser.feed, b"".join(buffer))
+    return await asyncio.to_thread(parser.close)
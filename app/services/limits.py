@@ -0,0 +1,72 @@
+"""
+Wall-clock deadlines and cancellation for SPARQL evaluation.
+
+rdflib evaluates a query as nested Python generators on a worker thread,
+which cannot be interrupted from outside. Instead, an evaluation hook wraps
+every basic graph pattern so the solutions it produces check the deadline
+and cancellation flag of the query running on the current thread, and abort
+it with an exception once either trips.
+"""
+
+from contextlib import contextmanager
+import threading
+import time
+from typing import Any, Callable, Iterator, Optional
+
+from rdflib.plugins.sparql.parserutils import CompValue
+from rdflib.plugins.sparql.sparql import QueryContext
+
+from app.services.hooks import register_hook
+
+# Solutions produced between two deadline checks
+CHECK_INTERVAL = 64
+
+_active = threading.local()
+
+
+class QueryTimeoutError(Exception):
+    """Raised inside a query that ran past its deadline"""
+
+
+class QueryCancelledError(Exception):
+    """Raised inside a query whose caller has gone away"""
+
+
+@contextmanager
+def query_deadline(deadline: Optional[float], cancelled: Optional[threading.Event] = None):
+    """Guard the query evaluated on this thread with a monotonic deadline and/or a cancel flag"""
+    previous = getattr(_active, "guard", None)
+    _active.guard = (deadline, cancelled) if deadline is not None or cancelled is not None else None
+    try:
+        yield
+    finally:
+        _active.guard = previous
+
+
+def check_deadline() -> None:
+    """Raise if the query running on this thread timed out or was cancelled"""
+    guard = getattr(_active, "guard", None)
+    if guard is None:
+        return
+    deadline, cancelled = guard
+    if cancelled is not None and cancelled.is_set():
+        raise QueryCancelledError("Query was cancelled")
+    if deadline is not None and time.monotonic() > deadline:
+        raise QueryTimeoutError("Query exceeded its time limit")
+
+
+def _checked(solutions: Iterator) -> Iterator:
+    for count, solution in enumerate(solutions):
+        if not count % CHECK_INTERVAL:
+            check_deadline()
+        yield solution
+
+
+def _evaluate_with_deadline(ctx: QueryContext, part: CompValue, evaluate: Callable[[], Any]):
+    if part.name != "BGP" or getattr(_active, "guard", None) is None:
+        raise NotImplementedError()
+    check_deadline()
+    return _checked(evaluate())
+
+
+register_hook("deadline", _evaluate_with_deadline)
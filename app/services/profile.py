@@ -0,0 +1,215 @@
+"""
+Per-operator profiles of SPARQL query evaluation.
+
+While a profiler is active on a thread, every algebra operator rdflib
+evaluates there is timed and its solutions are counted. Basic graph patterns
+are evaluated by an instrumented copy of rdflib's evalBGP, so each triple
+pattern, property paths such as ``brick:hasPart*`` included, gets its own
+lookup count, match count and time.
+"""
+
+from contextlib import contextmanager
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional
+
+from rdflib.namespace import NamespaceManager
+from rdflib.plugins.sparql.parserutils import CompValue
+from rdflib.plugins.sparql.sparql import AlreadyBound, QueryContext
+
+from app.services.hooks import register_hook
+from app.services.limits import check_deadline
+
+_local = threading.local()
+
+
+class OperatorStats:
+    """Counters for one algebra operator, summed over every time it is evaluated"""
+
+    def __init__(self):
+        self.calls = 0
+        self.solutions = 0
+        self.seconds = 0.0
+
+
+class PatternStats:
+    """Counters for one triple pattern of a basic graph pattern"""
+
+    def __init__(self):
+        self.lookups = 0
+        self.matches = 0
+        self.seconds = 0.0
+
+
+class QueryProfiler:
+    """Collect operator statistics for the queries evaluated on one thread"""
+
+    def __init__(self):
+        self.root: Optional[CompValue] = None
+        self._operators: Dict[int, OperatorStats] = {}
+        self._patterns: Dict[int, List[PatternStats]] = {}
+
+    def evaluate(self, ctx: QueryContext, part: CompValue, evaluate: Callable[[], Any]) -> Any:
+        if self.root is None:
+            self.root = part
+        stats = self._operators.setdefault(id(part), OperatorStats())
+        stats.calls += 1
+        started = time.perf_counter()
+        try:
+            if part.name == "BGP":
+                result = self._evaluate_bgp(ctx, part)
+            else:
+                result = evaluate()
+        finally:
+            stats.seconds += time.perf_counter() - started
+        # Query forms return a dict of results rather than solutions
+        if isinstance(result, Mapping) or not isinstance(result, Iterable):
+            return result
+        return self._counted(result, stats)
+
+    def _counted(self, solutions: Iterable, stats: OperatorStats) -> Iterator:
+        iterator = iter(solutions)
+        while True:
+            started = time.perf_counter()
+            try:
+                solution = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                stats.seconds += time.perf_counter() - started
+            stats.solutions += 1
+            yield solution
+
+    def _evaluate_bgp(self, ctx: QueryContext, part: CompValue) -> Iterator:
+        patterns = self._patterns.setdefault(id(part), [PatternStats() for _ in part.triples])
+        # Same pattern order as rdflib: most bound patterns first
+        order = sorted(
+            range(len(part.triples)),
+            key=lambda i: len([n for n in part.triples[i] if ctx[n] is None])
+        )
+        return _profiled_bgp(ctx, [part.triples[i] for i in order], [patterns[i] for i in order])
+
+    def report(self, namespace_manager: Optional[NamespaceManager] = None) -> Optional[Dict]:
+        """Return the profiled algebra tree, with timings in milliseconds"""
+        if self.root is None:
+            return None
+        return self._report(self.root, namespace_manager)
+
+    def _report(self, part: CompValue, namespace_manager: Optional[NamespaceManager], via: Optional[str] = None) -> Dict:
+        stats = self._operators.get(id(part), OperatorStats())
+        node = {
+            "operator": part.name,
+            "calls": stats.calls,
+            "solutions": stats.solutions,
+            "time_ms": _ms(stats.seconds),
+        }
+        if via is not None:
+            node["via"] = via
+        if part.name == "BGP":
+            patterns = self._patterns.get(id(part)) or [PatternStats() for _ in part.triples]
+            node["patterns"] = [
+                {
+                    "pattern": " ".join(term.n3(namespace_manager) for term in triple),
+                    "lookups": pattern.lookups,
+                    "matches": pattern.matches,
+                    "time_ms": _ms(pattern.seconds),
+                }
+                for triple, pattern in zip(part.triples, patterns)
+            ]
+
+        children = [self._report(child, namespace_manager) for child in _children(part)]
+        children += [
+            self._report(graph, namespace_manager, via=name)
+            for name, graph in _exists_patterns(part.expr)
+        ]
+        if children:
+            node["children"] = children
+            node["self_ms"] = _ms(max(stats.seconds - sum(_seconds(child) for child in children), 0))
+        return node
+
+
+def _profiled_bgp(ctx: QueryContext, triples: List, patterns: List[PatternStats]) -> Iterator:
+    """rdflib's evalBGP, with the lookups and matches of each pattern counted and timed"""
+    if not triples:
+        yield ctx.solution()
+        return
+
+    s, p, o = triples[0]
+    stats = patterns[0]
+    _s, _p, _o = ctx[s], ctx[p], ctx[o]
+    check_deadline()
+    stats.lookups += 1
+    matches = iter(ctx.graph.triples((_s, _p, _o)))
+    while True:
+        started = time.perf_counter()
+        try:
+            ss, sp, so = next(matches)
+        except StopIteration:
+            return
+        finally:
+            stats.seconds += time.perf_counter() - started
+        stats.matches += 1
+
+        c = ctx.push() if None in (_s, _p, _o) else ctx
+        if _s is None:
+            c[s] = ss
+        try:
+            if _p is None:
+                c[p] = sp
+        except AlreadyBound:
+            continue
+        try:
+            if _o is None:
+                c[o] = so
+        except AlreadyBound:
+            continue
+
+        yield from _profiled_bgp(c, triples[1:], patterns[1:])
+
+
+def _children(part: CompValue) -> List[CompValue]:
+    return [child for child in (part.p, part.p1, part.p2) if isinstance(child, CompValue)]
+
+
+def _exists_patterns(expr: Any) -> Iterator:
+    """Yield (kind, graph pattern) for each EXISTS / NOT EXISTS inside an expression"""
+    if isinstance(expr, CompValue):
+        if expr.name in ("Builtin_EXISTS", "Builtin_NOTEXISTS") and isinstance(expr.graph, CompValue):
+            yield "EXISTS" if expr.name == "Builtin_EXISTS" else "NOT EXISTS", expr.graph
+            return
+        values = expr.values()
+    elif isinstance(expr, (list, tuple)):
+        values = expr
+    else:
+        return
+    for value in values:
+        yield from _exists_patterns(value)
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def _seconds(node: Dict) -> float:
+    return node["time_ms"] / 1000
+
+
+@contextmanager
+def profile_queries():
+    """Profile the queries evaluated on this thread inside the ``with`` block"""
+    previous = getattr(_local, "profiler", None)
+    profiler = _local.profiler = QueryProfiler()
+    try:
+        yield profiler
+    finally:
+        _local.profiler = previous
+
+
+def _evaluate_with_profile(ctx: QueryContext, part: CompValue, evaluate: Callable[[], Any]):
+    profiler = getattr(_local, "profiler", None)
+    if profiler is None:
+        raise NotImplementedError()
+    return profiler.evaluate(ctx, part, evaluate)
+
+
+register_hook("profile", _evaluate_with_profile)
@@ -0,0 +1,23 @@
+"""JSON encoding for listing responses built from plain rows.
+
+Routes that return already-encoded bodies skip FastAPI's per-item
+validation and serialization through the response model. orjson, from
+requirements.txt, does the encoding; if it is missing the standard library
+encoder produces the same bytes FastAPI's JSONResponse would, more slowly.
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # listed in requirements.txt, but the app still runs without it
+    orjson = None
+    print("orjson is not installed; encoding JSON responses with the slower standard library json")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode JSON-compatible content (dicts, lists, strings, numbers, None) as compact UTF-8"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
@@ -0,0 +1,135 @@
+"""
+Binary snapshots of the parsed Brick graph.
+
+A snapshot stores every triple as three integer IDs into a shared term table,
+grouped by the named graph the triples belong to. It is keyed by a hash of
+the brickschema version and the content of every input file, so editing any
+TTL file invalidates it automatically.
+"""
+
+from array import array
+import glob
+import hashlib
+import os
+import pickle
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from rdflib import Dataset, Graph, URIRef
+from rdflib.term import Node
+
+SNAPSHOT_FORMAT_VERSION = 2
+SNAPSHOT_PREFIX = "graph-"
+SNAPSHOT_SUFFIX = ".snapshot"
+
+Triple = Tuple[Node, Node, Node]
+
+
+class TripleEncoder:
+    """Dictionary-encode triples into a shared term table and flat int arrays"""
+
+    def __init__(self):
+        self._ids: Dict[Node, int] = {}
+        self.terms: List[Node] = []
+
+    def encode(self, triples: Iterable[Triple]) -> array:
+        ids = array("i")
+        append = ids.append
+        lookup = self._ids
+        for triple in triples:
+            for term in triple:
+                term_id = lookup.get(term)
+                if term_id is None:
+                    term_id = lookup[term] = len(self.terms)
+                    self.terms.append(term)
+                append(term_id)
+        return ids
+
+
+def decode_triples(terms: List[Node], ids: array) -> Iterator[Triple]:
+    """Expand a flat ID array back into rdflib triples"""
+    it = iter(ids)
+    for s, p, o in zip(it, it, it):
+        yield terms[s], terms[p], terms[o]
+
+
+def compute_snapshot_key(files: List[str], *extra: str) -> str:
+    """Hash the content of every input file, plus any extra version strings"""
+    digest = hashlib.sha256()
+    digest.update(str(SNAPSHOT_FORMAT_VERSION).encode())
+    for value in extra:
+        digest.update(value.encode())
+    for path in files:
+        digest.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def snapshot_path(snapshot_dir: str, key: str) -> str:
+    return os.path.join(snapshot_dir, f"{SNAPSHOT_PREFIX}{key[:32]}{SNAPSHOT_SUFFIX}")
+
+
+def write_snapshot(
+    snapshot_dir: str,
+    key: str,
+    sources: Dict[str, Graph],
+    namespaces: Iterable[Tuple[str, str]],
+) -> str:
+    """Write the triples of each named graph to a snapshot file.
+
+    The file is written to a temporary name and renamed into place, and any
+    snapshot with a different key is removed afterwards.
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    encoder = TripleEncoder()
+    sections = {name: encoder.encode(graph) for name, graph in sources.items()}
+    payload = {
+        "version": SNAPSHOT_FORMAT_VERSION,
+        "key": key,
+        "terms": encoder.terms,
+        "sections": sections,
+        "namespaces": [(prefix, str(uri)) for prefix, uri in namespaces],
+    }
+
+    path = snapshot_path(snapshot_dir, key)
+    fd, tmp_path = tempfile.mkstemp(dir=snapshot_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    for stale in glob.glob(os.path.join(snapshot_dir, f"{SNAPSHOT_PREFIX}*{SNAPSHOT_SUFFIX}")):
+        if stale != path:
+            os.unlink(stale)
+    return path
+
+
+def read_snapshot(snapshot_dir: str, key: str) -> Optional[Dict]:
+    """Return the snapshot payload for ``key``, or None if there is no valid one"""
+    path = snapshot_path(snapshot_dir, key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            payload = pickle.load(f)
+    except Exception as e:
+        print(f"Ignoring unreadable graph snapshot {path}: {str(e)}")
+        return None
+    if payload.get("version") != SNAPSHOT_FORMAT_VERSION or payload.get("key") != key:
+        return None
+    return payload
+
+
+def load_snapshot_into(dataset: Dataset, payload: Dict) -> None:
+    """Bulk-add every section of a snapshot payload into its named graph of ``dataset``"""
+    for prefix, uri in payload["namespaces"]:
+        dataset.bind(prefix, uri, override=True)
+    terms = payload["terms"]
+    for name, ids in payload["sections"].items():
+        graph = dataset.graph(URIRef(name))
+        graph.addN((s, p, o, graph) for s, p, o in decode_triples(terms, ids))
@@ -0,0 +1,195 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, Dict, List, Mapping, Optional, Tuple
+
+from rdflib import BNode, Literal, URIRef
+from rdflib.term import Node, Variable
+
+# format name -> media type, in server preference order
+STREAM_FORMATS: Dict[str, str] = {
+    "ndjson": "application/x-ndjson",
+    "json": "application/sparql-results+json",
+    "csv": "text/csv",
+    "tsv": "text/tab-separated-values",
+}
+
+
+def negotiate_format(accept: Optional[str], requested: Optional[str] = None) -> Optional[str]:
+    """Pick a stream format from an explicit name or an Accept header.
+
+    Returns None when nothing acceptable is on offer.
+    """
+    if requested:
+        return requested if requested in STREAM_FORMATS else None
+    if not accept:
+        return "ndjson"
+
+    by_media_type = {media_type: name for name, media_type in STREAM_FORMATS.items()}
+    candidates: List[Tuple[float, int, str]] = []
+    for position, part in enumerate(accept.split(",")):
+        media_type, *params = [piece.strip() for piece in part.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            candidates.append((-quality, position, media_type.lower()))
+
+    for _, _, media_type in sorted(candidates):
+        if media_type in by_media_type:
+            return by_media_type[media_type]
+        if media_type in ("*/*", "application/*"):
+            return "ndjson"
+        if media_type == "text/*":
+            return "csv"
+    return None
+
+
+class ResultEncoder:
+    """Turn a stream of solution batches into text chunks of one result format"""
+
+    def begin(self, variables: List[Variable]) -> str:
+        return ""
+
+    def rows(self, variables: List[Variable], batch: List[Mapping[Variable, Node]]) -> str:
+        raise NotImplementedError
+
+    def end(self) -> str:
+        return ""
+
+    def boolean(self, answer: bool) -> str:
+        raise NotImplementedError
+
+
+class NDJSONEncoder(ResultEncoder):
+    """One JSON object per line, shaped like the non-streaming query rows"""
+
+    def rows(self, variables, batch):
+        return "".join(
+            json.dumps({
+                str(var): str(row[var]) if row.get(var) is not None else None
+                for var in variables
+            }) + "\n"
+            for row in batch
+        )
+
+    def boolean(self, answer):
+        return json.dumps({"result": answer}) + "\n"
+
+
+def _sparql_json_term(term: Node) -> Dict[str, str]:
+    if isinstance(term, URIRef):
+        return {"type": "uri", "value": str(term)}
+    if isinstance(term, BNode):
+        return {"type": "bnode", "value": str(term)}
+    encoded = {"type": "literal", "value": str(term)}
+    if isinstance(term, Literal):
+        if term.language:
+            encoded["xml:lang"] = term.language
+        elif term.datatype:
+            encoded["datatype"] = str(term.datatype)
+    return encoded
+
+
+class SPARQLJSONEncoder(ResultEncoder):
+    """W3C SPARQL 1.1 Query Results JSON Format"""
+
+    def __init__(self):
+        self._first = True
+
+    def begin(self, variables):
+        head = json.dumps({"vars": [str(var) for var in variables]})
+        return f'{{"head": {head}, "results": {{"bindings": ['
+
+    def rows(self, variables, batch):
+        chunks = []
+        for row in batch:
+            solution = {
+                str(var): _sparql_json_term(row[var])
+                for var in variables if row.get(var) is not None
+            }
+            chunks.append(("" if self._first else ",") + json.dumps(solution))
+            self._first = False
+        return "".join(chunks)
+
+    def end(self):
+        return "]}}"
+
+    def boolean(self, answer):
+        return json.dumps({"head": {}, "boolean": answer})
+
+
+class CSVEncoder(ResultEncoder):
+    """W3C SPARQL 1.1 CSV results: plain lexical values"""
+
+    def _write(self, rows: List[List[str]]) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue()
+
+    def begin(self, variables):
+        return self._write([[str(var) for var in variables]])
+
+    def rows(self, variables, batch):
+        return self._write([
+            [str(row[var]) if row.get(var) is not None else "" for var in variables]
+            for row in batch
+        ])
+
+    def boolean(self, answer):
+        return self._write([["result"], [str(answer).lower()]])
+
+
+class TSVEncoder(ResultEncoder):
+    """W3C SPARQL 1.1 TSV results: terms in N-Triples syntax"""
+
+    def begin(self, variables):
+        return "\t".join(f"?{var}" for var in variables) + "\n"
+
+    def rows(self, variables, batch):
+        return "".join(
+            "\t".join(row[var].n3() if row.get(var) is not None else "" for var in variables) + "\n"
+            for row in batch
+        )
+
+    def boolean(self, answer):
+        return f"?result\n{str(answer).lower()}\n"
+
+
+ENCODERS = {
+    "ndjson": NDJSONEncoder,
+    "json": SPARQLJSONEncoder,
+    "csv": CSVEncoder,
+    "tsv": TSVEncoder,
+}
+
+
+class QueryStream:
+    """An evaluated-on-demand query result: either a boolean or batches of rows"""
+
+    def __init__(
+        self,
+        variables: List[Variable],
+        batches: Optional[AsyncIterator[List[Mapping[Variable, Node]]]] = None,
+        answer: Optional[bool] = None,
+    ):
+        self.variables = variables
+        self.batches = batches
+        self.answer = answer
+
+
+async def encode_stream(stream: QueryStream, format_name: str) -> AsyncIterator[bytes]:
+    """Yield the encoded chunks of a query stream"""
+    encoder = ENCODERS[format_name]()
+    if stream.batches is None:
+        yield encoder.boolean(bool(stream.answer)).encode()
+        return
+
+    yield encoder.begin(stream.variables).encode()
+    async for batch in stream.batches:
+        yield encoder.rows(stream.variables, batch).encode()
+    yield encoder.end().encode()
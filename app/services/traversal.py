@@ -0,0 +1,384 @@
+"""
+Transitive traversal of Brick relationships over compressed sparse rows.
+
+Every node taking part in brick:hasPart, brick:isPartOf, brick:feeds or
+brick:isFedBy gets an integer ID, and each predicate is kept as two CSR
+adjacencies (forward and reverse): an offsets array and a targets array, so
+the neighbours of a node are one array slice. Breadth-first search is a
+plain Python loop over the frontier, one level at a time, that reads each
+node's slice of the CSR arrays instead of making an rdflib graph lookup. It
+can stop at a depth limit.
+
+``TraversalIndex.path_pairs`` answers SPARQL property paths such as
+``brick:hasPart+`` or ``^brick:feeds*`` with the same solutions as rdflib,
+and ``TopologyIndex`` walks the HVAC feed graph upstream and downstream.
+"""
+
+from array import array
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from rdflib import Graph, URIRef
+from rdflib.namespace import RDF
+from rdflib.paths import InvPath, MulPath
+from rdflib.term import Node
+
+from app.services.indexes import BRICK, ClassIndex
+
+# Each relationship and its inverse; following one forward is the same as
+# following the other backward
+INVERSES = {
+    BRICK.hasPart: BRICK.isPartOf,
+    BRICK.isPartOf: BRICK.hasPart,
+    BRICK.feeds: BRICK.isFedBy,
+    BRICK.isFedBy: BRICK.feeds,
+}
+PREDICATES = tuple(INVERSES)
+
+# Closures kept for property path evaluation
+CLOSURE_CACHE_SIZE = 1024
+
+
+class Adjacency:
+    """One direction of one predicate as compressed sparse rows over node IDs"""
+
+    def __init__(self, offsets: array, targets: array):
+        self.offsets = offsets
+        self.targets = targets
+
+    @classmethod
+    def from_edges(cls, node_count: int, sources: array, targets: array) -> "Adjacency":
+        """Bucket (source, target) ID pairs by source with a counting sort"""
+        offsets = array("q", bytes(8 * (node_count + 1)))
+        for source in sources:
+            offsets[source + 1] += 1
+        for node in range(node_count):
+            offsets[node + 1] += offsets[node]
+        position = array("q", offsets[:-1])
+        ordered = array("i", bytes(4 * len(targets)))
+        for source, target in zip(sources, targets):
+            ordered[position[source]] = target
+            position[source] += 1
+        return cls(offsets, ordered)
+
+    def __len__(self) -> int:
+        return len(self.targets)
+
+    def neighbors(self, node: int) -> array:
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    def expand(self, frontier: Iterable[int]) -> array:
+        """Return the neighbours of every node in ``frontier``, duplicates included
+
+        One slice of the targets array per frontier node, looped over in Python.
+        """
+        offsets, targets = self.offsets, self.targets
+        reached = array("i")
+        for node in frontier:
+            start, end = offsets[node], offsets[node + 1]
+            if start != end:
+                reached.extend(targets[start:end])
+        return reached
+
+
+class TraversalIndex:
+    """CSR adjacencies for the transitive Brick relationships of a graph"""
+
+    def __init__(self, nodes: List[Node], edges: Dict[URIRef, Tuple[array, array]]):
+        self._nodes = nodes
+        self._ids = {node: node_id for node_id, node in enumerate(nodes)}
+        self._forward: Dict[URIRef, Adjacency] = {}
+        self._reverse: Dict[URIRef, Adjacency] = {}
+        for predicate in PREDICATES:
+            sources, targets = edges.get(predicate, (array("i"), array("i")))
+            self._forward[predicate] = Adjacency.from_edges(len(nodes), sources, targets)
+            self._reverse[predicate] = Adjacency.from_edges(len(nodes), targets, sources)
+        # Property paths with both ends bound ask about the same start node
+        # once per candidate row, so its closure is kept
+        self._closure = lru_cache(maxsize=CLOSURE_CACHE_SIZE)(self._reachable)
+
+    @classmethod
+    def from_graph(cls, graph: Graph) -> "TraversalIndex":
+        """Read every hasPart, isPartOf, feeds and isFedBy triple of a graph"""
+        ids: Dict[Node, int] = {}
+        nodes: List[Node] = []
+        edges: Dict[URIRef, Tuple[array, array]] = defaultdict(lambda: (array("i"), array("i")))
+        for predicate in PREDICATES:
+            sources, targets = edges[predicate]
+            for subject, obj in graph.subject_objects(predicate):
+                for node, column in ((subject, sources), (obj, targets)):
+                    node_id = ids.get(node)
+                    if node_id is None:
+                        node_id = ids[node] = len(nodes)
+                        nodes.append(node)
+                    column.append(node_id)
+        return cls(nodes, edges)
+
+    def updated(self, graph: Graph, predicates: Iterable[URIRef]) -> "TraversalIndex":
+        """Return an index reflecting ``graph`` if any changed predicate is one of ours
+
+        CSR arrays are not edited in place, so a relevant change rebuilds the
+        index; reading four predicates is cheap next to the other indexes.
+        """
+        if any(predicate in INVERSES for predicate in predicates):
+            return TraversalIndex.from_graph(graph)
+        return self
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, node: Node) -> bool:
+        return node in self._ids
+
+    def nodes(self) -> List[Node]:
+        """Every node, indexed by its ID"""
+        return self._nodes
+
+    def node_id(self, node: Node) -> Optional[int]:
+        return self._ids.get(node)
+
+    def adjacency(self, predicate: URIRef, reverse: bool = False) -> Adjacency:
+        return (self._reverse if reverse else self._forward)[predicate]
+
+    def edge_count(self, predicate: URIRef) -> int:
+        return len(self._forward[predicate])
+
+    def levels(
+        self,
+        starts: Iterable[Node],
+        steps: Sequence[Adjacency],
+        max_depth: Optional[int] = None,
+    ) -> Iterator[List[int]]:
+        """CSR-backed breadth-first search from ``starts`` over ``steps``, one list of new node IDs per depth
+
+        A node is reported once, at the first depth it is reached; the start
+        nodes themselves are only reported if reached again through a cycle.
+        """
+        frontier = [self._ids[node] for node in starts if node in self._ids]
+        seen: Set[int] = set()
+        depth = 0
+        while frontier and (max_depth is None or depth < max_depth):
+            reached = set()
+            for adjacency in steps:
+                reached.update(adjacency.expand(frontier))
+            reached.difference_update(seen)
+            if not reached:
+                return
+            seen |= reached
+            frontier = sorted(reached)
+            depth += 1
+            yield frontier
+
+    def descendants(
+        self,
+        node: Node,
+        predicate: URIRef = BRICK.hasPart,
+        max_depth: Optional[int] = None,
+    ) -> List[Node]:
+        """Nodes reachable from ``node`` along ``predicate`` (or against its inverse), nearest first"""
+        return self._flatten(self.levels((node,), self._steps(predicate), max_depth), node)
+
+    def ancestors(
+        self,
+        node: Node,
+        predicate: URIRef = BRICK.hasPart,
+        max_depth: Optional[int] = None,
+    ) -> List[Node]:
+        """Nodes that reach ``node`` along ``predicate`` (or against its inverse), nearest first"""
+        return self._flatten(self.levels((node,), self._steps(INVERSES[predicate]), max_depth), node)
+
+    def depths(
+        self,
+        node: Node,
+        predicate: URIRef = BRICK.hasPart,
+        max_depth: Optional[int] = None,
+    ) -> Dict[Node, int]:
+        """Map every node reachable from ``node`` along ``predicate`` to its distance"""
+        nodes = self._nodes
+        return {
+            nodes[node_id]: depth
+            for depth, level in enumerate(self.levels((node,), self._steps(predicate), max_depth), 1)
+            for node_id in level
+            if nodes[node_id] != node
+        }
+
+    def neighbors(self, node: Node, predicate: URIRef) -> List[Node]:
+        """Direct neighbours of ``node`` along ``predicate`` (or against its inverse)"""
+        return self._flatten(self.levels((node,), self._steps(predicate), 1), node)
+
+    def path_pairs(self, path: MulPath, subject: Optional[Node], obj: Optional[Node]) -> Optional[List[Tuple[Node, Node]]]:
+        """Solve ``subject path obj`` for ``p*``, ``p+`` and ``^p*`` style paths
+
+        Returns None when the path or the pattern is not one this index
+        covers, so the caller can fall back to rdflib: other predicates,
+        nested paths, ``p?``, or neither end bound.
+        """
+        predicate, inverse = path.path, False
+        if isinstance(predicate, InvPath):
+            predicate, inverse = predicate.arg, True
+        if predicate not in INVERSES or path.mod == "?" or (subject is None and obj is None):
+            return None
+
+        forward = subject is not None
+        start = subject if forward else obj
+        reachable = self._closure(start, predicate, forward == inverse)
+        if subject is not None and obj is not None:
+            if (path.zero and subject == obj) or obj in reachable:
+                return [(subject, obj)]
+            return []
+
+        pairs = [(start, start)] if path.zero else []
+        for node in reachable:
+            if node == start and path.zero:
+                continue
+            pairs.append((subject, node) if forward else (node, obj))
+        return pairs
+
+    def _reachable(self, start: Node, predicate: URIRef, reverse: bool) -> FrozenSet[Node]:
+        """Every node reachable from ``start`` over one predicate, in one direction"""
+        adjacency = self.adjacency(predicate, reverse)
+        nodes = self._nodes
+        return frozenset(nodes[node_id] for level in self.levels((start,), (adjacency,)) for node_id in level)
+
+    def _steps(self, predicate: URIRef) -> Tuple[Adjacency, Adjacency]:
+        return self._forward[predicate], self._reverse[INVERSES[predicate]]
+
+    def _flatten(self, levels: Iterable[List[int]], exclude: Node) -> List[Node]:
+        nodes = self._nodes
+        return [nodes[node_id] for level in levels for node_id in level if nodes[node_id] != exclude]
+
+
+class TopologyEntry(NamedTuple):
+    """A node reached by a topology walk, its distance and the nodes one link closer that reach it"""
+    node: Node
+    depth: int
+    via: List[Node]
+
+
+class TopologyIndex:
+    """The HVAC feed graph: feeds / isFedBy links plus the parts of equipment and zones.
+
+    Built over the traversal index, with the most specific Brick class of
+    every node on it, so an upstream or downstream walk never reads the
+    graph. Containment only counts where the container is equipment or a
+    zone: a zone's rooms and a VAV's damper are downstream of whatever feeds
+    them, but the floor or building around them is not.
+    """
+
+    def __init__(self, traversal: TraversalIndex, types: Dict[Node, URIRef], containers: FrozenSet[Node]):
+        self._traversal = traversal
+        self._types = types
+        self._containers = frozenset(
+            node_id for node_id in map(traversal.node_id, containers) if node_id is not None
+        )
+
+    @classmethod
+    def from_graph(cls, graph: Graph, class_index: ClassIndex, traversal: TraversalIndex) -> "TopologyIndex":
+        """Type every node of the traversal index from its rdf:type triples"""
+        return cls._typed(graph, class_index, traversal, {}, traversal.nodes())
+
+    @classmethod
+    def _typed(
+        cls,
+        graph: Graph,
+        class_index: ClassIndex,
+        traversal: TraversalIndex,
+        known: Dict[Node, URIRef],
+        retype: Iterable[Node],
+    ) -> "TopologyIndex":
+        types = {node: known[node] for node in traversal.nodes() if node in known}
+        for node in retype:
+            if node in traversal:
+                _assign_type(types, node, class_index.most_specific(graph.objects(node, RDF.type)))
+        zones = class_index.descendants(BRICK.Zone)
+        containers = frozenset(
+            node for node, cls_ in types.items() if cls_ in zones or class_index.is_equipment(cls_)
+        )
+        return cls(traversal, types, containers)
+
+    def updated(
+        self,
+        graph: Graph,
+        class_index: ClassIndex,
+        traversal: TraversalIndex,
+        typed: Iterable[URIRef],
+    ) -> "TopologyIndex":
+        """Return an index over ``traversal`` with the classes of ``typed`` nodes re-read
+
+        Nodes that are new to the traversal index are typed as well; every
+        other type is carried over.
+        """
+        retype = {node for node in typed if node in traversal}
+        if traversal is not self._traversal:
+            retype.update(node for node in traversal.nodes() if node not in self._traversal)
+        elif not retype:
+            return self
+        return TopologyIndex._typed(graph, class_index, traversal, self._types, retype)
+
+    def __len__(self) -> int:
+        return len(self._types)
+
+    def __contains__(self, node: Node) -> bool:
+        return node in self._traversal
+
+    def type_of(self, node: Node) -> Optional[URIRef]:
+        return self._types.get(node)
+
+    def downstream(self, node: Node, max_depth: Optional[int] = None) -> List[TopologyEntry]:
+        """Everything ``node`` feeds, transitively, with the parts of fed equipment and zones"""
+        return self._walk(node, True, max_depth)
+
+    def upstream(self, node: Node, max_depth: Optional[int] = None) -> List[TopologyEntry]:
+        """Everything that feeds ``node``, transitively, through the equipment or zones holding it"""
+        return self._walk(node, False, max_depth)
+
+    def _walk(self, node: Node, downstream: bool, max_depth: Optional[int]) -> List[TopologyEntry]:
+        traversal = self._traversal
+        start = traversal.node_id(node)
+        if start is None:
+            return []
+        feeds = (
+            traversal.adjacency(BRICK.feeds, reverse=not downstream),
+            traversal.adjacency(BRICK.isFedBy, reverse=downstream),
+        )
+        parts = (
+            traversal.adjacency(BRICK.hasPart, reverse=not downstream),
+            traversal.adjacency(BRICK.isPartOf, reverse=downstream),
+        )
+        containers = self._containers
+        nodes = traversal.nodes()
+
+        entries = [TopologyEntry(node, 0, [])]
+        seen = {start}
+        frontier = [start]
+        depth = 0
+        while frontier and (max_depth is None or depth < max_depth):
+            depth += 1
+            links: Dict[int, Dict[int, None]] = {}
+            for current in frontier:
+                for adjacency in feeds:
+                    for target in adjacency.neighbors(current):
+                        if target not in seen:
+                            links.setdefault(target, {})[current] = None
+                # Downstream the container is the current node, upstream the one reached
+                if downstream and current not in containers:
+                    continue
+                for adjacency in parts:
+                    for target in adjacency.neighbors(current):
+                        if target not in seen and (downstream or target in containers):
+                            links.setdefault(target, {})[current] = None
+            frontier = sorted(links)
+            seen.update(frontier)
+            entries.extend(
+                TopologyEntry(nodes[target], depth, [nodes[source] for source in links[target]])
+                for target in frontier
+            )
+        return entries
+
+
+def _assign_type(types: Dict[Node, URIRef], node: Node, classes: List[URIRef]) -> None:
+    if classes:
+        types[node] = classes[0]
+    else:
+        types.pop(node, None)
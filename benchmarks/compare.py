@@ -0,0 +1,81 @@
+"""
+Compare two benchmark reports and flag regressions.
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 0.1
+
+Every metric the two reports share for the same portfolio size and graph
+store is compared.
+A metric regresses when the candidate is worse by more than ``threshold``
+(relative) and by more than ``--min-ms`` for latencies, so sub-millisecond
+noise is not reported. Exits with status 1 if anything regressed.
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, Iterator, List, Tuple
+
+# Lower is better for every metric compared here
+Metric = Tuple[str, float, str]
+
+
+def load(path: str) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def metrics(result: Dict) -> Iterator[Metric]:
+    """Yield (name, value, unit) for each comparable metric of one size"""
+    if "startup_seconds" in result:
+        yield "startup", result["startup_seconds"] * 1000, "ms"
+    for key in ("rss_bytes", "peak_rss_bytes"):
+        if key in result:
+            yield key.replace("_bytes", ""), result[key] / (1 << 20), "MiB"
+    for group, label in (("endpoints", "endpoint"), ("queries", "query")):
+        for name, summary in result.get(group, {}).items():
+            for stat in ("p50_ms", "p99_ms"):
+                yield f"{label} {name} {stat[:3]}", summary[stat], "ms"
+
+
+def compare(baseline: Dict, candidate: Dict, threshold: float, min_ms: float) -> List[str]:
+    regressions = []
+    # reports from before stores were measured separately are all memory store runs
+    runs = {(result["size"], result.get("store", "memory")): result for result in baseline["results"]}
+    for result in candidate["results"]:
+        store = result.get("store", "memory")
+        before = runs.get((result["size"], store))
+        if before is None or "error" in before or "error" in result:
+            continue
+        old = {name: value for name, value, _ in metrics(before)}
+        print(f"== {result['size']}, {store} store ({result.get('triples', '?')} triples)")
+        for name, value, unit in metrics(result):
+            if name not in old:
+                continue
+            change = (value - old[name]) / old[name] if old[name] else 0.0
+            regressed = change > threshold and (unit != "ms" or value - old[name] > min_ms)
+            flag = "  REGRESSION" if regressed else ""
+            print(f"  {name:<70} {old[name]:>12.3f} -> {value:>12.3f} {unit:<4} {change:+7.1%}{flag}")
+            if regressed:
+                regressions.append(f"{result['size']} {store}: {name} {change:+.1%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative slowdown that counts")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="Ignore latency changes smaller than this")
+    args = parser.parse_args()
+
+    regressions = compare(load(args.baseline), load(args.candidate), args.threshold, args.min_ms)
+    if regressions:
+        print(f"\n{len(regressions)} regressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
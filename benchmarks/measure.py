@@ -0,0 +1,197 @@
+"""
+Measure one portfolio in a fresh process.
+
+Run by benchmarks/run.py once per portfolio size, so startup time and memory
+are those of a process that has loaded nothing else. The settings are taken
+from the environment before the app is imported: the portfolio directory is
+loaded in place of .assets, and the query result and encoded response caches
+are disabled so repeated requests measure the work rather than a cache hit.
+``--store compact`` loads the graph into the compact store instead of
+rdflib's memory store, so the two can be compared on the same portfolio.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, List
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STORES = ("memory", "compact")
+
+# name -> SPARQL query; prefixes are those bound in the graph
+QUERIES: Dict[str, str] = {
+    "type_lookup": "SELECT ?vav WHERE { ?vav a brick:VAV }",
+    "equipment_points": """
+        SELECT ?ahu ?point WHERE { ?ahu a brick:Air_Handler_Unit ; brick:hasPoint ?point }
+    """,
+    "zone_temperature_sensors": """
+        SELECT ?vav ?zone ?sensor WHERE {
+            ?vav a brick:VAV ; brick:feeds ?zone ; brick:hasPoint ?sensor .
+            ?sensor a brick:Zone_Air_Temperature_Sensor
+        }
+    """,
+    "feeds_chain": """
+        SELECT ?ahu ?zone WHERE {
+            ?ahu a brick:Air_Handler_Unit ; brick:feeds ?vav . ?vav brick:feeds ?zone
+        }
+    """,
+    "containment_path": """
+        SELECT ?building ?room WHERE {
+            ?building a brick:Building ; brick:hasPart+ ?room . ?room a brick:Room
+        } LIMIT 1000
+    """,
+    "label_filter": """
+        SELECT ?point ?label WHERE {
+            ?point rdfs:label ?label FILTER(CONTAINS(?label, "Zone Air Temp"))
+        } LIMIT 100
+    """,
+    "count_by_class": """
+        SELECT ?class (COUNT(?s) AS ?n) WHERE { ?s a ?class } GROUP BY ?class ORDER BY DESC(?n)
+    """,
+}
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of ``samples``"""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(samples: List[float]) -> Dict:
+    """Latency summary in milliseconds"""
+    return {
+        "n": len(samples),
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 3),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+        "max_ms": round(max(samples) * 1000, 3),
+    }
+
+
+def time_calls(call: Callable[[], int], repeat: int, warmup: int) -> Dict:
+    """Time ``repeat`` calls after ``warmup`` untimed ones; ``call`` returns a status code"""
+    statuses = set()
+    for _ in range(warmup):
+        statuses.add(call())
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        statuses.add(call())
+        samples.append(time.perf_counter() - started)
+    return {**summarize(samples), "status": sorted(statuses)}
+
+
+def measure(store: str, repeat: int, warmup: int) -> Dict:
+    import resource
+
+    from app.services.brick import BrickService
+    from app.services.metrics import resident_memory_bytes
+
+    started = time.perf_counter()
+    service = BrickService()
+    startup = time.perf_counter() - started
+    rss = resident_memory_bytes()
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    client = TestClient(app)
+    buildings = client.get("/api/v1/buildings/").json()
+    building_id = buildings[0]["id"]
+    floor_id = client.get(f"/api/v1/floors/{building_id}").json()[0]["id"]
+    devices = client.get(f"/api/v1/devices/building/{building_id}", params={"limit": 1}).json()
+    device_id = devices[0]["id"] if devices else ""
+    vavs = client.post(
+        "/api/v1/query/", json={"query": "SELECT ?vav WHERE { ?vav a brick:VAV } LIMIT 1"}
+    ).json()["results"]
+    # http://buildsys.org/ontologies/{building_id}#{vav_id}
+    vav_building_id, vav_id = vavs[0]["vav"].rsplit("/", 1)[-1].split("#") if vavs else ("", "")
+
+    # name -> request; every read-only /api/v1 endpoint, with ids from the portfolio
+    endpoints = {
+        "GET /buildings": lambda: client.get("/api/v1/buildings/"),
+        "GET /floors/{building_id}": lambda: client.get(f"/api/v1/floors/{building_id}"),
+        "GET /devices/building/{building_id}": lambda: client.get(
+            f"/api/v1/devices/building/{building_id}", params={"limit": 100}
+        ),
+        "GET /devices/building/{building_id}?include_points": lambda: client.get(
+            f"/api/v1/devices/building/{building_id}", params={"limit": 100, "include_points": True}
+        ),
+        "GET /devices/floor/{building_id}/{floor_id}": lambda: client.get(
+            f"/api/v1/devices/floor/{building_id}/{floor_id}"
+        ),
+        "GET /points": lambda: client.get("/api/v1/points/", params={"limit": 100}),
+        "GET /points?type": lambda: client.get(
+            "/api/v1/points/", params={"type": "Temperature_Sensor", "limit": 100}
+        ),
+        "GET /points?building_id&device_id": lambda: client.get(
+            "/api/v1/points/", params={"building_id": building_id, "device_id": device_id}
+        ),
+        "GET /topology/{building_id}/{vav_id}/upstream": lambda: client.get(
+            f"/api/v1/topology/{vav_building_id}/{vav_id}/upstream"
+        ),
+        "GET /topology/{building_id}/{vav_id}/downstream": lambda: client.get(
+            f"/api/v1/topology/{vav_building_id}/{vav_id}/downstream"
+        ),
+        "GET /query/triples/count": lambda: client.get("/api/v1/query/triples/count"),
+        "GET /query/namespaces": lambda: client.get("/api/v1/query/namespaces"),
+        "GET /query/stats": lambda: client.get("/api/v1/query/stats"),
+    }
+
+    report = {
+        "store": store,
+        "triples": service.get_triple_count(),
+        "buildings": len(buildings),
+        "startup_seconds": round(startup, 3),
+        "rss_bytes": rss,
+        "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "endpoints": {},
+        "queries": {},
+    }
+    for name, request in endpoints.items():
+        report["endpoints"][name] = time_calls(lambda: request().status_code, repeat, warmup)
+
+    for name, query in QUERIES.items():
+        rows = []
+
+        def run_query():
+            response = client.post("/api/v1/query/", json={"query": query})
+            if response.status_code == 200:
+                rows.append(len(response.json()["results"]))
+            return response.status_code
+
+        report["queries"][name] = {**time_calls(run_query, repeat, warmup), "rows": max(rows, default=0)}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--assets", required=True, help="Directory of building files to load")
+    parser.add_argument("--output", required=True, help="Where to write the JSON report")
+    parser.add_argument("--store", choices=STORES, default="memory", help="Graph store to load into")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ.update({
+        "ASSETS_DIR": os.path.abspath(args.assets),
+        "BUILDING_FILES_GLOB": "*.ttl",
+        "QUERY_CACHE_MAX_ENTRIES": "0",
+        "RESPONSE_CACHE_MAX_ENTRIES": "0",
+        "QUERY_MAX_COST": "0",
+        "QUERY_TIMEOUT_SECONDS": "3600",
+        "GRAPH_SNAPSHOT_ENABLED": "false",
+        "GRAPH_SHARED_STORE": "false",
+        "GRAPH_COMPACT_STORE": "true" if args.store == "compact" else "false",
+    })
+    sys.path.insert(0, ROOT_DIR)
+    report = measure(args.store, args.repeat, args.warmup)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Synthetic building portfolios for benchmarks.
+
+A portfolio is a directory of building TTL files streamed to disk by
+BrickGenerator's bulk mode (examples/building_generator.py), one process per
+building. Every floor gets one AHU
+feeding a fixed number of VAVs, each with its own room and zone, so the
+number of triples grows linearly with the number of floors and a target size
+maps directly onto a floor count.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import json
+import math
+import os
+import sys
+from typing import Dict, List, Optional
+
+from rdflib.namespace import RDF
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "examples"))
+
+from building_generator import BrickGenerator  # noqa: E402
+
+PORTFOLIO_DIR = os.path.join(ROOT_DIR, ".cache", "benchmarks", "portfolios")
+MANIFEST = "portfolio.json"
+
+FLOORS_PER_BUILDING = 10
+VAVS_PER_FLOOR = 20
+# Triples generated per floor, and per building on top of its floors
+TRIPLES_PER_FLOOR = 771
+TRIPLES_PER_BUILDING = 17
+
+_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+
+
+def parse_size(size: str) -> int:
+    """Parse a triple count such as "10k", "1M" or "250000" """
+    size = size.strip().lower()
+    if size and size[-1] in _SUFFIXES:
+        return int(float(size[:-1]) * _SUFFIXES[size[-1]])
+    return int(size)
+
+
+def format_size(triples: int) -> str:
+    for suffix, factor in (("M", 1_000_000), ("k", 1_000)):
+        if triples >= factor and triples % factor == 0:
+            return f"{triples // factor}{suffix}"
+    return str(triples)
+
+
+def portfolio_layout(target_triples: int) -> List[int]:
+    """Return the floor count of each building needed to reach roughly ``target_triples``"""
+    floors = max(1, round(target_triples / TRIPLES_PER_FLOOR))
+    buildings = math.ceil(floors / FLOORS_PER_BUILDING)
+    return [
+        min(FLOORS_PER_BUILDING, floors - index * FLOORS_PER_BUILDING)
+        for index in range(buildings)
+    ]
+
+
+def generate_building(name: str, floors: int, output: Optional[str] = None) -> BrickGenerator:
+    """Generate one building with ``floors`` floors from the standard equipment templates
+
+    With ``output`` set the building is streamed to that Turtle file and the
+    generator must be closed by the caller.
+    """
+    generator = BrickGenerator(name, output=output)
+    BRICK, BUILDING = generator.BRICK, generator.BUILDING
+    # The building itself and its chiller
+    generator.create_building_system({"floors": [], "ahus": [], "chiller": True})
+    building = BUILDING[name]
+
+    for floor_number in range(1, floors + 1):
+        floor = BUILDING[f"floor{floor_number}"]
+        generator.add_triples([(floor, RDF.type, BRICK.Floor), (building, BRICK.hasPart, floor)])
+
+        ahu_id = f"{floor_number:03d}"
+        vavs = [f"VAVRM{floor_number:03d}{index:02d}" for index in range(1, VAVS_PER_FLOOR + 1)]
+        generator.g.add((floor, BRICK.hasPart, generator.create_ahu(ahu_id, vavs, "chiller")))
+        for vav_id in vavs:
+            generator.create_vav_and_room(vav_id, vav_id[len("VAVRM"):], f"AHU{ahu_id}", floor)
+            generator.g.add((floor, BRICK.hasPart, BUILDING[vav_id]))
+    return generator
+
+
+def write_building(directory: str, name: str, floors: int) -> int:
+    """Stream one building to ``directory`` and return its triple count"""
+    generator = generate_building(name, floors, os.path.join(directory, f"{name}.ttl"))
+    generator.close()
+    return len(generator.g)
+
+
+def generate_portfolio(target_triples: int, directory: Optional[str] = None,
+                       processes: Optional[int] = None) -> Dict:
+    """Generate (or reuse) a portfolio of roughly ``target_triples`` triples
+
+    Buildings are generated in parallel over ``processes`` worker processes
+    (default: one per CPU). Returns the portfolio manifest, which records the
+    directory, the number of buildings and floors and the exact triple count.
+    """
+    layout = portfolio_layout(target_triples)
+    directory = directory or os.path.join(PORTFOLIO_DIR, format_size(target_triples))
+    manifest_path = os.path.join(directory, MANIFEST)
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest.get("layout") == layout:
+            return manifest
+
+    os.makedirs(directory, exist_ok=True)
+    triples = 0
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        names = [f"bench_building_{index:05d}" for index in range(len(layout))]
+        counts = pool.map(write_building, [directory] * len(layout), names, layout, chunksize=16)
+        for index, (name, count) in enumerate(zip(names, counts)):
+            triples += count
+            if (index + 1) % 100 == 0 or index + 1 == len(layout):
+                print(f"Generated {name} ({index + 1}/{len(layout)}, {triples} triples so far)")
+
+    manifest = {
+        "directory": directory,
+        "target_triples": target_triples,
+        "layout": layout,
+        "buildings": len(layout),
+        "floors": sum(layout),
+        "triples": triples,
+    }
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
@@ -0,0 +1,125 @@
+"""
+Run the benchmark suite over synthetic portfolios of increasing size.
+
+For every size a portfolio is generated (or reused from .cache/benchmarks)
+and measured in a fresh process by benchmarks/measure.py, once per graph
+store. All reports are
+written to one JSON file, together with the git commit and library versions,
+so runs can be compared with benchmarks/compare.py.
+
+    python -m benchmarks.run --sizes 10k,100k,1M --stores memory,compact
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, Optional
+
+from benchmarks.measure import STORES
+from benchmarks.portfolio import ROOT_DIR, format_size, generate_portfolio, parse_size
+
+RESULTS_DIR = os.path.join(ROOT_DIR, "benchmarks", "results")
+DEFAULT_SIZES = "10k,100k,1M"
+DEFAULT_STORES = ",".join(STORES)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> Dict:
+    import fastapi
+    import rdflib
+
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "rdflib": rdflib.__version__,
+        "fastapi": fastapi.__version__,
+    }
+
+
+def run_size(size: str, store: str, repeat: int, warmup: int, timeout: float) -> Dict:
+    """Generate and measure one portfolio in one store; failures are recorded, not raised"""
+    target = parse_size(size)
+    started = time.perf_counter()
+    manifest = generate_portfolio(target)
+    result = {
+        "size": format_size(target),
+        "store": store,
+        "portfolio": {key: manifest[key] for key in ("buildings", "floors", "triples")},
+        "generate_seconds": round(time.perf_counter() - started, 3),
+    }
+
+    fd, output = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        subprocess.run(
+            [
+                sys.executable, "-m", "benchmarks.measure",
+                "--assets", manifest["directory"],
+                "--output", output,
+                "--store", store,
+                "--repeat", str(repeat),
+                "--warmup", str(warmup),
+            ],
+            cwd=ROOT_DIR, check=True, timeout=timeout
+        )
+        with open(output) as f:
+            result.update(json.load(f))
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+        print(f"Benchmark for {size} ({store} store) failed: {str(e)}")
+        result["error"] = str(e)
+    finally:
+        os.unlink(output)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Brick API on synthetic portfolios")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated triple counts, e.g. 10k,1M,10M")
+    parser.add_argument("--stores", default=DEFAULT_STORES, help=f"Comma-separated graph stores from {', '.join(STORES)}")
+    parser.add_argument("--repeat", type=int, default=50, help="Timed requests per endpoint and query")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed requests before timing")
+    parser.add_argument("--timeout", type=float, default=6 * 3600, help="Seconds allowed per size")
+    parser.add_argument("--output", help="Report path (default: benchmarks/results/<date>-<commit>.json)")
+    args = parser.parse_args()
+
+    env = environment()
+    report = {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "environment": env,
+        "settings": {"repeat": args.repeat, "warmup": args.warmup},
+        "results": [
+            run_size(size, store, args.repeat, args.warmup, args.timeout)
+            for size in args.sizes.split(",") if size.strip()
+            for store in args.stores.split(",") if store.strip()
+        ],
+    }
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{env['commit'] or 'unknown'}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Benchmark report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
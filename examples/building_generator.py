@@ -6,11 +6,13 @@ in TTL format for various types of buildings including offices, labs, hospitals,
 and retail spaces.
 """
 
-from rdflib import Graph, Namespace, Literal, URIRef
+from concurrent.futures import ProcessPoolExecutor
+from rdflib import BNode, Graph, Namespace, Literal, URIRef
 from rdflib.namespace import RDF, RDFS, OWL, XSD
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 import json
 import os
+import re
 
 # Templates for standard equipment points
 AHU_POINTS = [
@@ -132,9 +134,114 @@ CHILLER_POINTS = [
     }
 ]
 
+# File extension for each bulk output format
+EXTENSIONS = {"nt": "nt", "turtle": "ttl"}
+
+# Local names that can be written as prefix:name in Turtle
+_LOCAL_NAME = re.compile(r"^[A-Za-z0-9_](?:[A-Za-z0-9_.\-]*[A-Za-z0-9_\-])?$")
+_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r"})
+
+
+class TripleWriter:
+    """Stream triples to an N-Triples or Turtle file as they are added
+
+    Stands in for the rdflib Graph of a BrickGenerator in bulk mode. Only
+    ``add``, ``addN`` and ``bind`` are supported and nothing is kept in
+    memory beyond the file buffer, so output size is not limited by RAM.
+    Triples are not deduplicated.
+    Turtle output groups consecutive triples about the same subject.
+    """
+
+    def __init__(self, path: str, format: str = "nt", buffer_size: int = 1 << 20):
+        if format not in EXTENSIONS:
+            raise ValueError(f"Unsupported bulk format: {format}")
+        self.path = path
+        self.format = format
+        self._file = open(path, "w", encoding="utf-8", buffering=buffer_size)
+        self._prefixes: Dict[str, str] = {}
+        self._subject: Optional[str] = None
+        self._count = 0
+
+    def bind(self, prefix: str, namespace, *args, **kwargs):
+        if self._count:
+            raise RuntimeError("Prefixes must be bound before the first triple is written")
+        self._prefixes[str(namespace)] = prefix
+
+    def add(self, triple: Tuple):
+        self.addN([(*triple, None)])
+
+    def addN(self, quads: Iterable[Tuple]):
+        """Write a batch of (subject, predicate, object, context) quads; context is ignored"""
+        if not self._count and self.format == "turtle":
+            self._write_prefixes()
+        write = self._file.write
+        count = self._count
+        if self.format == "nt":
+            term = _nt_term
+            for s, p, o, _ in quads:
+                write(f"{term(s)} {term(p)} {term(o)} .\n")
+                count += 1
+        else:
+            term = self._turtle_term
+            subject = self._subject
+            for s, p, o, _ in quads:
+                current = term(s)
+                predicate = "a" if p == RDF.type else term(p)
+                if current == subject:
+                    write(f" ;\n    {predicate} {term(o)}")
+                else:
+                    write(f"{' .' if subject else ''}\n{current} {predicate} {term(o)}")
+                    subject = current
+                count += 1
+            self._subject = subject
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self):
+        if not self._file.closed:
+            if self.format == "turtle":
+                if not self._count:
+                    self._write_prefixes()
+                elif self._subject:
+                    self._file.write(" .\n")
+            self._file.close()
+
+    def _write_prefixes(self):
+        for namespace, prefix in self._prefixes.items():
+            self._file.write(f"@prefix {prefix}: <{namespace}> .\n")
+
+    def _turtle_term(self, term) -> str:
+        if isinstance(term, URIRef):
+            index = max(term.rfind("#"), term.rfind("/")) + 1
+            prefix = self._prefixes.get(term[:index])
+            if prefix is not None and _LOCAL_NAME.match(term[index:]):
+                return f"{prefix}:{term[index:]}"
+        return _nt_term(term)
+
+
+def _nt_term(term) -> str:
+    """N-Triples form of a term, which is also valid Turtle"""
+    if isinstance(term, URIRef):
+        return f"<{term}>"
+    if isinstance(term, Literal):
+        value = f'"{str(term).translate(_ESCAPES)}"'
+        if term.language:
+            return f"{value}@{term.language}"
+        if term.datatype:
+            return f"{value}^^<{term.datatype}>"
+        return value
+    if isinstance(term, BNode):
+        return f"_:{term}"
+    raise TypeError(f"Cannot write term {term!r}")
+
+
 class BrickGenerator:
-    def __init__(self, building_name: str):
-        self.g = Graph()
+    def __init__(self, building_name: str, output: Optional[str] = None, format: str = "turtle"):
+        """With ``output`` set, triples are streamed to that file in ``format``
+        ("nt" or "turtle") instead of being collected in an in-memory Graph"""
+        self.g = TripleWriter(output, format) if output else Graph()
         # Define namespaces
         self.BRICK = Namespace("https://brickschema.org/schema/Brick#")
         self.BUILDING = Namespace(f"http://buildsys.org/ontologies/{building_name}#")
@@ -153,19 +260,28 @@ class BrickGenerator:
 
     def add_point(self, equipment_uri: URIRef, point: Dict, equipment_type: str, equipment_id: str):
         """Helper method to add a point to equipment"""
-        point_uri = self.BUILDING[f"{self.building_name}.{equipment_type}.{equipment_id}.{point['name']}"]
-        
-        # Handle multiple types
-        if isinstance(point['type'], list):
-            for type_name in point['type']:
-                self.g.add((point_uri, RDF.type, self.BRICK[type_name]))
-        else:
-            self.g.add((point_uri, RDF.type, self.BRICK[point['type']]))
-            
-        self.g.add((equipment_uri, self.BRICK.hasPoint, point_uri))
-        self.g.add((point_uri, RDFS.label, Literal(f"{self.building_name}.{equipment_type}.{equipment_id}.{point['label']}")))
-        
-        return point_uri
+        return self.add_points(equipment_uri, [point], equipment_type, equipment_id)[0]
+
+    def add_points(self, equipment_uri: URIRef, points: List[Dict], equipment_type: str, equipment_id: str):
+        """Expand a point template for one piece of equipment and add it as a single batch"""
+        prefix = f"{self.building_name}.{equipment_type}.{equipment_id}."
+        triples = []
+        point_uris = []
+        for point in points:
+            point_uri = self.BUILDING[prefix + point['name']]
+            # Handle multiple types
+            types = point['type'] if isinstance(point['type'], list) else [point['type']]
+            for type_name in types:
+                triples.append((point_uri, RDF.type, self.BRICK[type_name]))
+            triples.append((equipment_uri, self.BRICK.hasPoint, point_uri))
+            triples.append((point_uri, RDFS.label, Literal(prefix + point['label'])))
+            point_uris.append(point_uri)
+        self.add_triples(triples)
+        return point_uris
+
+    def add_triples(self, triples: Iterable[Tuple]):
+        """Add a batch of triples to the graph, or write them out in bulk mode"""
+        self.g.addN((s, p, o, self.g) for s, p, o in triples)
 
     def create_ahu(self, ahu_id: str, feeds_vavs: List[str], fed_by: Optional[str] = None):
         """Create AHU using standard template"""
@@ -173,14 +289,12 @@ class BrickGenerator:
         self.g.add((ahu, RDF.type, self.BRICK.Air_Handler_Unit))
         
         # Add points and relationships
-        for point in AHU_POINTS:
-            self.add_point(ahu, point, "AHU", f"AHU{ahu_id}")
-        
-        for vav in feeds_vavs:
-            self.g.add((ahu, self.BRICK.feeds, self.BUILDING[vav]))
+        self.add_points(ahu, AHU_POINTS, "AHU", f"AHU{ahu_id}")
         
+        relationships = [(ahu, self.BRICK.feeds, self.BUILDING[vav]) for vav in feeds_vavs]
         if fed_by:
-            self.g.add((ahu, self.BRICK.isFedBy, self.BUILDING[fed_by]))
+            relationships.append((ahu, self.BRICK.isFedBy, self.BUILDING[fed_by]))
+        self.add_triples(relationships)
             
         return ahu
 
@@ -221,44 +335,72 @@ class BrickGenerator:
         vav = self.BUILDING[vav_id]
         self.g.add((vav, RDF.type, self.BRICK.VAV))
         
-        for point in VAV_POINTS:
-            self.add_point(vav, point, f"ZONE.{ahu_id}.RM{room_id}", "")
+        self.add_points(vav, VAV_POINTS, f"ZONE.{ahu_id}.RM{room_id}", "")
 
-        # Create damper
         damper = self.BUILDING[f"damper{vav_id}"]
-        self.g.add((damper, RDF.type, self.BRICK.Damper))
-        self.g.add((damper, self.BRICK.isPartOf, vav))
-
-        # Create room and zone
         room = self.BUILDING[f"RM{room_id}_room"]
-        self.g.add((room, RDF.type, self.BRICK.Room))
-        self.g.add((floor, self.BRICK.hasPart, room))
-
         zone = self.BUILDING[f"RM{room_id}"]
-        self.g.add((zone, RDF.type, self.BRICK.HVAC_Zone))
-        self.g.add((zone, self.BRICK.hasPart, room))
-        self.g.add((vav, self.BRICK.feeds, zone))
+        self.add_triples([
+            # Create damper
+            (damper, RDF.type, self.BRICK.Damper),
+            (damper, self.BRICK.isPartOf, vav),
+            # Create room and zone
+            (room, RDF.type, self.BRICK.Room),
+            (floor, self.BRICK.hasPart, room),
+            (zone, RDF.type, self.BRICK.HVAC_Zone),
+            (zone, self.BRICK.hasPart, room),
+            (vav, self.BRICK.feeds, zone),
+        ])
 
     def create_chiller(self):
         """Create chiller with standard points"""
         chiller = self.BUILDING["chiller"]
         self.g.add((chiller, RDF.type, self.BRICK.Chiller))
         
-        for point in CHILLER_POINTS:
-            self.add_point(chiller, point, "CHW", "")
+        self.add_points(chiller, CHILLER_POINTS, "CHW", "")
+
+    def close(self):
+        """Finish the output file in bulk mode; a no-op for in-memory graphs"""
+        if isinstance(self.g, TripleWriter):
+            self.g.close()
 
     def save_model(self, filename: str):
         """Save the model to a TTL file"""
+        if isinstance(self.g, TripleWriter):
+            # Bulk mode has been writing to its output file all along
+            self.close()
+            print(f"Saved model to {self.g.path}")
+            return
+
         # Ensure .assets directory exists
         assets_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), '.assets')
         os.makedirs(assets_dir, exist_ok=True)
         
         # Save to .assets directory
         filepath = os.path.join(assets_dir, filename)
-        with open(filepath, 'w') as f:
-            f.write(self.g.serialize(format='turtle'))
+        self.g.serialize(destination=filepath, format='turtle')
         print(f"Saved model to {filepath}")
 
+
+def generate_building_file(config: Dict, output_dir: str, format: str = "turtle") -> str:
+    """Stream one building from its configuration to a file in ``output_dir``"""
+    path = os.path.join(output_dir, f"{config['building_name']}.{EXTENSIONS[format]}")
+    generator = BrickGenerator(config["building_name"], output=path, format=format)
+    try:
+        generator.create_building_system(config)
+    finally:
+        generator.close()
+    return path
+
+
+def generate_campus(buildings: List[Dict], output_dir: str, format: str = "turtle",
+                    processes: Optional[int] = None) -> List[str]:
+    """Generate every building of a campus in bulk mode, each in its own process"""
+    os.makedirs(output_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = [pool.submit(generate_building_file, config, output_dir, format) for config in buildings]
+        return [future.result() for future in futures]
+
 def generate_office_building():
     """Generate a typical office building with multiple floors"""
     config = {
@@ -1,10 +1,24 @@
+import os
+
 import uvicorn
 
+from app.config import settings
+
+# File watcher interval forced on when API_WORKERS > 1 and none is configured
+MULTI_WORKER_RELOAD_INTERVAL_SECONDS = 5.0
+
 if __name__ == "__main__":
+    if settings.API_WORKERS > 1:
+        # Workers map one shared read-only graph instead of each loading a copy
+        os.environ["GRAPH_SHARED_STORE"] = "true"
+        # A reload request would only reach one worker, so each one watches the files
+        if settings.GRAPH_RELOAD_INTERVAL_SECONDS <= 0:
+            os.environ["GRAPH_RELOAD_INTERVAL_SECONDS"] = str(MULTI_WORKER_RELOAD_INTERVAL_SECONDS)
+
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",  # Allows external access
         port=8000,
-        reload=True,     # Auto-reload on code changes
-        workers=1        # Number of worker processes
-    ) 
\ No newline at end of file
+        reload=settings.API_WORKERS == 1,  # Auto-reload on code changes (single worker only)
+        workers=settings.API_WORKERS       # Number of worker processes
+    )
@@ -0,0 +1,167 @@
+from fastapi.testclient import TestClient
+import httpx
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from app.config import BASE_DIR, settings
+from app.main import app
+from app.services.brick import BrickService
+
+client = TestClient(app)
+brick_service = BrickService()
+
+INGEST_NT = """\
+<http://buildsys.org/ontologies/new_bldg#new_bldg> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> <https://brickschema.org/schema/Brick#Building> .
+<http://buildsys.org/ontologies/new_bldg#new_bldg> <https://brickschema.org/schema/Brick#hasPart> <http://buildsys.org/ontologies/new_bldg#new_floor> .
+<http://buildsys.org/ontologies/new_bldg#new_floor> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> <https://brickschema.org/schema/Brick#Floor> .
+"""
+
+FILE_BACKED_NT = """\
+<http://buildsys.org/ontologies/retail_store_1#retail_store_1> <https://brickschema.org/schema/Brick#hasPart> <http://buildsys.org/ontologies/retail_store_1#ingested_floor> .
+<http://buildsys.org/ontologies/retail_store_1#ingested_floor> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> <https://brickschema.org/schema/Brick#Floor> .
+"""
+
+WORKER_BUILDING_TTL = """\
+@prefix brick: <https://brickschema.org/schema/Brick#> .
+@prefix bldg: <http://buildsys.org/ontologies/worker_bldg#> .
+bldg:worker_bldg a brick:Building ; brick:hasPart bldg:floor1 .
+bldg:floor1 a brick:Floor .
+"""
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _worker_metrics(port: int) -> dict:
+    """Graph triples reported by whichever worker answers, keyed by its process start time"""
+    # a fresh connection per request, so either worker may accept it
+    text = httpx.get(f"http://127.0.0.1:{port}/metrics", headers={"Connection": "close"}).text
+    values = dict(line.split(" ", 1) for line in text.splitlines() if line and not line.startswith("#"))
+    return {values["process_start_time_seconds"]: float(values["brick_graph_triples"])}
+
+def _poll_workers(port: int, until, timeout: float = 120.0) -> dict:
+    """Collect every worker's triple count until ``until`` holds for them"""
+    seen = {}
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            seen.update(_worker_metrics(port))
+        except (httpx.HTTPError, KeyError):
+            pass
+        if until(seen):
+            return seen
+        time.sleep(0.05)
+    raise AssertionError(f"Workers did not get there in {timeout} seconds: {seen}")
+
+def test_reload_reaches_every_worker(tmp_path):
+    """Test that two workers sharing the graph image both pick up a changed building file"""
+    assets = tmp_path / "assets"
+    assets.mkdir()
+    building = assets / "worker_bldg.ttl"
+    building.write_text(WORKER_BUILDING_TTL)
+    port = _free_port()
+    env = {
+        **os.environ,
+        "API_WORKERS": "2",
+        "GRAPH_SHARED_STORE": "true",
+        "GRAPH_RELOAD_INTERVAL_SECONDS": "0.5",
+        "GRAPH_SNAPSHOT_DIR": str(tmp_path / "cache"),
+        "ASSETS_DIR": str(assets),
+        "BUILDING_FILES_GLOB": "*.ttl",
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", "2"],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        before = _poll_workers(port, lambda seen: len(seen) == 2)
+        assert len(set(before.values())) == 1
+
+        with building.open("a") as f:
+            f.write("bldg:floor2 a brick:Floor .\nbldg:worker_bldg brick:hasPart bldg:floor2 .\n")
+        triples = next(iter(before.values())) + 2
+        after = _poll_workers(port, lambda seen: all(seen.get(worker) == triples for worker in before))
+        assert set(after) == set(before)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+def test_reload_without_changes():
+    """Test that a reload with no changed files keeps the current graph"""
+    generation = brick_service.generation
+    response = client.post("/api/v1/admin/reload")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["reloaded"] == []
+    assert data["removed"] == []
+    assert data["generation"] == generation
+
+def test_reload_changed_file():
+    """Test that only a changed file is re-parsed and the graph is swapped in whole"""
+    state = brick_service.state
+    path = sorted(state.sources)[0]
+    # Pretend the file was loaded from an older version of itself
+    brick_service.state = state._replace(sources={**state.sources, path: (0, 0)})
+
+    response = client.post("/api/v1/admin/reload")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["reloaded"] == [os.path.basename(path)]
+    assert data["generation"] == brick_service.generation
+    assert data["triples"] == len(state.g)
+    assert brick_service.state.g is not state.g
+    assert len(brick_service.point_index) == len(state.point_index)
+
+    response = client.get("/api/v1/buildings/")
+    assert response.status_code == 200
+    assert len(response.json()) > 0
+
+def test_reload_keeps_ingested_triples():
+    """Test that a reload keeps ingested buildings without a file and re-applies ingestion to changed files"""
+    headers = {"Content-Type": "application/n-triples"}
+    for building_id, body in (("new_bldg", INGEST_NT), ("retail_store_1", FILE_BACKED_NT)):
+        response = client.post(f"/api/v1/buildings/{building_id}/triples", content=body, headers=headers)
+        assert response.status_code == 200
+    try:
+        state = brick_service.state
+        path = next(path for path in state.sources if path.endswith("retail_store_1.ttl"))
+        brick_service.state = state._replace(sources={**state.sources, path: (0, 0)})
+        response = client.post("/api/v1/admin/reload")
+        assert response.status_code == 200
+        assert response.json()["reloaded"] == ["retail_store_1.ttl"]
+
+        response = client.get("/api/v1/floors/new_bldg")
+        assert response.status_code == 200
+        assert [floor["id"] for floor in response.json()] == ["new_floor"]
+        response = client.get("/api/v1/floors/retail_store_1")
+        assert response.status_code == 200
+        assert "ingested_floor" in {floor["id"] for floor in response.json()}
+    finally:
+        for building_id, body in (("new_bldg", INGEST_NT), ("retail_store_1", FILE_BACKED_NT)):
+            client.request("DELETE", f"/api/v1/buildings/{building_id}/triples", content=body, headers=headers)
+
+    assert client.get("/api/v1/floors/new_bldg").status_code == 404
+
+def test_changes_refused_with_several_workers(monkeypatch):
+    """Test that a reload or ingest, which would only reach one worker, is refused with 409"""
+    monkeypatch.setattr(settings, "API_WORKERS", 2)
+    generation = brick_service.generation
+
+    response = client.post("/api/v1/admin/reload")
+    assert response.status_code == 409
+    assert "API_WORKERS" in response.json()["detail"]
+
+    response = client.post(
+        "/api/v1/buildings/campus_lab_1/triples",
+        content="<http://example.org/a> <http://example.org/b> <http://example.org/c> .\n",
+        headers={"Content-Type": "application/n-triples"}
+    )
+    assert response.status_code == 409
+    assert brick_service.generation == generation
+
+    # the file watcher still reloads in every worker
+    assert brick_service.reload_changed_files()["generation"] == generation
@@ -6,6 +6,16 @@ from app.services.brick import BrickService
 
 client = TestClient(app)
 
+INGEST_NT = """\
+<http://buildsys.org/ontologies/campus_lab_1#campus_lab_1> <https://brickschema.org/schema/Brick#hasPart> <http://buildsys.org/ontologies/campus_lab_1#ingest_floor> .
+<http://buildsys.org/ontologies/campus_lab_1#ingest_floor> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> <https://brickschema.org/schema/Brick#Floor> .
+<http://buildsys.org/ontologies/campus_lab_1#ingest_floor> <https://brickschema.org/schema/Brick#hasPart> <http://buildsys.org/ontologies/campus_lab_1#ingest_ahu> .
+<http://buildsys.org/ontologies/campus_lab_1#ingest_ahu> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> <https://brickschema.org/schema/Brick#Air_Handling_Unit> .
+<http://buildsys.org/ontologies/campus_lab_1#ingest_ahu> <http://www.w3.org/2000/01/rdf-schema#label> "Ingested AHU" .
+<http://buildsys.org/ontologies/campus_lab_1#ingest_ahu> <https://brickschema.org/schema/Brick#hasPoint> <http://buildsys.org/ontologies/campus_lab_1#ingest_sat> .
+<http://buildsys.org/ontologies/campus_lab_1#ingest_sat> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> <https://brickschema.org/schema/Brick#Supply_Air_Temperature_Sensor> .
+"""
+
 def test_get_buildings():
     """Test getting all buildings"""
     response = client.get("/api/v1/buildings/")
@@ -35,4 +45,62 @@ def test_get_buildings_data():
     expected_buildings = ["campus_lab_1", "campus_office_1"]
     
     for expected_id in expected_buildings:
-        assert any(expected_id in bid for bid in building_ids), f"Expected building {expected_id} not found" 
\ No newline at end of file
+        assert any(expected_id in bid for bid in building_ids), f"Expected building {expected_id} not found" 
+
+def test_ingest_and_delete_triples():
+    """Test that ingested triples show up in the index-backed listings and can be deleted"""
+    headers = {"Content-Type": "application/n-triples"}
+    generation = BrickService().generation
+    response = client.post("/api/v1/buildings/campus_lab_1/triples", content=INGEST_NT, headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["received"] == 7
+    assert data["added"] == 7
+    assert data["generation"] > generation
+    assert "triples_per_second" in data
+
+    devices = client.get("/api/v1/devices/floor/campus_lab_1/ingest_floor").json()
+    assert [(d["id"], d["name"], d["location"]) for d in devices] == [("ingest_ahu", "Ingested AHU", "ingest_floor")]
+    floors = client.get("/api/v1/floors/campus_lab_1").json()
+    assert "ingest_floor" in [f["id"] for f in floors]
+    points = client.get(
+        "/api/v1/points/", params={"building_id": "campus_lab_1", "device_id": "ingest_ahu"}
+    ).json()
+    assert [p["id"] for p in points] == ["ingest_sat"]
+
+    response = client.request(
+        "DELETE", "/api/v1/buildings/campus_lab_1/triples", content=INGEST_NT, headers=headers
+    )
+    assert response.status_code == 200
+    assert response.json()["removed"] == 7
+    assert client.get("/api/v1/devices/floor/campus_lab_1/ingest_floor").status_code == 404
+    points = client.get(
+        "/api/v1/points/", params={"building_id": "campus_lab_1", "device_id": "ingest_ahu"}
+    ).json()
+    assert points == []
+
+def test_ingest_turtle():
+    """Test ingesting a Turtle document"""
+    body = """
+    @prefix brick: <https://brickschema.org/schema/Brick#> .
+    @prefix lab: <http://buildsys.org/ontologies/campus_lab_1#> .
+    lab:ingest_meter a brick:Electrical_Meter .
+    """
+    headers = {"Content-Type": "text/turtle"}
+    response = client.post("/api/v1/buildings/campus_lab_1/triples", content=body, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["added"] == 1
+    response = client.request("DELETE", "/api/v1/buildings/campus_lab_1/triples", content=body, headers=headers)
+    assert response.json()["removed"] == 1
+
+def test_ingest_rejects_bad_input():
+    """Test unsupported content types and malformed bodies"""
+    response = client.post(
+        "/api/v1/buildings/campus_lab_1/triples", content="{}", headers={"Content-Type": "application/json"}
+    )
+    assert response.status_code == 415
+    response = client.post(
+        "/api/v1/buildings/campus_lab_1/triples", content="not n-triples\n",
+        headers={"Content-Type": "application/n-triples"}
+    )
+    assert response.status_code == 400
@@ -0,0 +1,84 @@
+from fastapi.testclient import TestClient
+import pytest
+
+from app.api.v1.conditional import etag_matches
+from app.main import app
+from app.services.brick import BrickService
+
+client = TestClient(app)
+brick_service = BrickService()
+
+FLOOR_NT = """\
+<http://buildsys.org/ontologies/campus_office_1#etag_floor> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> <https://brickschema.org/schema/Brick#Floor> .
+<http://buildsys.org/ontologies/campus_office_1#campus_office_1> <https://brickschema.org/schema/Brick#hasPart> <http://buildsys.org/ontologies/campus_office_1#etag_floor> .
+"""
+
+def test_not_modified():
+    """Test that a matching If-None-Match gets an empty 304 without running the endpoint"""
+    response = client.get("/api/v1/floors/campus_lab_1")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert etag.startswith('"') and etag.endswith('"')
+
+    lookups = brick_service.response_cache.stats()
+    lookups = lookups["hits"] + lookups["misses"]
+    response = client.get("/api/v1/floors/campus_lab_1", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+    stats = brick_service.response_cache.stats()
+    assert stats["hits"] + stats["misses"] == lookups
+
+    response = client.get("/api/v1/floors/campus_lab_1", headers={"If-None-Match": '"stale", W/' + etag})
+    assert response.status_code == 304
+
+def test_etag_depends_on_scope():
+    """Test that the tag covers the path and query parameters, but not their order"""
+    floors = client.get("/api/v1/floors/campus_lab_1").headers["ETag"]
+    assert client.get("/api/v1/floors/campus_office_1").headers["ETag"] != floors
+    points = client.get("/api/v1/points/", params=[("building_id", "campus_lab_1"), ("limit", "5")])
+    reordered = client.get("/api/v1/points/", params=[("limit", "5"), ("building_id", "campus_lab_1")])
+    assert points.headers["ETag"] == reordered.headers["ETag"]
+    assert client.get("/api/v1/points/", params={"limit": 6}).headers["ETag"] != points.headers["ETag"]
+
+    # errors are not tagged
+    assert "ETag" not in client.get("/api/v1/floors/nonexistent_building").headers
+
+def test_etag_changes_with_graph():
+    """Test that an ingest invalidates every tag handed out before it"""
+    etag = client.get("/api/v1/floors/campus_office_1").headers["ETag"]
+    headers = {"Content-Type": "application/n-triples"}
+    response = client.post("/api/v1/buildings/campus_office_1/triples", content=FLOOR_NT, headers=headers)
+    assert response.status_code == 200
+    try:
+        response = client.get("/api/v1/floors/campus_office_1", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert "etag_floor" in {floor["id"] for floor in response.json()}
+    finally:
+        client.request("DELETE", "/api/v1/buildings/campus_office_1/triples", content=FLOOR_NT, headers=headers)
+
+def test_etag_matches():
+    """Test If-None-Match parsing"""
+    assert etag_matches('"a"', '"a"')
+    assert etag_matches('W/"a"', '"a"')
+    assert etag_matches('"b" , "a"', '"a"')
+    assert etag_matches("*", '"a"')
+    assert not etag_matches('"b"', '"a"')
+    assert not etag_matches(None, '"a"')
+
+def test_etag_shared_across_workers(monkeypatch):
+    """Test that without ingested changes the tag depends only on the loaded files, not on the process"""
+    monkeypatch.setattr(brick_service, "ingests", 0)
+    etag = client.get("/api/v1/floors/campus_lab_1").headers["ETag"]
+
+    # another worker: its own epoch, a different number of reloads, the same files
+    monkeypatch.setattr(brick_service, "epoch", "another worker")
+    monkeypatch.setattr(brick_service, "generation", brick_service.generation + 3)
+    response = client.get("/api/v1/floors/campus_lab_1", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    # files loaded from a different version are a different graph
+    monkeypatch.setattr(brick_service, "state", brick_service.state._replace(version="changed files"))
+    response = client.get("/api/v1/floors/campus_lab_1", headers={"If-None-Match": etag})
+    assert response.status_code == 200
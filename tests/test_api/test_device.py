@@ -5,6 +5,32 @@ from app.main import app
 
 client = TestClient(app)
 
+NS = "http://buildsys.org/ontologies/campus_lab_1#"
+BRICK = "https://brickschema.org/schema/Brick#"
+RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+PAGED_DEVICES = [f"paged_vav{i}" for i in range(5)]
+
+@pytest.fixture
+def paged_building():
+    """Link five VAVs, each with one point, to campus_lab_1 through a floor for the duration of a test"""
+    lines = [
+        f"<{NS}campus_lab_1> <{BRICK}hasPart> <{NS}paged_floor> .",
+        f"<{NS}paged_floor> <{RDF_TYPE}> <{BRICK}Floor> .",
+    ]
+    for device in PAGED_DEVICES:
+        lines += [
+            f"<{NS}paged_floor> <{BRICK}hasPart> <{NS}{device}> .",
+            f"<{NS}{device}> <{RDF_TYPE}> <{BRICK}VAV> .",
+            f"<{NS}{device}> <{BRICK}hasPoint> <{NS}{device}_sat> .",
+            f"<{NS}{device}_sat> <{RDF_TYPE}> <{BRICK}Supply_Air_Temperature_Sensor> .",
+        ]
+    body = "\n".join(lines) + "\n"
+    headers = {"Content-Type": "application/n-triples"}
+    response = client.post("/api/v1/buildings/campus_lab_1/triples", content=body, headers=headers)
+    assert response.status_code == 200
+    yield "campus_lab_1"
+    client.request("DELETE", "/api/v1/buildings/campus_lab_1/triples", content=body, headers=headers)
+
 def test_get_building_devices():
     """Test getting devices for a specific building"""
     building_id = "campus_lab_1"
@@ -78,4 +104,52 @@ def test_get_floor_devices_data():
         # Check for common Brick equipment types
         brick_types = {"VAV", "AHU", "Thermostat", "Sensor"}
         assert any(brick_type in device_types for brick_type in brick_types), \
-            "No expected Brick equipment types found" 
\ No newline at end of file
+            "No expected Brick equipment types found"
+
+def test_get_building_devices_pagination(paged_building):
+    """Test walking a building's devices page by page with the cursor"""
+    response = client.get(f"/api/v1/devices/building/{paged_building}")
+    assert response.status_code == 200
+    all_ids = [device["id"] for device in response.json()]
+    assert set(PAGED_DEVICES) <= set(all_ids)
+    assert int(response.headers["X-Total-Count"]) == len(all_ids)
+
+    seen = []
+    sizes = []
+    params = {"limit": 2}
+    while True:
+        response = client.get(f"/api/v1/devices/building/{paged_building}", params=params)
+        assert response.status_code == 200
+        assert int(response.headers["X-Total-Count"]) == len(all_ids)
+        page = response.json()
+        sizes.append(len(page))
+        seen.extend(device["id"] for device in page)
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+
+    full_pages, last = divmod(len(all_ids), 2)
+    assert sizes == [2] * full_pages + ([last] if last else [])
+    assert len(seen) == len(set(seen))
+    assert seen == all_ids
+
+def test_get_building_devices_invalid_cursor():
+    """Test that a malformed cursor is rejected"""
+    response = client.get("/api/v1/devices/building/campus_lab_1", params={"cursor": "!!!"})
+    assert response.status_code == 400
+
+def test_get_building_devices_include_points(paged_building):
+    """Test that points are only populated when requested"""
+    response = client.get(f"/api/v1/devices/building/{paged_building}")
+    assert response.status_code == 200
+    without_points = response.json()
+    assert without_points
+    assert all(device["points"] == [] for device in without_points)
+
+    response = client.get(f"/api/v1/devices/building/{paged_building}", params={"include_points": True})
+    assert response.status_code == 200
+    devices = {device["id"]: device for device in response.json()}
+    assert devices.keys() == {device["id"] for device in without_points}
+    for device in PAGED_DEVICES:
+        assert devices[device]["points"] == [f"{device}_sat"]
+    assert all(isinstance(point, str) for device in devices.values() for point in device["points"])
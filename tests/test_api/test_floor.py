@@ -46,4 +46,10 @@ def test_get_building_floors_invalid_building():
     """Test getting floors for a non-existent building"""
     building_id = "non_existent_building"
     response = client.get(f"/api/v1/floors/{building_id}")
-    assert response.status_code == 404 
\ No newline at end of file
+    assert response.status_code == 404
+
+def test_get_building_floors_uri_injection():
+    """Test that a building id cannot rewrite the floors query"""
+    building_id = "x> . ?s ?p ?id . <x".replace("?", "%3F")
+    response = client.get(f"/api/v1/floors/{building_id}")
+    assert response.status_code == 404
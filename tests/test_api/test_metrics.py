@@ -0,0 +1,21 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+client = TestClient(app)
+
+def test_metrics():
+    """Test that request, query and graph metrics are exposed for Prometheus"""
+    client.post("/api/v1/query/", json={"query": "SELECT ?id WHERE { ?id a brick:Building }"})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    text = response.text
+    assert 'http_request_duration_seconds_count{router="query",route="/api/v1/query/",method="POST"}' in text
+    assert 'sparql_phase_duration_seconds_count{phase="evaluate"}' in text
+    assert "sparql_result_rows_count" in text
+    assert 'sparql_cache_hit_ratio{cache="result"}' in text
+    assert "brick_graph_triples" in text
+    assert "process_resident_memory_bytes" in text
+    assert "process_start_time_seconds" in text
@@ -0,0 +1,63 @@
+from fastapi.testclient import TestClient
+import pytest
+
+from app.main import app
+
+client = TestClient(app)
+
+def test_get_points():
+    """Test getting all points"""
+    response = client.get("/api/v1/points/")
+    assert response.status_code == 200
+    points = response.json()
+
+    # Check response structure
+    assert isinstance(points, list)
+    assert int(response.headers["X-Total-Count"]) == len(points)
+    if len(points) > 0:
+        point = points[0]
+        assert "id" in point
+        assert "type" in point
+        assert "name" in point
+        assert "device" in point
+        assert isinstance(point["type"], str)
+
+def test_get_points_by_type_includes_subclasses():
+    """Test that a point class filter matches its subclasses"""
+    response = client.get("/api/v1/points/", params={"type": "Temperature_Sensor"})
+    assert response.status_code == 200
+    point_types = {p["type"] for p in response.json()}
+    # Only subclasses such as Zone_Air_Temperature_Sensor are asserted in the data
+    assert len(point_types) > 1
+    assert all(t.endswith("Temperature_Sensor") for t in point_types)
+
+def test_get_points_by_building_and_device():
+    """Test building and device filters"""
+    building_id = "campus_lab_1"
+    response = client.get("/api/v1/points/", params={"building_id": building_id})
+    assert response.status_code == 200
+    points = response.json()
+    assert points
+    assert all(p["id"].startswith(building_id) for p in points)
+
+    response = client.get("/api/v1/points/", params={"building_id": building_id, "device_id": "AHU01"})
+    assert response.status_code == 200
+    assert {p["device"] for p in response.json()} == {"AHU01"}
+
+def test_get_points_pagination():
+    """Test walking the points page by page"""
+    total = int(client.get("/api/v1/points/").headers["X-Total-Count"])
+    seen = []
+    params = {"limit": 100}
+    while True:
+        response = client.get("/api/v1/points/", params=params)
+        seen.extend(p["id"] for p in response.json())
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+    assert len(seen) == total
+
+def test_get_points_invalid_filters():
+    """Test rejected filters"""
+    assert client.get("/api/v1/points/", params={"type": "VAV"}).status_code == 400
+    assert client.get("/api/v1/points/", params={"device_id": "AHU01"}).status_code == 400
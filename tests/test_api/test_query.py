@@ -0,0 +1,131 @@
+from fastapi.testclient import TestClient
+import json
+import pytest
+
+from app.main import app
+
+client = TestClient(app)
+
+def test_execute_query():
+    """Test executing a SPARQL query"""
+    query = """
+    SELECT ?id WHERE { ?id a brick:Building }
+    """
+    response = client.post("/api/v1/query/", json={"query": query})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert isinstance(results, list)
+    assert all("id" in row for row in results)
+
+def test_execute_invalid_query():
+    """Test that a malformed query is rejected"""
+    response = client.post("/api/v1/query/", json={"query": "SELECT WHERE {"})
+    assert response.status_code == 400
+
+def test_get_query_stats():
+    """Test the executor statistics endpoint"""
+    response = client.get("/api/v1/query/stats")
+    assert response.status_code == 200
+    executor = response.json()["executor"]
+    for key in ("max_workers", "max_queue", "active", "queued", "rejected"):
+        assert key in executor
+
+def test_repeated_query_hits_cache():
+    """Test that re-running the same query is served from the result cache"""
+    query = "SELECT ?id WHERE { ?id a brick:Floor }"
+    client.post("/api/v1/query/", json={"query": query})
+    before = client.get("/api/v1/query/stats").json()["cache"]["hits"]
+
+    response = client.post("/api/v1/query/", json={"query": "  " + query + "\n"})
+    assert response.status_code == 200
+    after = client.get("/api/v1/query/stats").json()["cache"]["hits"]
+    assert after == before + 1
+
+def test_stream_query_ndjson():
+    """Test streaming rows as newline-delimited JSON"""
+    query = "SELECT ?id WHERE { ?id a brick:Building }"
+    response = client.post("/api/v1/query/?stream=true", json={"query": query})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    streamed = [json.loads(line) for line in response.text.splitlines()]
+    buffered = client.post("/api/v1/query/", json={"query": query}).json()["results"]
+    assert sorted(row["id"] for row in streamed) == sorted(row["id"] for row in buffered)
+
+def test_stream_query_negotiates_csv():
+    """Test that the Accept header selects the stream format"""
+    query = "SELECT ?id WHERE { ?id a brick:Building }"
+    response = client.post(
+        "/api/v1/query/?stream=true",
+        json={"query": query},
+        headers={"Accept": "text/csv"}
+    )
+    assert response.status_code == 200
+    assert response.text.splitlines()[0] == "id"
+
+def test_stream_query_unacceptable_format():
+    """Test that an unsupported Accept header is refused"""
+    response = client.post(
+        "/api/v1/query/?stream=true",
+        json={"query": "SELECT ?id WHERE { ?id a brick:Building }"},
+        headers={"Accept": "image/png"}
+    )
+    assert response.status_code == 406
+
+def test_execute_ask_query():
+    """Test that an ASK query returns its boolean answer"""
+    response = client.post("/api/v1/query/", json={"query": "ASK { ?id a brick:Building }"})
+    assert response.status_code == 200
+    assert response.json()["results"] == [{"result": True}]
+
+def test_execute_query_max_rows():
+    """Test that a result cut off at max_rows is marked as truncated"""
+    query = "SELECT ?id WHERE { ?id a brick:Floor }"
+    response = client.post("/api/v1/query/?max_rows=1", json={"query": query})
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["results"]) == 1
+    assert body["truncated"] is True
+
+    complete = client.post("/api/v1/query/", json={"query": query}).json()
+    assert "truncated" not in complete
+
+def test_expensive_query_rejected():
+    """Test that a Cartesian product over every triple is refused before it runs"""
+    query = "SELECT * WHERE { ?s ?p ?o . ?a ?b ?c }"
+    estimate = client.post("/api/v1/query/estimate", json={"query": query}).json()
+    assert estimate["lane"] == "rejected"
+
+    response = client.post("/api/v1/query/", json={"query": query})
+    assert response.status_code == 422
+
+def test_query_timeout():
+    """Test that a query running past its timeout returns 504"""
+    query = "SELECT * WHERE { ?s ?p ?o } ORDER BY ?o"
+    response = client.post("/api/v1/query/?timeout=0.05", json={"query": query})
+    assert response.status_code == 504
+
+def test_profile_query():
+    """Test that profile=true returns rows plus the timed algebra tree"""
+    query = "SELECT ?id WHERE { ?id a brick:Building }"
+    response = client.post("/api/v1/query/?profile=true", json={"query": query})
+    assert response.status_code == 200
+    body = response.json()
+    buffered = client.post("/api/v1/query/", json={"query": query}).json()["results"]
+    assert sorted(row["id"] for row in body["results"]) == sorted(row["id"] for row in buffered)
+
+    plan = body["profile"]["plan"]
+    assert plan["operator"] == "SelectQuery"
+    node = plan
+    while node["operator"] != "BGP":
+        node = node["children"][0]
+    assert node["solutions"] == len(buffered)
+    assert node["patterns"][0]["matches"] == len(buffered)
+
+def test_profile_stream_rejected():
+    """Test that streamed results cannot be profiled"""
+    response = client.post(
+        "/api/v1/query/?stream=true&profile=true",
+        json={"query": "SELECT ?id WHERE { ?id a brick:Building }"}
+    )
+    assert response.status_code == 400
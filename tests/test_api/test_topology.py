@@ -0,0 +1,47 @@
+from fastapi.testclient import TestClient
+import pytest
+
+from app.main import app
+
+client = TestClient(app)
+
+def test_get_downstream():
+    """Test that the subtree fed by a chiller covers its AHUs, their VAVs and the zones they feed"""
+    response = client.get("/api/v1/topology/office_building_1/chiller1/downstream")
+    assert response.status_code == 200
+    topology = response.json()
+    assert topology["id"] == "chiller1"
+    assert topology["direction"] == "downstream"
+
+    nodes = {node["id"]: node for node in topology["nodes"]}
+    assert topology["nodes"][0]["id"] == "chiller1"
+    assert nodes["AHU01"]["depth"] == 1
+    assert nodes["AHU01"]["via"] == ["chiller1"]
+    assert nodes["AHU01"]["type"] == "Air_Handler_Unit"
+    assert nodes["AHU01"]["points"]
+    assert nodes["VAVRM101"]["depth"] == 2
+    assert nodes["RM101"]["via"] == ["VAVRM101"]
+    depths = [node["depth"] for node in topology["nodes"]]
+    assert depths == sorted(depths)
+
+def test_get_downstream_options():
+    """Test the depth limit and leaving points out"""
+    response = client.get(
+        "/api/v1/topology/office_building_1/AHU01/downstream",
+        params={"max_depth": 1, "include_points": False}
+    )
+    assert response.status_code == 200
+    nodes = response.json()["nodes"]
+    assert {node["depth"] for node in nodes} == {0, 1}
+    assert all(node["points"] == [] for node in nodes)
+
+def test_get_upstream():
+    """Test walking from a room back to the plant that feeds it"""
+    response = client.get("/api/v1/topology/office_building_1/RM101/upstream")
+    assert response.status_code == 200
+    assert [node["id"] for node in response.json()["nodes"]] == ["RM101", "VAVRM101", "AHU01", "chiller1"]
+
+def test_get_topology_unknown_entity():
+    """Test that an entity outside the feed graph is a 404"""
+    response = client.get("/api/v1/topology/office_building_1/nonexistent/upstream")
+    assert response.status_code == 404
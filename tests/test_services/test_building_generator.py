@@ -0,0 +1,56 @@
+from rdflib import Graph
+from rdflib.compare import isomorphic
+import pytest
+
+from examples.building_generator import BrickGenerator, TripleWriter, generate_building_file, generate_campus
+
+
+def _config(building_name: str):
+    return {
+        "building_name": building_name,
+        "area": 5000,
+        "floors": ["1", "2"],
+        "ahus": [
+            {"id": "01", "feeds_vavs": ["VAVRM101", "VAVRM102"], "fed_by": "chiller1"},
+            {"id": "02", "feeds_vavs": ["VAVRM201"]},
+        ],
+        "chiller": True,
+    }
+
+
+def _in_memory(config) -> Graph:
+    generator = BrickGenerator(config["building_name"])
+    generator.create_building_system(config)
+    return generator.g
+
+
+@pytest.mark.parametrize("format", ["nt", "turtle"])
+def test_bulk_mode_matches_in_memory_graph(tmp_path, format):
+    """Test that a streamed building parses back to the graph built in memory"""
+    config = _config("test_building")
+    path = generate_building_file(config, str(tmp_path), format)
+
+    expected = _in_memory(config)
+    streamed = Graph().parse(path, format=format)
+    assert len(streamed) == len(expected)
+    assert isomorphic(streamed, expected)
+
+
+def test_triple_writer_binds_before_first_triple(tmp_path):
+    """Test that prefixes cannot be bound once triples have been written"""
+    generator = BrickGenerator("test_building", output=str(tmp_path / "test_building.ttl"))
+    generator.create_chiller()
+    assert isinstance(generator.g, TripleWriter)
+    with pytest.raises(RuntimeError):
+        generator.g.bind("late", "http://example.org/late#")
+    generator.close()
+
+
+def test_generate_campus(tmp_path):
+    """Test that every building of a campus is written by its own process"""
+    configs = [_config("campus_building_a"), _config("campus_building_b")]
+    paths = generate_campus(configs, str(tmp_path / "campus"), format="nt", processes=2)
+
+    assert [path.rsplit("/", 1)[-1] for path in paths] == ["campus_building_a.nt", "campus_building_b.nt"]
+    for config, path in zip(configs, paths):
+        assert isomorphic(Graph().parse(path, format="nt"), _in_memory(config))
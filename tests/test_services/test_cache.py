@@ -0,0 +1,59 @@
+import time
+
+from app.services.cache import LRUCache, estimate_result_size, normalize_query
+
+
+def test_normalize_query_collapses_whitespace():
+    """Test that layout differences share a key but literals do not"""
+    a = "SELECT ?x\n  WHERE {\n\t?x a brick:VAV }"
+    b = "  SELECT ?x WHERE { ?x a brick:VAV }  "
+    assert normalize_query(a) == normalize_query(b)
+
+    spaced = 'SELECT ?x WHERE { ?x rdfs:label "Room  101" }'
+    single = 'SELECT ?x WHERE { ?x rdfs:label "Room 101" }'
+    assert normalize_query(spaced) != normalize_query(single)
+
+
+def test_cache_lru_eviction():
+    """Test that the least recently used entry is evicted first"""
+    cache = LRUCache(max_entries=2, max_bytes=10_000, ttl_seconds=60)
+    cache.put("a", 1, 10)
+    cache.put("b", 2, 10)
+    assert cache.get("a") == 1
+    cache.put("c", 3, 10)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_byte_bound():
+    """Test that the byte budget evicts entries and skips oversized values"""
+    cache = LRUCache(max_entries=100, max_bytes=100, ttl_seconds=60)
+    cache.put("a", 1, 60)
+    cache.put("b", 2, 60)
+    assert cache.get("a") is None
+    cache.put("huge", 3, 1000)
+    assert cache.get("huge") is None
+    assert cache.stats()["bytes"] == 60
+
+
+def test_cache_ttl_and_counters():
+    """Test entry expiry and hit/miss accounting"""
+    cache = LRUCache(max_entries=10, max_bytes=10_000, ttl_seconds=0.01)
+    cache.put(("q", 1), {"results": []}, 10)
+    assert cache.get(("q", 1)) == {"results": []}
+    assert cache.get(("q", 2)) is None
+    time.sleep(0.02)
+    assert cache.get(("q", 1)) is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"]) == (1, 2, 1)
+
+
+def test_estimate_result_size_grows_with_rows():
+    """Test that larger results are estimated as larger"""
+    small = {"results": [{"id": "a"}]}
+    large = {"results": [{"id": "a" * 100}] * 10}
+    assert estimate_result_size(large) > estimate_result_size(small)
@@ -0,0 +1,62 @@
+from rdflib import Graph, Namespace
+from rdflib.namespace import RDF
+from rdflib.plugins.sparql import prepareQuery
+import pytest
+
+from app.services.cost import GraphStats, estimate_cost
+from app.services.indexes import BRICK
+
+EX = Namespace("http://example.org/test#")
+
+
+@pytest.fixture
+def point_graph():
+    g = Graph()
+    for i in range(10):
+        g.add((EX[f"vav{i}"], RDF.type, BRICK.VAV))
+        for j in range(5):
+            point = EX[f"vav{i}_point{j}"]
+            g.add((point, RDF.type, BRICK.Temperature_Sensor))
+            g.add((EX[f"vav{i}"], BRICK.hasPoint, point))
+    return g
+
+
+def _cost(query: str, stats: GraphStats, *bound: str) -> float:
+    return estimate_cost(prepareQuery(query, initNs={"brick": BRICK}), stats, bound)
+
+
+def test_graph_stats(point_graph):
+    """Test per-predicate and per-class counts, and folding in changes"""
+    stats = GraphStats.from_graph(point_graph)
+    assert stats.triples == 110
+    assert stats.predicates[BRICK.hasPoint] == 50
+    assert stats.predicate_subjects[BRICK.hasPoint] == 10
+    assert stats.classes[BRICK.VAV] == 10
+
+    updated = stats.updated([(EX.vav10, RDF.type, BRICK.VAV)])
+    assert updated.triples == 111 and updated.classes[BRICK.VAV] == 11
+    removed = updated.updated([(EX.vav10, RDF.type, BRICK.VAV)], delete=True)
+    assert removed.classes == stats.classes
+    assert stats.classes[BRICK.VAV] == 10
+
+
+def test_estimate_orders_queries_by_work(point_graph):
+    """Test that lookups cost less than scans, and Cartesian products far more than either"""
+    stats = GraphStats.from_graph(point_graph)
+    lookup = _cost("SELECT ?p WHERE { ?d brick:hasPoint ?p }", stats, "d")
+    scan = _cost("SELECT ?d ?p WHERE { ?d brick:hasPoint ?p }", stats)
+    join = _cost("SELECT ?d ?p WHERE { ?d a brick:VAV . ?d brick:hasPoint ?p }", stats)
+    product = _cost("SELECT * WHERE { ?a brick:hasPoint ?x . ?b brick:hasPoint ?y }", stats)
+
+    assert lookup < scan <= join < product
+    assert product >= 50 * 50
+
+
+def test_estimate_limit_discount(point_graph):
+    """Test that LIMIT lowers the cost unless an ORDER BY must see every row first"""
+    stats = GraphStats.from_graph(point_graph)
+    query = "SELECT * WHERE { ?a brick:hasPoint ?x . ?b brick:hasPoint ?y }"
+    full = _cost(query, stats)
+
+    assert _cost(query + " LIMIT 10", stats) < full / 10
+    assert _cost(query + " ORDER BY ?a LIMIT 10", stats) > full
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+import time
+import pytest
+
+from app.services.executor import QueryExecutor, QueueFullError, ReadWriteLock
+
+
+def test_executor_runs_off_event_loop():
+    """Test that work runs on a pool thread and returns its result"""
+    executor = QueryExecutor(max_workers=2, max_queue=4)
+    main_thread = threading.get_ident()
+
+    result = asyncio.run(executor.run(lambda x: (x * 2, threading.get_ident()), 21))
+    assert result[0] == 42
+    assert result[1] != main_thread
+    assert executor.stats()["completed"] == 1
+
+
+def test_executor_rejects_when_queue_full():
+    """Test that submissions beyond the queue limit are rejected"""
+    executor = QueryExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0.05)
+        queued = asyncio.ensure_future(executor.run(lambda: "queued"))
+        await asyncio.sleep(0.05)
+        assert executor.stats()["queued"] == 1
+        with pytest.raises(QueueFullError):
+            await executor.run(lambda: "rejected")
+        release.set()
+        return await running, await queued
+
+    assert asyncio.run(scenario()) == (True, "queued")
+    stats = executor.stats()
+    assert stats["rejected"] == 1
+    assert stats["queued"] == 0 and stats["active"] == 0
+
+
+def test_read_write_lock_excludes_writer():
+    """Test that a writer waits for active readers"""
+    lock = ReadWriteLock()
+    events = []
+
+    def writer():
+        with lock.write():
+            events.append("write")
+
+    with lock.read():
+        thread = threading.Thread(target=writer)
+        thread.start()
+        time.sleep(0.05)
+        events.append("read done")
+    thread.join()
+
+    assert events == ["read done", "write"]
+
+
+def test_executor_drops_cancelled_queued_work():
+    """Test that cancelling a call still waiting for a worker removes it from the queue"""
+    executor = QueryExecutor(max_workers=1, max_queue=4)
+    release = threading.Event()
+    ran = []
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0.05)
+        queued = asyncio.ensure_future(executor.run(lambda: ran.append(True)))
+        await asyncio.sleep(0.05)
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        release.set()
+        await running
+
+    asyncio.run(scenario())
+    stats = executor.stats()
+    assert ran == []
+    assert stats["cancelled"] == 1
+    assert stats["queued"] == 0 and stats["completed"] == 1
@@ -0,0 +1,81 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+
+from rdflib import BNode, Literal, Namespace, URIRef
+from rdflib.namespace import RDF, RDFS, XSD
+import pytest
+
+from app.services.brick import BrickDataset
+from app.services import image
+from app.services.image import CompactStore, MappedStore, ReadOnlyGraphError, image_path, write_image
+from app.services.indexes import BRICK
+from app.services.snapshot import TripleEncoder
+
+EX = Namespace("http://example.org/test#")
+BUILDING_GRAPH = URIRef("http://example.org/building")
+OTHER_GRAPH = URIRef("http://example.org/other")
+
+
+@pytest.fixture(params=[MappedStore, CompactStore.from_file])
+def datasets(request, tmp_path):
+    """The same named graphs in rdflib's memory store and in a mapped or compact image store"""
+    memory = BrickDataset(default_union=True)
+    memory.bind("ex", EX)
+    building = memory.graph(BUILDING_GRAPH)
+    building.add((EX.building, RDF.type, BRICK.Building))
+    building.add((EX.building, RDFS.label, Literal("Test Building", lang="en")))
+    building.add((EX.building, BRICK.hasPart, EX.floor1))
+    building.add((EX.floor1, BRICK.area, Literal(42)))
+    building.add((EX.floor1, EX.note, BNode("n1")))
+    other = memory.graph(OTHER_GRAPH)
+    other.add((EX.building, RDF.type, BRICK.Building))
+    other.add((EX.floor2, BRICK.area, Literal("1.5", datatype=XSD.decimal)))
+
+    encoder = TripleEncoder()
+    sections = {graph.identifier: encoder.encode(graph) for graph in (building, other)}
+    path = write_image(image_path(str(tmp_path), "abc123"), encoder.terms, sections, memory.namespaces())
+    return memory, BrickDataset(store=request.param(path), default_union=True)
+
+
+def test_mapped_store_matches_memory_store(datasets):
+    """Test every triple pattern against rdflib's own store"""
+    memory, mapped = datasets
+    terms = [None, EX.building, EX.floor1, RDF.type, BRICK.area, Literal(42), EX.missing]
+    for pattern in product(terms, repeat=3):
+        assert set(mapped.triples(pattern)) == set(memory.triples(pattern)), pattern
+
+    # a triple held by two named graphs is counted once in the union
+    assert len(mapped) == len(memory) == 6
+    for identifier in (BUILDING_GRAPH, OTHER_GRAPH):
+        assert set(mapped.graph(identifier)) == set(memory.graph(identifier))
+        assert len(mapped.graph(identifier)) == len(memory.graph(identifier))
+    assert {graph.identifier for graph in mapped.store.contexts((EX.building, RDF.type, BRICK.Building))} == {
+        BUILDING_GRAPH, OTHER_GRAPH
+    }
+
+
+def test_mapped_store_queries(datasets):
+    """Test SPARQL evaluation and namespaces over a mapped image"""
+    _, mapped = datasets
+    rows = mapped.query("SELECT ?area WHERE { ?floor brick:area ?area } ORDER BY ?area")
+    assert [row.area for row in rows] == [Literal("1.5", datatype=XSD.decimal), Literal(42)]
+    assert str(dict(mapped.namespaces())["ex"]) == str(EX)
+
+
+def test_mapped_store_is_read_only(datasets):
+    """Test that writes are rejected"""
+    _, mapped = datasets
+    with pytest.raises(ReadOnlyGraphError):
+        mapped.graph(BUILDING_GRAPH).add((EX.floor3, RDF.type, BRICK.Floor))
+    with pytest.raises(ReadOnlyGraphError):
+        mapped.graph(BUILDING_GRAPH).remove((EX.floor1, None, None))
+
+
+def test_compact_store_term_cache_across_threads(datasets, monkeypatch):
+    """Test that threads sharing the store see correct terms while its cache keeps resetting"""
+    memory, mapped = datasets
+    monkeypatch.setattr(image, "COMPACT_TERM_CACHE_SIZE", 2)
+    expected = set(memory.triples((None, None, None)))
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: set(mapped.triples((None, None, None))), range(200)))
+    assert all(result == expected for result in results)
@@ -0,0 +1,217 @@
+from rdflib import Graph, Namespace
+from rdflib.namespace import RDF, RDFS
+import pytest
+
+from app.services.indexes import (
+    BRICK, ClassIndex, ContainmentIndex, EquipmentIndex, PointIndex
+)
+
+EX = Namespace("http://example.org/test#")
+
+
+@pytest.fixture
+def class_graph():
+    g = Graph()
+    g.add((BRICK.HVAC_Equipment, RDFS.subClassOf, BRICK.Equipment))
+    g.add((BRICK.Air_Handler_Unit, RDFS.subClassOf, BRICK.HVAC_Equipment))
+    g.add((BRICK.Terminal_Unit, RDFS.subClassOf, BRICK.HVAC_Equipment))
+    g.add((BRICK.VAV, RDFS.subClassOf, BRICK.Terminal_Unit))
+    g.add((BRICK.Sensor, RDFS.subClassOf, BRICK.Point))
+    g.add((BRICK.Temperature_Sensor, RDFS.subClassOf, BRICK.Sensor))
+    g.add((BRICK.Floor, RDFS.subClassOf, BRICK.Location))
+    return g
+
+
+def test_class_index_closure(class_graph):
+    """Test ancestors and descendants are transitive and reflexive"""
+    index = ClassIndex.from_graph(class_graph)
+
+    assert index.ancestors(BRICK.VAV) == {
+        BRICK.VAV, BRICK.Terminal_Unit, BRICK.HVAC_Equipment, BRICK.Equipment
+    }
+    assert BRICK.VAV in index.descendants(BRICK.Equipment)
+    assert BRICK.Equipment in index.descendants(BRICK.Equipment)
+    assert index.is_subclass(BRICK.VAV, BRICK.HVAC_Equipment)
+    assert not index.is_subclass(BRICK.HVAC_Equipment, BRICK.VAV)
+
+
+def test_class_index_roots(class_graph):
+    """Test the Equipment, Point and Location subtrees"""
+    index = ClassIndex.from_graph(class_graph)
+
+    assert index.is_equipment(BRICK.Air_Handler_Unit)
+    assert not index.is_equipment(BRICK.Temperature_Sensor)
+    assert index.is_point(BRICK.Temperature_Sensor)
+    assert index.is_location(BRICK.Floor)
+    assert not index.is_equipment(EX.Unknown)
+
+
+def test_class_index_most_specific(class_graph):
+    """Test that superclasses are dropped from a type list"""
+    index = ClassIndex.from_graph(class_graph)
+
+    assert index.most_specific([BRICK.Equipment, BRICK.VAV, BRICK.Terminal_Unit]) == [BRICK.VAV]
+
+
+@pytest.fixture
+def containment_graph():
+    g = Graph()
+    g.add((EX.building, BRICK.hasPart, EX.floor1))
+    g.add((EX.building, BRICK.hasPart, EX.floor2))
+    g.add((EX.floor1, BRICK.hasPart, EX.room101))
+    g.add((EX.room101, BRICK.hasPart, EX.vav101))
+    g.add((EX.damper101, BRICK.isPartOf, EX.vav101))
+    return g
+
+
+def test_containment_index_descendants(containment_graph):
+    """Test transitive descendants across hasPart and isPartOf"""
+    index = ContainmentIndex.from_graph(containment_graph)
+
+    assert index.descendants(EX.building) == {
+        EX.floor1, EX.floor2, EX.room101, EX.vav101, EX.damper101
+    }
+    assert index.descendants(EX.floor2) == frozenset()
+    assert index.children(EX.vav101) == {EX.damper101}
+    assert index.contains(EX.floor1, EX.damper101)
+    assert not index.contains(EX.floor2, EX.damper101)
+
+
+def test_containment_index_ancestors(containment_graph):
+    """Test the upward direction of the hierarchy"""
+    index = ContainmentIndex.from_graph(containment_graph)
+
+    assert index.parents(EX.vav101) == {EX.room101}
+    assert index.ancestors(EX.damper101) == {EX.vav101, EX.room101, EX.floor1, EX.building}
+    assert index.ancestors(EX.building) == frozenset()
+
+
+def test_equipment_index_pages(class_graph, containment_graph):
+    """Test keyset pages over the sorted equipment of a building"""
+    g = class_graph + containment_graph
+    g.add((EX.building, RDF.type, BRICK.Building))
+    g.add((EX.floor1, RDF.type, BRICK.Floor))
+    g.add((EX.vav101, RDF.type, BRICK.VAV))
+    g.add((EX.vav101, RDF.type, BRICK.HVAC_Equipment))
+    for i in range(5):
+        g.add((EX.floor2, BRICK.hasPart, EX[f"ahu{i}"]))
+        g.add((EX[f"ahu{i}"], RDF.type, BRICK.Air_Handler_Unit))
+    class_index = ClassIndex.from_graph(g)
+    index = EquipmentIndex.from_graph(g, class_index, ContainmentIndex.from_graph(g))
+
+    assert index.type_of(EX.vav101) == BRICK.VAV
+    assert index.type_of(EX.room101) is None
+
+    first, total = index.page(EX.building, limit=4)
+    assert total == 6
+    assert first == [EX.ahu0, EX.ahu1, EX.ahu2, EX.ahu3]
+    rest, _ = index.page(EX.building, after=first[-1], limit=4)
+    assert rest == [EX.ahu4, EX.vav101]
+    assert index.page(EX.floor1) == ([EX.vav101], 1)
+
+
+def test_point_index_batches_equipment(class_graph):
+    """Test equipment -> points adjacency from hasPoint and isPointOf"""
+    g = Graph()
+    g.add((EX.ahu1, BRICK.hasPoint, EX.sat))
+    g.add((EX.ahu1, BRICK.hasPoint, EX.rat))
+    g.add((EX.oat, BRICK.isPointOf, EX.ahu1))
+    g.add((EX.vav1, BRICK.hasPoint, EX.zat))
+    index = PointIndex.from_graph(g, ClassIndex.from_graph(class_graph), ContainmentIndex.from_graph(g))
+
+    assert index.points_for([EX.ahu1, EX.vav1, EX.damper1]) == {
+        EX.ahu1: [EX.oat, EX.rat, EX.sat],
+        EX.vav1: [EX.zat],
+        EX.damper1: [],
+    }
+    assert index.equipment_of(EX.oat) == [EX.ahu1]
+
+
+def test_point_index_filters(class_graph):
+    """Test point filters by class subtree, equipment and building"""
+    other = Namespace("http://example.org/other#")
+    g = class_graph + Graph()
+    g.add((EX.building, RDF.type, BRICK.Building))
+    g.add((other.building, RDF.type, BRICK.Building))
+    g.add((EX.building, BRICK.hasPart, EX.ahu1))
+    g.add((EX.ahu1, BRICK.hasPoint, EX.sat))
+    g.add((EX.ahu1, BRICK.hasPoint, EX.cmd))
+    g.add((EX.sat, RDF.type, BRICK.Temperature_Sensor))
+    g.add((EX.cmd, RDF.type, BRICK.Point))
+    g.add((other.sensor, RDF.type, BRICK.Sensor))
+    index = PointIndex.from_graph(g, ClassIndex.from_graph(g), ContainmentIndex.from_graph(g))
+    class_index = ClassIndex.from_graph(g)
+
+    sensors = class_index.descendants(BRICK.Sensor)
+    assert index.filter(classes=sensors) == sorted([EX.sat, other.sensor])
+    assert index.filter(classes=sensors, building=EX.building) == [EX.sat]
+    assert index.filter(equipment=EX.ahu1) == [EX.cmd, EX.sat]
+    # no containment path: the building is resolved from the shared namespace
+    assert index.buildings_of(other.sensor) == {other.building}
+    assert index.page(index.filter(), after=EX.cmd, limit=1) == ([EX.sat], 3)
+
+
+def _assert_same_points(updated, rebuilt, nodes):
+    assert updated.filter() == rebuilt.filter()
+    for node in nodes:
+        assert updated.types_of(node) == rebuilt.types_of(node)
+        assert updated.points_of(node) == rebuilt.points_of(node)
+        assert updated.equipment_of(node) == rebuilt.equipment_of(node)
+        assert updated.buildings_of(node) == rebuilt.buildings_of(node)
+        assert updated.filter(building=node) == rebuilt.filter(building=node)
+
+
+def test_incremental_updates_match_rebuild(class_graph, containment_graph):
+    """Test that folding triple changes into the indexes matches building them from scratch"""
+    g = class_graph + containment_graph
+    g.add((EX.building, RDF.type, BRICK.Building))
+    g.add((EX.floor1, RDF.type, BRICK.Floor))
+    g.add((EX.floor2, RDF.type, BRICK.Floor))
+    g.add((EX.vav101, RDF.type, BRICK.VAV))
+    g.add((EX.vav101, BRICK.hasPoint, EX.zat))
+    g.add((EX.zat, RDF.type, BRICK.Temperature_Sensor))
+    class_index = ClassIndex.from_graph(g)
+    containment = ContainmentIndex.from_graph(g)
+    equipment = EquipmentIndex.from_graph(g, class_index, containment)
+    points = PointIndex.from_graph(g, class_index, containment)
+
+    # Move room101 to floor2 and add a new AHU with a point under floor1
+    added = [
+        (EX.floor2, BRICK.hasPart, EX.room101),
+        (EX.floor1, BRICK.hasPart, EX.ahu1),
+        (EX.ahu1, RDF.type, BRICK.Air_Handler_Unit),
+        (EX.sat, BRICK.isPointOf, EX.ahu1),
+        (EX.sat, RDF.type, BRICK.Temperature_Sensor),
+    ]
+    removed = [(EX.floor1, BRICK.hasPart, EX.room101), (EX.zat, RDF.type, BRICK.Temperature_Sensor)]
+    for triple in added:
+        g.add(triple)
+    for triple in removed:
+        g.remove(triple)
+
+    changes = added + removed
+    typed = {s for s, p, _ in changes if p == RDF.type}
+    contained = {n for s, p, o in changes if p in (BRICK.hasPart, BRICK.isPartOf) for n in (s, o)}
+    linked = {n for s, p, o in changes if p in (BRICK.hasPoint, BRICK.isPointOf) for n in (s, o)}
+    new_containment = containment.updated(g, contained)
+    moved = set(contained)
+    for node in contained:
+        moved |= containment.descendants(node) | new_containment.descendants(node)
+
+    rebuilt = ContainmentIndex.from_graph(g)
+    nodes = [EX.building, EX.floor1, EX.floor2, EX.room101, EX.vav101, EX.damper101, EX.ahu1, EX.sat, EX.zat]
+    for node in nodes:
+        assert new_containment.descendants(node) == rebuilt.descendants(node)
+        assert new_containment.ancestors(node) == rebuilt.ancestors(node)
+
+    new_equipment = equipment.updated(g, class_index, new_containment, typed, contained)
+    rebuilt_equipment = EquipmentIndex.from_graph(g, class_index, rebuilt)
+    for container in (EX.building, EX.floor1, EX.floor2):
+        assert new_equipment.page(container) == rebuilt_equipment.page(container)
+    assert new_equipment.page(EX.floor2) == ([EX.vav101], 1)
+
+    new_points = points.updated(g, class_index, new_containment, typed, linked, moved)
+    _assert_same_points(new_points, PointIndex.from_graph(g, class_index, rebuilt), nodes)
+    assert new_points.filter() == [EX.sat]
+    # the original index is left untouched
+    assert points.filter() == [EX.zat]
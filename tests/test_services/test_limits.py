@@ -0,0 +1,45 @@
+import threading
+import time
+
+from rdflib import Graph, Namespace
+import pytest
+
+from app.services.limits import QueryCancelledError, QueryTimeoutError, query_deadline
+
+EX = Namespace("http://example.org/test#")
+
+PRODUCT_QUERY = "SELECT * WHERE { ?a ?b ?c . ?d ?e ?f }"
+
+
+@pytest.fixture
+def graph():
+    g = Graph()
+    for i in range(200):
+        g.add((EX[f"s{i}"], EX.p, EX[f"o{i}"]))
+    return g
+
+
+def test_query_runs_without_guard(graph):
+    """Test that queries outside a guard are evaluated normally"""
+    assert len(list(graph.query(PRODUCT_QUERY))) == 200 * 200
+
+
+def test_query_deadline_stops_evaluation(graph):
+    """Test that a query past its deadline is aborted while producing rows"""
+    with query_deadline(time.monotonic() + 0.05):
+        results = iter(graph.query(PRODUCT_QUERY))
+        next(results)
+        time.sleep(0.1)
+        with pytest.raises(QueryTimeoutError):
+            list(results)
+
+
+def test_query_cancel_stops_evaluation(graph):
+    """Test that setting the cancel flag aborts a running query"""
+    cancelled = threading.Event()
+    with query_deadline(None, cancelled):
+        results = iter(graph.query(PRODUCT_QUERY))
+        next(results)
+        cancelled.set()
+        with pytest.raises(QueryCancelledError):
+            list(results)
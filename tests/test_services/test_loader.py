@@ -0,0 +1,70 @@
+import os
+
+from rdflib import Graph, Literal, Namespace
+from rdflib.namespace import RDF, RDFS
+
+from app.services.indexes import BRICK
+from app.services.loader import (
+    create_parse_pool, diff_sources, merge_parsed, parse_file, resolve_workers, submit_parse_jobs
+)
+
+
+def _write_building(tmp_path, name):
+    ns = Namespace(f"http://buildsys.org/ontologies/{name}#")
+    g = Graph()
+    g.bind(name, ns)
+    g.add((ns[name], RDF.type, BRICK.Building))
+    g.add((ns[name], BRICK.hasPart, ns.floor1))
+    g.add((ns.floor1, RDFS.label, Literal("Floor 1")))
+    path = tmp_path / f"{name}.ttl"
+    path.write_text(g.serialize(format="turtle"))
+    return str(path), g
+
+
+def test_parse_file_round_trip(tmp_path):
+    """Test that an encoded file merges back to the same triples"""
+    path, expected = _write_building(tmp_path, "building_a")
+
+    merged = Graph()
+    merge_parsed(merged, parse_file(path))
+    assert set(merged) == set(expected)
+    assert "building_a" in dict(merged.namespaces())
+
+
+def test_parse_files_in_pool(tmp_path):
+    """Test merging files parsed in worker processes"""
+    files = [_write_building(tmp_path, name) for name in ("building_a", "building_b")]
+
+    merged = Graph()
+    with create_parse_pool(2) as pool:
+        for future in submit_parse_jobs(pool, [path for path, _ in files]):
+            merge_parsed(merged, future.result())
+
+    assert len(merged) == sum(len(g) for _, g in files)
+
+
+def test_resolve_workers():
+    """Test worker count resolution"""
+    assert resolve_workers(4, 2) == 2
+    assert resolve_workers(1, 8) == 1
+    assert resolve_workers(0, 1) == 1
+
+
+def test_diff_sources(tmp_path):
+    """Test detecting new, changed and removed source files"""
+    path_a, _ = _write_building(tmp_path, "building_a")
+    path_b, _ = _write_building(tmp_path, "building_b")
+    signatures, changed, removed = diff_sources({}, [path_a])
+    assert changed == [path_a]
+    assert removed == []
+
+    _, changed, removed = diff_sources(signatures, [path_a])
+    assert changed == []
+
+    os.utime(path_a, ns=(0, 0))
+    _, changed, removed = diff_sources(signatures, [path_b])
+    assert changed == [path_b]
+    assert removed == [path_a]
+
+    _, changed, _ = diff_sources(signatures, [path_a])
+    assert changed == [path_a]
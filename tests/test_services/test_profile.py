@@ -0,0 +1,64 @@
+from rdflib import Graph, Namespace
+from rdflib.namespace import RDF
+
+from app.services.indexes import BRICK
+from app.services.limits import query_deadline
+from app.services.profile import profile_queries
+
+EX = Namespace("http://example.org/test#")
+
+
+def _operators(node):
+    yield node
+    for child in node.get("children", []):
+        yield from _operators(child)
+
+
+def test_profile_counts_operators_and_patterns():
+    """Test that each operator and triple pattern reports calls, solutions and matches"""
+    g = Graph()
+    g.bind("brick", BRICK)
+    g.add((EX.building, BRICK.hasPart, EX.floor1))
+    g.add((EX.floor1, BRICK.hasPart, EX.room1))
+    g.add((EX.floor1, BRICK.hasPart, EX.room2))
+    for room in (EX.room1, EX.room2):
+        g.add((room, RDF.type, BRICK.Room))
+    g.add((EX.vav1, BRICK.feeds, EX.room1))
+
+    query = """
+    SELECT ?room WHERE {
+        <http://example.org/test#building> brick:hasPart* ?room .
+        ?room a brick:Room .
+        FILTER EXISTS { ?vav brick:feeds ?room }
+    }
+    """
+    with profile_queries() as profiler, query_deadline(None):
+        rows = list(g.query(query, initNs={"brick": BRICK}))
+    assert [row.room for row in rows] == [EX.room1]
+
+    plan = profiler.report(g.namespace_manager)
+    assert plan["operator"] == "SelectQuery"
+    operators = list(_operators(plan))
+
+    bgp = next(op for op in operators if op["operator"] == "BGP" and "via" not in op)
+    assert bgp["calls"] == 1 and bgp["solutions"] == 2
+    path = next(p for p in bgp["patterns"] if "hasPart" in p["pattern"])
+    assert path["pattern"] == "<http://example.org/test#building> brick:hasPart* ?room"
+    assert path["lookups"] >= 1 and path["matches"] >= bgp["solutions"]
+
+    exists = next(op for op in operators if op.get("via") == "EXISTS")
+    assert exists["calls"] == 2 and exists["solutions"] == 1
+
+    filter_node = next(op for op in operators if op["operator"] == "Filter")
+    assert filter_node["solutions"] == 1
+    assert all(op["time_ms"] >= 0 for op in operators)
+
+
+def test_profiling_is_thread_local():
+    """Test that queries outside the profiler's block are not recorded"""
+    g = Graph()
+    g.add((EX.a, RDF.type, BRICK.Room))
+    with profile_queries() as profiler:
+        pass
+    list(g.query("SELECT ?s WHERE { ?s ?p ?o }"))
+    assert profiler.report() is None
@@ -0,0 +1,25 @@
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+import pytest
+
+from app.models.schemas import Device
+from app.services import serialization
+from app.services.serialization import dumps
+
+ROWS = [
+    {"id": "VAV101", "type": "VAV", "name": "Zone é 101 \"east\"", "location": None, "points": ["p1", "p2"]},
+    {"id": "AHU01", "type": "Air_Handler_Unit", "name": "AHU01", "location": "floor1", "points": []},
+]
+
+
+@pytest.mark.parametrize("encoder", ["orjson", "json"])
+def test_dumps_matches_response_model(monkeypatch, encoder):
+    """Test that encoded rows are byte for byte what FastAPI renders through the response model"""
+    if encoder == "json":
+        monkeypatch.setattr(serialization, "orjson", None)
+    elif serialization.orjson is None:
+        pytest.skip("orjson is not installed")
+
+    expected = JSONResponse(jsonable_encoder([Device(**row) for row in ROWS])).body
+    assert dumps(ROWS) == expected
+    assert dumps([]) == b"[]"
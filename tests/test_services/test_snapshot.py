@@ -0,0 +1,62 @@
+from rdflib import Dataset, Graph, Literal, Namespace, URIRef
+from rdflib.namespace import RDF, RDFS
+import os
+
+from app.services.indexes import BRICK
+from app.services.snapshot import (
+    compute_snapshot_key, load_snapshot_into, read_snapshot, snapshot_path, write_snapshot
+)
+
+EX = Namespace("http://example.org/test#")
+
+
+def _sample_graph():
+    g = Graph()
+    g.bind("ex", EX)
+    g.add((EX.building, RDF.type, BRICK.Building))
+    g.add((EX.building, RDFS.label, Literal("Test Building", lang="en")))
+    g.add((EX.building, BRICK.hasPart, EX.floor1))
+    g.add((EX.floor1, BRICK.area, Literal(42)))
+    return g
+
+
+def test_snapshot_round_trip(tmp_path):
+    """Test that a snapshot restores every named graph and namespace"""
+    g = _sample_graph()
+    schema = Graph()
+    schema.add((BRICK.Floor, RDFS.subClassOf, BRICK.Location))
+    sections = {"http://example.org/building": g, "http://example.org/schema": schema}
+    write_snapshot(str(tmp_path), "abc123", sections, g.namespaces())
+
+    payload = read_snapshot(str(tmp_path), "abc123")
+    assert payload is not None
+
+    restored = Dataset(default_union=True)
+    load_snapshot_into(restored, payload)
+    assert set(restored.graph(URIRef("http://example.org/building"))) == set(g)
+    assert set(restored.graph(URIRef("http://example.org/schema"))) == set(schema)
+    assert str(dict(restored.namespaces())["ex"]) == str(EX)
+
+
+def test_snapshot_key_tracks_file_content(tmp_path):
+    """Test that editing an input file changes the snapshot key"""
+    ttl = tmp_path / "building.ttl"
+    ttl.write_text(_sample_graph().serialize(format="turtle"))
+    key = compute_snapshot_key([str(ttl)], "brickschema=1")
+
+    assert compute_snapshot_key([str(ttl)], "brickschema=1") == key
+    assert compute_snapshot_key([str(ttl)], "brickschema=2") != key
+
+    ttl.write_text(ttl.read_text() + "\n# edited\n")
+    assert compute_snapshot_key([str(ttl)], "brickschema=1") != key
+
+
+def test_snapshot_stale_entries_removed(tmp_path):
+    """Test that a new snapshot replaces snapshots with other keys"""
+    g = _sample_graph()
+    write_snapshot(str(tmp_path), "old", {"graph": g}, [])
+    write_snapshot(str(tmp_path), "new", {"graph": g}, [])
+
+    assert read_snapshot(str(tmp_path), "old") is None
+    assert not os.path.exists(snapshot_path(str(tmp_path), "old"))
+    assert read_snapshot(str(tmp_path), "new") is not None
@@ -0,0 +1,57 @@
+import asyncio
+import json
+
+from rdflib import Literal, URIRef, Variable
+
+from app.services.streaming import QueryStream, encode_stream, negotiate_format
+
+ROWS = [
+    {Variable("id"): URIRef("http://example.org/a"), Variable("name"): Literal("A", lang="en")},
+    {Variable("id"): URIRef("http://example.org/b")},
+]
+VARS = [Variable("id"), Variable("name")]
+
+
+def _encode(format_name, answer=None):
+    async def batches():
+        yield ROWS[:1]
+        yield ROWS[1:]
+
+    stream = QueryStream(VARS, answer=answer) if answer is not None else QueryStream(VARS, batches())
+
+    async def collect():
+        return b"".join([chunk async for chunk in encode_stream(stream, format_name)]).decode()
+
+    return asyncio.run(collect())
+
+
+def test_negotiate_format():
+    """Test explicit formats, Accept quality ordering and fallbacks"""
+    assert negotiate_format(None) == "ndjson"
+    assert negotiate_format("text/csv") == "csv"
+    assert negotiate_format("text/csv;q=0.5, application/sparql-results+json") == "json"
+    assert negotiate_format("*/*") == "ndjson"
+    assert negotiate_format("image/png") is None
+    assert negotiate_format("text/csv", requested="tsv") == "tsv"
+    assert negotiate_format(None, requested="xml") is None
+
+
+def test_encode_sparql_json():
+    """Test the W3C SPARQL JSON results layout across batches"""
+    document = json.loads(_encode("json"))
+    assert document["head"]["vars"] == ["id", "name"]
+    bindings = document["results"]["bindings"]
+    assert bindings[0]["name"] == {"type": "literal", "value": "A", "xml:lang": "en"}
+    assert bindings[1] == {"id": {"type": "uri", "value": "http://example.org/b"}}
+
+
+def test_encode_csv_and_tsv():
+    """Test CSV plain values and TSV N-Triples terms"""
+    assert _encode("csv").splitlines() == ["id,name", "http://example.org/a,A", "http://example.org/b,"]
+    assert _encode("tsv").splitlines()[1] == '<http://example.org/a>\t"A"@en'
+
+
+def test_encode_ask():
+    """Test boolean results"""
+    assert json.loads(_encode("json", answer=True)) == {"head": {}, "boolean": True}
+    assert json.loads(_encode("ndjson", answer=False)) == {"result": False}
@@ -0,0 +1,139 @@
+from rdflib import Namespace, URIRef
+from rdflib.namespace import RDF, RDFS
+from rdflib.paths import InvPath, MulPath, OneOrMore, ZeroOrMore, ZeroOrOne
+import pytest
+
+from app.services.brick import BrickDataset
+from app.services.indexes import BRICK, ClassIndex
+from app.services.traversal import TopologyIndex, TraversalIndex
+
+EX = Namespace("http://example.org/test#")
+
+
+@pytest.fixture
+def dataset():
+    """building > floor > room via hasPart and isPartOf, and chiller -> ahu -> vav -> zone"""
+    dataset = BrickDataset(default_union=True)
+    graph = dataset.graph(URIRef("http://example.org/building"))
+    for s, p, o in [
+        (EX.building, BRICK.hasPart, EX.floor1),
+        (EX.building, BRICK.hasPart, EX.floor2),
+        (EX.room1, BRICK.isPartOf, EX.floor1),
+        (EX.floor2, BRICK.hasPart, EX.room2),
+        (EX.chiller, BRICK.feeds, EX.ahu),
+        (EX.ahu, BRICK.feeds, EX.vav),
+        (EX.zone, BRICK.isFedBy, EX.vav),
+        # a feed loop back to the chiller
+        (EX.vav, BRICK.feeds, EX.chiller),
+    ]:
+        graph.add((s, p, o))
+    graph.add((EX.building, RDF.type, BRICK.Building))
+    return dataset
+
+
+def test_descendants_and_ancestors(dataset):
+    """Test traversal in both directions, with inverse predicates folded in and depth limits"""
+    index = TraversalIndex.from_graph(dataset)
+    assert index.edge_count(BRICK.hasPart) == 3
+
+    assert set(index.descendants(EX.building)) == {EX.floor1, EX.floor2, EX.room1, EX.room2}
+    assert set(index.descendants(EX.building, max_depth=1)) == {EX.floor1, EX.floor2}
+    assert index.descendants(EX.building, max_depth=0) == []
+    assert index.ancestors(EX.room1) == [EX.floor1, EX.building]
+    assert index.depths(EX.building) == {EX.floor1: 1, EX.floor2: 1, EX.room1: 2, EX.room2: 2}
+    assert set(index.neighbors(EX.floor1, BRICK.isPartOf)) == {EX.building}
+
+    # the loop ends the search instead of running forever
+    assert set(index.descendants(EX.chiller, BRICK.feeds)) == {EX.ahu, EX.vav, EX.zone}
+    assert set(index.ancestors(EX.zone, BRICK.feeds, max_depth=2)) == {EX.vav, EX.ahu}
+    assert index.descendants(EX.missing) == []
+
+
+def test_path_pairs_match_rdflib(dataset):
+    """Test that property paths answered from the index match rdflib's own evaluation"""
+    index = TraversalIndex.from_graph(dataset)
+    nodes = [None, EX.building, EX.floor1, EX.room1, EX.chiller, EX.vav, EX.zone, EX.missing]
+    paths = [
+        MulPath(predicate, mod)
+        for predicate in (BRICK.hasPart, BRICK.feeds, InvPath(BRICK.isPartOf), InvPath(BRICK.feeds))
+        for mod in (ZeroOrMore, OneOrMore)
+    ]
+    for path in paths:
+        for subject in nodes:
+            for obj in nodes:
+                if subject is None and obj is None:
+                    assert index.path_pairs(path, subject, obj) is None
+                    continue
+                expected = set(path.eval(dataset, subject, obj))
+                assert set(index.path_pairs(path, subject, obj)) == expected, (path, subject, obj)
+
+    assert index.path_pairs(MulPath(BRICK.hasPart, ZeroOrOne), EX.building, None) is None
+    assert index.path_pairs(MulPath(RDF.type, OneOrMore), EX.building, None) is None
+
+
+def test_dataset_answers_paths_from_index(dataset):
+    """Test SPARQL property paths over a dataset with a traversal index attached"""
+    query = """
+        SELECT ?building ?part WHERE { ?building a brick:Building ; brick:hasPart+ ?part }
+    """
+    expected = {tuple(row) for row in dataset.query(query, initNs={"brick": BRICK})}
+    dataset.traversal_index = TraversalIndex.from_graph(dataset)
+    rows = {tuple(row) for row in dataset.query(query, initNs={"brick": BRICK})}
+    assert rows == expected == {(EX.building, EX.floor1), (EX.building, EX.floor2), (EX.building, EX.room2)}
+
+
+def test_topology_walks_feeds_and_parts(dataset):
+    """Test upstream and downstream walks: parts of equipment and zones count, floors do not"""
+    graph = dataset.graph(URIRef("http://example.org/building"))
+    for s, p, o in [
+        (EX.zone, BRICK.hasPart, EX.room1),
+        (EX.damper, BRICK.isPartOf, EX.vav),
+        (EX.chiller, RDF.type, BRICK.Chiller),
+        (EX.ahu, RDF.type, BRICK.Air_Handler_Unit),
+        (EX.vav, RDF.type, BRICK.VAV),
+        (EX.damper, RDF.type, BRICK.Damper),
+        (EX.zone, RDF.type, BRICK.HVAC_Zone),
+        (EX.room1, RDF.type, BRICK.Room),
+        (EX.floor1, RDF.type, BRICK.Floor),
+        (BRICK.Air_Handler_Unit, RDFS.subClassOf, BRICK.Equipment),
+        (BRICK.Chiller, RDFS.subClassOf, BRICK.Equipment),
+        (BRICK.VAV, RDFS.subClassOf, BRICK.Equipment),
+        (BRICK.Damper, RDFS.subClassOf, BRICK.Equipment),
+        (BRICK.HVAC_Zone, RDFS.subClassOf, BRICK.Zone),
+        (BRICK.Zone, RDFS.subClassOf, BRICK.Location),
+        (BRICK.Room, RDFS.subClassOf, BRICK.Location),
+        (BRICK.Floor, RDFS.subClassOf, BRICK.Location),
+    ]:
+        graph.add((s, p, o))
+    # break the feed loop so the chain has one root
+    graph.remove((EX.vav, BRICK.feeds, EX.chiller))
+    class_index = ClassIndex.from_graph(dataset)
+    traversal = TraversalIndex.from_graph(dataset)
+    topology = TopologyIndex.from_graph(dataset, class_index, traversal)
+    assert topology.type_of(EX.zone) == BRICK.HVAC_Zone
+
+    downstream = {entry.node: (entry.depth, entry.via) for entry in topology.downstream(EX.ahu)}
+    assert downstream == {
+        EX.ahu: (0, []),
+        EX.vav: (1, [EX.ahu]),
+        EX.zone: (2, [EX.vav]),
+        EX.damper: (2, [EX.vav]),
+        EX.room1: (3, [EX.zone]),
+    }
+    assert [entry.node for entry in topology.downstream(EX.ahu, max_depth=1)] == [EX.ahu, EX.vav]
+
+    # the room is reached through its zone, not its floor
+    assert [entry.node for entry in topology.upstream(EX.room1)] == [EX.room1, EX.zone, EX.vav, EX.ahu, EX.chiller]
+    assert [entry.node for entry in topology.upstream(EX.damper)] == [EX.damper, EX.vav, EX.ahu, EX.chiller]
+    assert topology.downstream(EX.missing) == []
+
+    # a new feed and a retyped node are picked up without a rebuild of the types
+    graph.add((EX.vav, BRICK.feeds, EX.zone2))
+    graph.add((EX.zone2, RDF.type, BRICK.HVAC_Zone))
+    graph.add((EX.zone2, BRICK.hasPart, EX.room2))
+    traversal = traversal.updated(dataset, {BRICK.feeds, BRICK.hasPart})
+    updated = topology.updated(dataset, class_index, traversal, {EX.zone2})
+    assert updated.type_of(EX.zone2) == BRICK.HVAC_Zone
+    assert {EX.zone2, EX.room2} <= {entry.node for entry in updated.downstream(EX.ahu)}
+    assert topology.updated(dataset, class_index, traversal, set()).type_of(EX.zone2) == BRICK.HVAC_Zone
+    assert updated.updated(dataset, class_index, traversal, set()) is updated